@@ -0,0 +1,50 @@
+# coding: utf-8
+import shutil
+import tempfile
+from glob import glob
+from os.path import join
+
+from django.test import SimpleTestCase
+from scoop.analyze.util.corpus.file import FileCorpus
+
+
+class TemporaryCorpus(FileCorpus):
+    """ Corpus stocké dans un répertoire temporaire """
+    root = None
+
+    def get_path(self, extension):
+        """ Renvoyer le chemin d'un fichier du corpus """
+        return join(self.root, '{name}.{extension}'.format(name=self.pathname, extension=extension))
+
+
+class CorpusTest(SimpleTestCase):
+    """ Test du corpus fichier et de son classifieur """
+
+    def setUp(self):
+        """ Préparer un répertoire temporaire """
+        TemporaryCorpus.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """ Supprimer les fichiers générés """
+        shutil.rmtree(TemporaryCorpus.root, ignore_errors=True)
+
+    def test_persistence(self):
+        """ Vérifier l'entraînement, l'enregistrement, la relecture et la classification """
+        corpus = TemporaryCorpus('spam')
+        signature = corpus.train("achetez des pilules pas chères", 'spam')
+        for document in ["gagnez un prix gratuit maintenant", "pilules gratuites, cliquez ici"]:
+            corpus.train(document, 'spam')
+        for document in ["on se voit demain au cinéma ?", "merci pour ton message d'hier", "tu as vu le match hier soir ?"]:
+            corpus.train(document, 'ham')
+        self.assertTrue(corpus.save())
+        version = corpus.get_version()
+        self.assertEqual(glob(join(TemporaryCorpus.root, '*.model')), [corpus.get_path('{version}.model'.format(version=version))])
+        # Relire le corpus et le modèle dans une nouvelle instance
+        reloaded = TemporaryCorpus('spam')
+        self.assertEqual(reloaded.get_classifier().version, version)
+        self.assertEqual(len(reloaded.get_corpus()), 6)
+        self.assertEqual(reloaded.classify("des pilules gratuites"), 'spam')
+        self.assertEqual(reloaded.classify("merci, on se voit demain"), 'ham')
+        # Retirer un document change la version du modèle
+        self.assertTrue(reloaded.untrain(signature))
+        self.assertNotEqual(reloaded.get_version(), version)
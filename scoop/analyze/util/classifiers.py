@@ -0,0 +1,84 @@
+# coding: utf-8
+import math
+import zlib
+
+from nltk.probability import DictionaryProbDist
+from scoop.analyze.util.extractors import extractor_base
+
+
+class HashingNaiveBayes(object):
+    """
+    Classifieur bayésien naïf à entraînement incrémental
+
+    Les propriétés renvoyées par l'extracteur sont hachées dans un nombre
+    fixe de cases, dont les compteurs par catégorie suffisent à classer
+    un document. Ajouter ou retirer un document du corpus ne fait que
+    mettre à jour quelques compteurs : aucun réentraînement n'est nécessaire,
+    et le classifieur se sérialise rapidement avec pickle.
+    """
+
+    def __init__(self, buckets=1 << 18, feature_extractor=extractor_base):
+        """
+        Initialiser un classifieur vide
+
+        :param buckets: nombre de cases de hachage des propriétés
+        :param feature_extractor: fonction renvoyant un dictionnaire de propriétés pour un document
+        """
+        self.buckets = buckets
+        self.feature_extractor = feature_extractor
+        self.documents = dict()  # nombre de documents par catégorie
+        self.counts = dict()  # {catégorie: {case: nombre}}
+        self.totals = dict()  # nombre total de propriétés par catégorie
+        self.vocabulary = dict()  # nombre de propriétés par case, toutes catégories confondues
+        self.version = None
+
+    # Getter
+    def get_features(self, document):
+        """ Renvoyer les cases des propriétés présentes dans un document """
+        features = self.feature_extractor(document)
+        return {zlib.crc32(name.encode('utf-8')) % self.buckets for name, value in features.items() if value}
+
+    def labels(self):
+        """ Renvoyer les catégories connues """
+        return [category for category, count in self.documents.items() if count > 0]
+
+    def prob_classify(self, document):
+        """
+        Renvoyer les probabilités de catégorie d'un document
+
+        :rtype: nltk.probability.DictionaryProbDist
+        """
+        labels = self.labels()
+        features = self.get_features(document)
+        total, size = sum(self.documents[label] for label in labels), len(self.vocabulary) or 1
+        logprobs = dict()
+        for label in labels:
+            counts, denominator = self.counts[label], self.totals[label] + size
+            logprobs[label] = math.log(self.documents[label] / total) + sum(math.log((counts.get(feature, 0) + 1) / denominator) for feature in features)
+        return DictionaryProbDist(logprobs, log=True, normalize=True)
+
+    def classify(self, document):
+        """ Renvoyer la catégorie la plus probable d'un document, ou None """
+        return self.prob_classify(document).max() if self.labels() else None
+
+    # Setter
+    def learn(self, document, category, weight=1):
+        """
+        Ajouter un document aux statistiques d'une catégorie
+
+        :param weight: 1 pour ajouter le document, -1 pour le retirer
+        """
+        counts = self.counts.setdefault(category, dict())
+        self.documents[category] = self.documents.get(category, 0) + weight
+        for feature in self.get_features(document):
+            counts[feature] = counts.get(feature, 0) + weight
+            self.vocabulary[feature] = self.vocabulary.get(feature, 0) + weight
+            self.totals[category] = self.totals.get(category, 0) + weight
+            if counts[feature] <= 0:
+                del counts[feature]
+            if self.vocabulary[feature] <= 0:
+                del self.vocabulary[feature]
+
+    def unlearn(self, document, category):
+        """ Retirer un document des statistiques d'une catégorie """
+        self.learn(document, category, weight=-1)
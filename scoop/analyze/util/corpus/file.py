@@ -1,19 +1,24 @@
 # coding: utf-8
+import glob
+import os
+import pickle
 import time
-from os.path import join
+from hashlib import md5, sha1
+from io import BytesIO
+from os.path import exists, getmtime, getsize, join
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import unicodecsv as csv
-from django.utils.six import StringIO
+from scoop.analyze.util.classifiers import HashingNaiveBayes
 from scoop.analyze.util.corpus.base import BaseCorpus
-from scoop.analyze.util.extractors import extractor_base
 from scoop.analyze.util.formatters import format_base
 from scoop.analyze.util.signals import analyzer_default_format
 from scoop.analyze.util.types import Dictionary, List
 from scoop.core.util.stream.directory import Paths
-from textblob.classifiers import MaxEntClassifier
 
 CORPUS_PATH = ['isolated', 'database', 'classifier', 'corpus']
+# Nombre minimum de lignes du journal avant réécriture complète de l'archive
+JOURNAL_LIMIT = 256
 
 
 class FileCorpus(BaseCorpus):
@@ -23,46 +28,83 @@ class FileCorpus(BaseCorpus):
     J'estime qu'un corpus de 2↑15 (32768) documents devrait être utilisable
     avec cette classe de corpus. Dans le cas contraire, il faudra penser
     à développer son propre module CFFI.
+    Fichiers du corpus, dans CORPUS_PATH :
+    - <name>.csv.zip : archive du corpus (catégorie, document, signature)
+    - <name>.journal.csv : modifications depuis la dernière archive (opération, catégorie, document, signature)
+    - <name>.<version>.model : classifieur entraîné, dont la version dépend du contenu du corpus
+    Le classifieur est entraîné de façon incrémentale, et n'est réentraîné
+    entièrement que si aucun fichier de modèle ne correspond au corpus.
     """
 
     # Attributs
     corpus = None  # de type Dictionary (dictionnaire auquel on peut assigner des attributs)
     corpus_shadow = None  # copie de type List (les classifieurs NLTK utilisant des listes)
-    classifier = None  # classifieur NLTK, initialisé dans get_corpus
+    classifier = None  # classifieur incrémental, initialisé dans get_classifier
+    version = 0  # empreinte du contenu du corpus, XOR des empreintes des documents
+    pending = None  # lignes de journal non enregistrées
+    journal_size = 0  # nombre de lignes du journal sur disque
+    stamp = None  # état des fichiers sur disque lors de la dernière lecture
 
     # Getter
+    def get_path(self, extension):
+        """ Renvoyer le chemin d'un fichier du corpus """
+        return join(Paths.get_root_dir(*CORPUS_PATH), '{name}.{extension}'.format(name=self.pathname, extension=extension))
+
+    def get_stamp(self):
+        """ Renvoyer l'état des fichiers du corpus sur disque """
+        paths = [self.get_path('csv.zip'), self.get_path('journal.csv')]
+        return tuple((getmtime(path), getsize(path)) if exists(path) else None for path in paths)
+
+    def get_version(self):
+        """ Renvoyer la version du corpus, qui ne dépend que de son contenu """
+        return '{version:016x}'.format(version=self.version)
+
+    @staticmethod
+    def get_signature(document):
+        """ Renvoyer la signature d'un document, identique dans tous les processus """
+        return md5(document.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_entry_hash(signature, category):
+        """ Renvoyer l'empreinte d'un document classé """
+        return int(sha1('{0}:{1}'.format(signature, category).encode('utf-8')).hexdigest()[:16], 16)
+
     def get_corpus(self):
         """ Lire et peupler le corpus """
-        if self.corpus is None:
-            self.corpus = Dictionary()
-            self.corpus.updated = time.time()
-            try:
-                directory = Paths.get_root_dir(*CORPUS_PATH)
-                infile = '{name}.csv'.format(name=self.pathname)
-                path = join(directory, '{name}.csv.zip'.format(name=self.pathname))
-                # Lire le CSV dans le fichier zip
-                with ZipFile(open(path, 'rb')) as zipfile:
-                    buffer = StringIO(zipfile.read(infile))
-                    reader = csv.reader(buffer)
-                    for row in reader:
-                        # 0: category, 1: doc, 2: hash
-                        self.corpus[row[2]] = (row[0], row[1])
-            except IOError:
-                pass
+        self.load()
         if self.corpus_shadow is None or self.corpus_shadow.updated < self.corpus.updated:
             self.corpus_shadow = List(self.corpus.values())
             self.corpus_shadow.updated = time.time()
-            self.classifier = MaxEntClassifier(self.corpus_shadow, feature_extractor=extractor_base)  # ou NaiveBayesClassifier
         return self.corpus_shadow
 
+    def get_classifier(self):
+        """
+        Renvoyer le classifieur du corpus
+
+        Le classifieur est lu depuis le fichier de modèle correspondant
+        à la version du corpus, ou entraîné et enregistré s'il n'existe pas.
+        """
+        self.load()
+        if self.classifier is None or self.classifier.version != self.get_version():
+            path = self.get_path('{version}.model'.format(version=self.get_version()))
+            try:
+                with open(path, 'rb') as infile:
+                    self.classifier = pickle.load(infile)
+            except (IOError, EOFError, pickle.UnpicklingError):
+                self.classifier = HashingNaiveBayes()
+                for document, category in self.corpus.values():
+                    self.classifier.learn(document, category)
+                self.classifier.version = self.get_version()
+                self.save_classifier()
+        return self.classifier
+
     def classify(self, document):
         """
         Renvoyer la catégorie la plus probable pour un document
 
         :rtype: str
         """
-        self.get_corpus()
-        return self.classifier.classify(document)
+        return self.get_classifier().classify(document)
 
     def classify_prob(self, document):
         """
@@ -70,47 +112,103 @@ class FileCorpus(BaseCorpus):
 
         :rtype: nltk.probability.DictionaryProbDist
         """
-        self.get_corpus()
-        return self.classifier.prob_classify(document)
+        return self.get_classifier().prob_classify(document)
 
     # Actions
+    def load(self):
+        """ Lire le corpus et son journal, si pas lus ou modifiés par un autre processus """
+        try:
+            stamp = self.get_stamp()
+        except OSError:
+            stamp = None
+        if self.corpus is not None and (self.pending or stamp == self.stamp):
+            return False
+        # Le classifieur sera relu depuis le fichier de modèle de la nouvelle version
+        self.corpus, self.classifier, self.version, self.pending, self.journal_size = Dictionary(), None, 0, [], 0
+        self.corpus.updated = time.time()
+        try:
+            # Lire le CSV dans le fichier zip
+            with ZipFile(open(self.get_path('csv.zip'), 'rb')) as zipfile:
+                reader = csv.reader(BytesIO(zipfile.read('{name}.csv'.format(name=self.pathname))), encoding='utf-8')
+                for row in reader:
+                    # 0: category, 1: doc, 2: hash
+                    self._set(row[2], row[1], row[0])
+        except IOError:
+            pass
+        try:
+            # Rejouer les modifications du journal
+            with open(self.get_path('journal.csv'), 'rb') as journal:
+                for row in csv.reader(journal, encoding='utf-8'):
+                    # 0: operation, 1: category, 2: doc, 3: hash
+                    if row[0] == '+':
+                        self._set(row[3], row[2], row[1])
+                    else:
+                        self._pop(row[3])
+                    self.journal_size += 1
+        except IOError:
+            pass
+        self.stamp = stamp
+        return True
+
     def save(self):
         """
         Enregistrer le corpus sur disque
 
+        Les modifications sont ajoutées au journal. L'archive n'est réécrite
+        que lorsque le journal devient trop long par rapport au corpus.
         :rtype: bool
         :returns: True si la sauvegarde a eu lieu, False sinon
         """
-        directory = Paths.get_root_dir(*CORPUS_PATH)
-        infile = '{name}.csv'.format(name=self.pathname)
-        path = join(directory, '{name}.csv.zip'.format(name=self.pathname))
-        # Écrire le CSV dans le fichier zip
+        self.load()
         try:
-            with ZipFile(path, 'w', ZIP_DEFLATED) as zipfile:
-                buffer = StringIO()
-                writer = csv.writer(buffer, delimiter=",", encoding='utf-8')
-                for row in self.corpus_shadow:
-                    writer.writerow(row)
-                zipfile.writestr(infile, buffer.getvalue())
+            if self.journal_size + len(self.pending) > max(JOURNAL_LIMIT, len(self.corpus) // 4):
+                self._write_archive()
+            elif self.pending:
+                with open(self.get_path('journal.csv'), 'ab') as journal:
+                    writer = csv.writer(journal, delimiter=",", encoding='utf-8')
+                    writer.writerows(self.pending)
+                self.journal_size += len(self.pending)
+            self.pending = []
+            self.stamp = self.get_stamp()
+            self.save_classifier()
             return True
         except IOError:
             return False
 
+    def save_classifier(self):
+        """ Enregistrer le classifieur à côté du corpus, et supprimer les versions obsolètes """
+        if self.classifier is None:
+            return False
+        path = self.get_path('{version}.model'.format(version=self.classifier.version))
+        try:
+            if not exists(path):
+                with open(path + '.tmp', 'wb') as outfile:
+                    pickle.dump(self.classifier, outfile, pickle.HIGHEST_PROTOCOL)
+                os.replace(path + '.tmp', path)
+            for obsolete in glob.glob(self.get_path('*.model')):
+                if obsolete != path:
+                    os.remove(obsolete)
+            return True
+        except (IOError, OSError):
+            return False
+
     def train(self, document, category):
         """
         Classer un document dans une catégorie
 
         :returns: signature du document
-        :rtype: long
+        :rtype: str
         """
-        self.get_corpus()
+        self.get_classifier()
         document = format_base(document)
         document_shadow = [document]
         analyzer_default_format.send(FileCorpus, document_shadow, category)  # On passe une liste car est modifiable par les listeners
         document = "".join(document_shadow)
-        signature = hash(document)
-        self.corpus[signature] = (document, category)
-        self.corpus.updated = time.time()
+        signature = self.get_signature(document)
+        if signature in self.corpus:
+            self.retrain(signature, category)
+        else:
+            self._set(signature, document, category, log=True)
         return signature
 
     def retrain(self, signature, category):
@@ -120,10 +218,10 @@ class FileCorpus(BaseCorpus):
         :param signature: hash du document à reclassifier
         :param category: nouvelle catégorie du document
         """
-        self.get_corpus()
+        self.get_classifier()
         if self.corpus[signature][1] != category:
-            self.corpus[signature] = (self.corpus[signature][0], category)
-            self.corpus.updated = time.time()
+            document = self._pop(signature, log=True)[0]
+            self._set(signature, document, category, log=True)
             return True
         return False
 
@@ -133,11 +231,50 @@ class FileCorpus(BaseCorpus):
 
         :param signature: Hash du document
         """
-        self.get_corpus()
-        extracted = self.corpus.pop(signature, None)
-        self.corpus.updated = time.time()
+        self.get_classifier()
+        extracted = self._pop(signature, log=True)
         return extracted is not None
 
+    # Privé
+    def _set(self, signature, document, category, log=False):
+        """ Ajouter un document au corpus, au classifieur chargé et au journal """
+        self._pop(signature, log=False)
+        self.corpus[signature] = (document, category)
+        self.corpus.updated = time.time()
+        self.version ^= self.get_entry_hash(signature, category)
+        if self.classifier is not None:
+            self.classifier.learn(document, category)
+            self.classifier.version = self.get_version()
+        if log is True:
+            self.pending.append(['+', category, document, signature])
+
+    def _pop(self, signature, log=False):
+        """ Retirer un document du corpus, du classifieur chargé et du journal """
+        extracted = self.corpus.pop(signature, None)
+        if extracted is not None:
+            self.corpus.updated = time.time()
+            self.version ^= self.get_entry_hash(signature, extracted[1])
+            if self.classifier is not None:
+                self.classifier.unlearn(*extracted)
+                self.classifier.version = self.get_version()
+            if log is True:
+                self.pending.append(['-', '', '', signature])
+        return extracted
+
+    def _write_archive(self):
+        """ Réécrire l'archive complète du corpus et vider le journal """
+        path = self.get_path('csv.zip')
+        with ZipFile(path + '.tmp', 'w', ZIP_DEFLATED) as zipfile:
+            buffer = BytesIO()
+            writer = csv.writer(buffer, delimiter=",", encoding='utf-8')
+            for signature, (document, category) in self.corpus.items():
+                writer.writerow([category, document, signature])
+            zipfile.writestr('{name}.csv'.format(name=self.pathname), buffer.getvalue())
+        os.replace(path + '.tmp', path)
+        if exists(self.get_path('journal.csv')):
+            os.remove(self.get_path('journal.csv'))
+        self.journal_size = 0
+
     # Overrides
     def __init__(self, pathname, *args, **kwargs):
         """
@@ -14,7 +14,7 @@ REGEX_HYPERLINK_MARKER = r"(https?://.+)[\s\t\n]"  # TODO: Check
 
 def extractor_base(document, train_set=None):
     """ Renvoyer des propriétés du texte """
-    features = contains_extractor(document, train_set)
+    features = contains_extractor(document)
     features['has_digit_sequence(7)'] = bool(re.search(REGEX_DIGIT_SEQUENCE_7, document))
     features['has_digit_sequence(4)'] = bool(re.search(REGEX_DIGIT_SEQUENCE_4, document))
     features['has_digit_sequence(2)'] = bool(re.search(REGEX_DIGIT_SEQUENCE_2, document))
@@ -93,15 +93,13 @@ class PictureAdmin(GenericAdminModelAdmin, AjaxSelectAdmin, AutoAuthoredModelAdm
     @addattr(short_description=_("Remove ICC Color Profile"))
     def remove_icc(self, request, queryset):
         """ Retirer le profil de couleur ICC des images """
-        for picture in queryset:
-            picture.remove_icc()
+        queryset.process(['remove_icc'])
         self.message_user(request, _("The selected pictures have been converted to basic sRGB."))
 
     @addattr(short_description=_("Optimize file size"))
     def optimize(self, request, queryset):
         """ Optimiser la taille des fichiers des images """
-        for picture in queryset:
-            picture.optimize()
+        queryset.process(['optimize'])
         self.message_user(request, _("The selected pictures have been optimized."))
 
     @addattr(short_description=_("Enhance"))
@@ -114,8 +112,7 @@ class PictureAdmin(GenericAdminModelAdmin, AjaxSelectAdmin, AutoAuthoredModelAdm
     @addattr(short_description=_("Quantize"))
     def quantize(self, request, queryset):
         """ Réduire l'image à une palette + tramage """
-        for picture in queryset:
-            picture.quantize(False)
+        queryset.process([('quantize', {'depth': 8})])
         self.message_user(request, _("The selected pictures have been quantized."))
 
     @addattr(short_description=_("Smart resize {number} percent").format(number=60))
@@ -142,8 +139,7 @@ class PictureAdmin(GenericAdminModelAdmin, AjaxSelectAdmin, AutoAuthoredModelAdm
     @addattr(short_description=_("Autocrop"))
     def autocrop(self, request, queryset):
         """ Découper automatiquement l'image (simple) """
-        for picture in queryset:
-            picture.autocrop()
+        queryset.process(['autocrop'])
         self.message_user(request, _("The selected pictures have been automatically cropped."))
 
     @addattr(short_description=_("Autocrop by feature detection"))
@@ -156,36 +152,31 @@ class PictureAdmin(GenericAdminModelAdmin, AjaxSelectAdmin, AutoAuthoredModelAdm
     @addattr(short_description=_("Rotate 90 degrees clockwise"))
     def rotate90(self, request, queryset):
         """ Pivoter l'image à 90° dans le sens des aiguilles """
-        for picture in queryset:
-            picture.rotate(90)
+        queryset.process([('rotate', {'angle': 90})])
         self.message_user(request, _("The selected pictures have been rotated."))
 
     @addattr(short_description=_("Rotate 180 degrees"))
     def rotate180(self, request, queryset):
         """ Pivoter l'image à 180° """
-        for picture in queryset:
-            picture.rotate(180)
+        queryset.process([('rotate', {'angle': 180})])
         self.message_user(request, _("The selected pictures have been rotated."))
 
     @addattr(short_description=_("Rotate 90 degrees counter-clockwise"))
     def rotate270(self, request, queryset):
         """ Pivoter l'image à 90° dans le sens contraire des aiguilles """
-        for picture in queryset:
-            picture.rotate(-90)
+        queryset.process([('rotate', {'angle': -90})])
         self.message_user(request, _("The selected pictures have been rotated."))
 
     @addattr(short_description=_("Mirror along the y axis (horizontally)"))
     def mirror_x(self, request, queryset):
         """ Effectuer une symétrie horizontale (autour de l'axe Y) """
-        for picture in queryset:
-            picture.mirror('x')
+        queryset.process([('mirror', {'orientation': 'x'})])
         self.message_user(request, _("The selected pictures have been mirrored."))
 
     @addattr(short_description=_("Mirror along the x axis (vertically)"))
     def mirror_y(self, request, queryset):
         """ Effectuer une symétrie verticale (autour de l'axe X) """
-        for picture in queryset:
-            picture.mirror('y')
+        queryset.process([('mirror', {'orientation': 'y'})])
         self.message_user(request, _("The selected pictures have been mirrored."))
 
     @addattr(short_description=_("Update the path of these pictures with current rules"))
@@ -43,7 +43,7 @@ def new_content(sender, instance, raw, created, using, update_fields, **kwargs):
     """ Traiter un contenu qui vient d'être sauvegardé """
     instance.clean_tags()
     instance._populate_html()
-    populate_similar.delay(instance)
+    populate_similar.delay(instance, repopulate=True)
     try:
         if created:
             author = instance.authors.all().first()
@@ -28,9 +28,7 @@ def picture_created(sender, instance, raw, created, using, update_fields, **kwar
     """ Traiter une image après son enregistrement """
     if created:
         Animation.objects.create_from_animation(instance)
-        instance.resize()
-        instance.fix_exif()
-        instance.optimize()
+        instance.process(['fix_exif', 'resize', 'optimize'])
         instance.set_correct_extension()
         instance.update_size()
         record.send(sender, actor=instance.author, action='content.create.picture', target=instance)
@@ -0,0 +1,72 @@
+# coding: utf-8
+import os
+import shutil
+import subprocess
+import tempfile
+from os.path import dirname, join
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from scoop.content.util.pipeline import process_file, process_files
+
+FIXTURE_PATH = join(dirname(dirname(dirname(__file__))), 'tests', 'images')
+
+
+class Command(BaseCommand):
+    """ Comparer le traitement des images par processus externes et par la chaîne PIL """
+    args = ''
+    help = 'Compare picture processing time between the external tools chain and the in-process pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', '-p', action='store', dest='path', default=FIXTURE_PATH, help='Directory of sample pictures.')
+        parser.add_argument('--copies', '-c', action='store', type=int, dest='copies', default=20, help='Number of copies of each picture.')
+        parser.add_argument('--processes', '-n', action='store', type=int, dest='processes', default=None, help='Number of pipeline processes.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        operations = ['fix_exif', 'resize', 'optimize']
+        results = []
+        for label, method in [("External tools", self.run_tools), ("Pipeline, single process", lambda paths: [process_file(path, operations) for path in paths]),
+                              ("Pipeline, process pool", lambda paths: process_files(paths, operations, processes=options['processes']))]:
+            directory = tempfile.mkdtemp(prefix='picture-benchmark-')
+            try:
+                paths = self.make_samples(options['path'], directory, options['copies'])
+                start = perf_counter()
+                method(paths)
+                elapsed = perf_counter() - start
+                size = sum(os.path.getsize(join(directory, name)) for name in os.listdir(directory))
+                results.append((label, len(paths), elapsed, size))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        for label, count, elapsed, size in results:
+            print("{label}: {count} pictures in {time:.3f}s, {rate:.1f} pictures/s, {size} bytes".format(
+                label=label, count=count, time=elapsed, rate=count / elapsed, size=size))
+
+    @staticmethod
+    def make_samples(source, directory, copies):
+        """ Copier les images d'exemple dans un répertoire temporaire """
+        paths = []
+        for name in sorted(os.listdir(source)):
+            if os.path.splitext(name)[1].lower() in {'.jpg', '.jpeg', '.png', '.gif'}:
+                for index in range(copies):
+                    path = join(directory, '{index}-{name}'.format(index=index, name=name))
+                    shutil.copyfile(join(source, name), path)
+                    paths.append(path)
+        return paths
+
+    @staticmethod
+    def run_tools(paths):
+        """ Traiter les images comme le faisait la chaîne de processus externes """
+        width, height = settings.DEFAULT_THUMBNAIL_DIMENSIONS.values()
+        with open(os.devnull, 'wb') as devnull:
+            for path in paths:
+                extension = os.path.splitext(path)[1].lower()
+                commands = [["convert", path, "-resize", "{}x{}>".format(width, height), path]]
+                if extension in {'.jpg', '.jpeg'}:
+                    commands += [["exiftran", "-a", "-i", "-p", path], ["jpegoptim", "-o", "-p", "--strip-com", path]]
+                elif extension == '.png':
+                    commands += [["pngquant", "--speed", "2", "--force", "--quality", "70-100", "--ext", ".png", path], ["optipng", "-strip", "all", "-o7", path]]
+                for command in commands:
+                    if shutil.which(command[0]):
+                        subprocess.call(command, stdout=devnull, stderr=devnull)
@@ -0,0 +1,26 @@
+# coding: utf-8
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import ugettext
+from scoop.content.models.content import Content
+
+
+class Command(BaseCommand):
+    """ Commande pour indexer la similarité de tous les contenus """
+    args = ''
+    help = ugettext("Compute similarity signatures of all contents, then their similar contents")
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        count = Content.objects.count()
+        # Calculer d'abord toutes les signatures, pour que tous les candidats soient indexés
+        for ind, content in enumerate(Content.objects.order_by('id').iterator(), start=1):
+            content.update_signature()
+            Content.objects.filter(pk=content.pk).update(data=content.data)
+            if ind % 256 == 0:
+                print("{i:06n}/{count:06n} signatures".format(i=ind, count=count), file=sys.stderr)
+        for content in Content.objects.visible().order_by('id').iterator():
+            if content._populate_similar(repopulate=True):
+                Content.objects.filter(pk=content.pk).update(data=content.data)
+        print("Indexed {count} contents".format(count=count))
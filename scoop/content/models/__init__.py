@@ -10,4 +10,5 @@ from .content import Content, ContentApproval
 from .category import Category, CategoryTranslation
 from .link import Link
 from .picture import Picture
+from .similarity import SimilarityBand
 from .subscription import Subscription
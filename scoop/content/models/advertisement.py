@@ -13,10 +13,10 @@ from scoop.core.abstract.core.icon import IconModel
 from scoop.core.abstract.core.rectangle import RectangleModel
 from scoop.core.abstract.core.weight import WeightedModel
 from scoop.core.abstract.user.authored import AuthoredModel
-from scoop.core.util.model.model import SingleDeleteManager, SingleDeleteQuerySetMixin
+from scoop.core.util.model.model import SingleDeleteManager
 
 
-class AdvertisementQuerySet(models.QuerySet, SingleDeleteQuerySetMixin):
+class AdvertisementQuerySet(models.QuerySet):
     """ Manager des annonces publicitaires """
 
     # Getter
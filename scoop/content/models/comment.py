@@ -19,7 +19,6 @@ from scoop.core.abstract.core.uuid import UUID64Model
 from scoop.core.abstract.user.ippoint import IPPointableModel
 from scoop.core.util.data.dateutil import now
 from scoop.core.util.data.typeutil import make_iterable
-from scoop.core.util.model.model import SingleDeleteQuerySetMixin
 from scoop.core.util.shortcuts import addattr
 
 
@@ -48,7 +47,7 @@ class CommentQuerySetMixin(object):
             return self.filter(author__in=author).update(visible=False)
 
 
-class CommentQuerySet(models.QuerySet, CommentQuerySetMixin, SingleDeleteQuerySetMixin, ModeratedQuerySetMixin):
+class CommentQuerySet(models.QuerySet, CommentQuerySetMixin, ModeratedQuerySetMixin):
     """ Queryset des commentaires """
     pass
 
@@ -2,6 +2,7 @@
 """ Contenus texte """
 import logging
 from datetime import date, timedelta
+from hashlib import md5
 from operator import itemgetter
 from traceback import print_exc
 
@@ -14,16 +15,15 @@ from django.conf import settings
 from django.core.urlresolvers import reverse_lazy
 from django.db import models
 from django.template.defaultfilters import striptags, truncatewords
-from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import pgettext_lazy
 from fuzzywuzzy import fuzz
-from ngram import NGram
 from scoop.analyze.abstract.classifiable import ClassifiableModel
 from scoop.content.models.category import Category
+from scoop.content.util import similarity
 from scoop.content.util.signals import content_format_html, content_pre_lock, content_updated
 from scoop.core.abstract.content.attachment import AttachableModel
 from scoop.core.abstract.content.comment import CommentableModel
@@ -38,16 +38,14 @@ from scoop.core.abstract.seo.index import SEIndexModel, SEIndexQuerySetMixin
 from scoop.core.abstract.social.access import PrivacyModel
 from scoop.core.abstract.user.ippoint import IPPointableModel
 from scoop.core.util.data.dateutil import is_new
-from scoop.core.util.data.textutil import clean_html, text_to_dict
+from scoop.core.util.data.textutil import clean_html
 from scoop.core.util.data.typeutil import make_iterable
-from scoop.core.util.django.templates import render_block_to_string
-from scoop.core.util.model.model import SingleDeleteQuerySetMixin
 from scoop.core.util.shortcuts import addattr
 
 logger = logging.getLogger(__name__)
 
 
-class ContentQuerySet(models.QuerySet, SingleDeleteQuerySetMixin):
+class ContentQuerySet(models.QuerySet):
     """
     Mixin de Manager et Queryset
 
@@ -266,7 +264,7 @@ class Content(NullableGenericModel, PicturableModel, PrivacyModel, CommentableMo
     FORMAT_CHOICES = FORMATS.items()
     PLAIN_HTML, MARKDOWN, TEXTILE = 0, 1, 2
     TRANSFORMS = {1: markdown.Markdown().convert, 2: textile.textile}  # fonctions de conversion vers HTML
-    DATA_KEYS = ['similar', 'admin', 'privacy']
+    DATA_KEYS = ['similar', 'signature', 'admin', 'privacy']
     classifications = {'language-level': ('low', 'mid', 'hi')}
 
     # Champs
@@ -344,11 +342,16 @@ class Content(NullableGenericModel, PicturableModel, PrivacyModel, CommentableMo
 
         :returns: similarité entre 0.0 et 1.0, 1.0 étant l'identité
         """
-        labels = {'title', 'body', 'tags'}
-        this, that = ({label: render_block_to_string("content/similarity/content.djhtml", item, {'content': self}) for label in labels} for item in
-                      [self, content])
-        weights = text_to_dict(render_to_string("content/similarity/weights.txt", {}), evaluate=True)  # texte de la forme key:value\n
-        return sum([NGram.compare(this[label], that[label]) * weights[label] for label in labels]) / sum(weights.values())
+        return similarity.get_similarity(self.get_signature(), content.get_signature())
+
+    def get_similarity_fields(self):
+        """ Renvoyer les textes du contenu servant au calcul de similarité """
+        return {'title': self.title, 'body': striptags(self.html or self.body), 'tags': " ".join(str(tag) for tag in self.get_tags())}
+
+    def get_signature(self):
+        """ Renvoyer la signature MinHash du contenu, calculée si nécessaire """
+        signature = self.get_data('signature')
+        return signature['values'] if signature else self.update_signature()
 
     @addattr(short_description=_("Teaser"))
     def get_teaser(self, words=DEFAULT_TEASER_WORDS):
@@ -420,18 +423,41 @@ class Content(NullableGenericModel, PicturableModel, PrivacyModel, CommentableMo
         """
         Définir la liste des documents similaires à ce document
 
+        Seuls les contenus partageant des clés LSH avec ce document sont comparés.
         :param repopulate: recréer la liste même si elle existe déjà
         :param result_count: nombre maximum de contenus similaires à enregistrer
         :param categories: liste de types de contenu à choisir ou None
         """
+        from scoop.content.models.similarity import SimilarityBand
         if self.is_published() and (not self.get_data('similar') or repopulate is True):
-            items = Content.objects.visible(category__in=[self.category] if categories is None else categories).exclude(id=self.id).distinct().iterator()
-            matches = {item.id: self.get_similarity(item) for item in items}
-            matches = sorted(matches.items(), key=itemgetter(1))[0:result_count]
-            self.set_data('similar', [item[0] for item in matches])
+            signature = self.get_signature()
+            candidates = SimilarityBand.objects.get_candidates(similarity.get_band_keys(signature), exclude=self.id)
+            items = Content.objects.visible(category__in=[self.category] if categories is None else categories).filter(id__in=candidates).only('id', 'data')
+            matches = {item.id: similarity.get_similarity(signature, item.get_data('signature', {}).get('values', {})) for item in items}
+            matches = sorted(matches.items(), key=itemgetter(1), reverse=True)[0:result_count]
+            self.set_data('similar', [item[0] for item in matches if item[1] > 0])
             return True
         return False
 
+    def update_signature(self, force=False):
+        """
+        Calculer la signature MinHash et les clés LSH du contenu
+
+        La signature n'est recalculée que si les textes du contenu ont changé.
+        :returns: la signature du contenu
+        """
+        from scoop.content.models.similarity import SimilarityBand
+        fields = self.get_similarity_fields()
+        fingerprint = md5(repr(sorted(fields.items())).encode('utf-8')).hexdigest()
+        current = self.get_data('signature')
+        if force or not current or current['hash'] != fingerprint:
+            values = similarity.get_signature(fields)
+            self.set_data('signature', {'hash': fingerprint, 'values': values})
+            if self.pk:
+                SimilarityBand.objects.set_keys(self, similarity.get_band_keys(values))
+            return values
+        return current['values']
+
     # Setter
     def undelete(self):
         """ Marquer le contenu comme non supprimé """
@@ -492,6 +518,7 @@ class Content(NullableGenericModel, PicturableModel, PrivacyModel, CommentableMo
 
     def save(self, *args, **kwargs):
         """ Enregistrer l'objet dans la base de données """
+        self.updated = timezone.now()
         super(Content, self).save(*args, **kwargs)
         # Envoyer un signal insiquand que le contenu est mis à jour
         if self.approval.approved:
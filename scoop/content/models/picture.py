@@ -30,6 +30,7 @@ from easy_thumbnails.models import Source, Thumbnail
 from wand.image import Image as WImage
 
 from scoop.content.util.picture import clean_thumbnails, convex_hull, convex_hull_to_rect, download
+from scoop.content.util.pipeline import process_file, process_files
 from scoop.core.abstract.content.acl import ACLModel
 from scoop.core.abstract.content.license import AudienceModel, CreationLicenseModel
 from scoop.core.abstract.core.data import DataModel
@@ -41,6 +42,7 @@ from scoop.core.abstract.core.weight import WeightedModel
 from scoop.core.util.data.dateutil import now
 from scoop.core.util.data.typeutil import string_to_dict
 from scoop.core.util.django.templates import render_to
+from scoop.core.util.model.deletion import delete_in_chunks
 from scoop.core.util.model.fields import WebImageField
 from scoop.core.util.shortcuts import addattr
 from scoop.core.util.stream.directory import Paths
@@ -133,8 +135,7 @@ class PictureQuerySetMixin(object):
         """ Supprimer les images volatiles (après 24h de délai) """
         time_limit = now() - 86400
         images = self.filter(transient=True, time__lt=time_limit)
-        for image in images:
-            image.delete(clear=True)
+        delete_in_chunks(images, clear=True)
 
     @transaction.atomic
     def update_size(self):
@@ -142,6 +143,21 @@ class PictureQuerySetMixin(object):
         for picture in self.all():
             picture.update_size()
 
+    def process(self, operations, processes=None):
+        """
+        Appliquer une chaîne d'opérations aux images dans un pool de processus
+
+        :param operations: liste d'opérations, voir scoop.content.util.pipeline
+        :param processes: nombre maximum de processus de traitement
+        :returns: le nombre d'images traitées
+        """
+        pictures = [picture for picture in self.all() if picture.exists()]
+        results = process_files([picture.image.path for picture in pictures], operations, processes=processes)
+        for picture, result in zip(pictures, results):
+            if result is not None:
+                picture._set_processed(*result)
+        return len([result for result in results if result is not None])
+
     @staticmethod
     def clean_thumbnails():
         """ Supprimer les miniatures """
@@ -183,8 +199,7 @@ class PictureManager(models.Manager.from_queryset(PictureQuerySet), models.Manag
     # Overrides
     def delete(self):
         """ Supprimer les images du Queryset """
-        for picture in self:
-            picture.delete()
+        return delete_in_chunks(self.all())
 
 
 class Picture(DatetimeModel, WeightedModel, RectangleModel, ModeratedModel, FreeUUIDModel, CreationLicenseModel, AudienceModel, DataModel, ACLModel):
@@ -206,7 +221,7 @@ class Picture(DatetimeModel, WeightedModel, RectangleModel, ModeratedModel, Free
     deleted = models.BooleanField(default=False, verbose_name=pgettext_lazy('picture', "Deleted"))
     animated = models.BooleanField(default=False, verbose_name=pgettext_lazy('picture', "Animated"))
     transient = models.BooleanField(default=False, db_index=False, verbose_name=pgettext_lazy('picture', "Transient"))  # temporaire avant effacement
-    updated = models.DateTimeField(default=timezone.now, verbose_name=pgettext_lazy('picture', "Updated"))
+    updated = models.DateTimeField(default=timezone.now, db_index=True, verbose_name=pgettext_lazy('picture', "Updated"))
     limit = models.Q(model__in=['profile', 'content', 'city'])  # limite de content_type
     content_type = models.ForeignKey('contenttypes.ContentType', null=True, blank=True, verbose_name=_("Content type"), limit_choices_to=limit)
     object_id = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("Object Id"))
@@ -594,6 +609,20 @@ class Picture(DatetimeModel, WeightedModel, RectangleModel, ModeratedModel, Free
         return True
 
     # Actions
+    def process(self, operations):
+        """
+        Appliquer une chaîne d'opérations à l'image en un seul décodage/encodage
+
+        :param operations: liste d'opérations, voir scoop.content.util.pipeline
+        :returns: True si l'image a été traitée
+        """
+        if self.exists():
+            result = process_file(self.image.path, operations)
+            if result is not None:
+                self._set_processed(*result)
+                return True
+        return False
+
     def clean_thumbnail(self):
         """ Supprimer les miniatures de l'image """
         if self.image:
@@ -608,64 +637,35 @@ class Picture(DatetimeModel, WeightedModel, RectangleModel, ModeratedModel, Free
 
     def fix_exif(self):
         """ Réorienter l'image jpeg avec un champ EXIF Rotation différent de 0 """
-        if self.get_extension() in {'.jpg', '.jpeg'}:
-            subprocess.call(["exiftran", "-a", "-i", "-p", self.image.path], stderr=open(os.devnull, 'wb'))
-            self.update_size()
+        return self.process(['fix_exif'])
 
     def convert(self, ext='jpg'):
         """ Convertir l'image en un format jpg ou png """
-        if ext in {'png', 'jpg', 'jpeg'}:
-            original_path = self.image.path
-            path_basename, extension = os.path.splitext(self.image.path)
-            new_basename = os.path.basename(self.image.path).replace(extension, '.{}'.format(ext), 1)
-            new_path = "{}.{}".format(path_basename, ext)
-            subprocess.call(["convert", "{}[0]".format(self.image.path), new_path])
-            with open(new_path, 'rb') as descriptor:
-                self.image.save(new_basename, File(descriptor))
-            os.unlink(original_path)
+        return self.process([('convert', {'ext': ext})])
 
     def optimize(self):
         """ Optimiser la taille du fichier image """
-        if self.exists():
-            extension = self.get_extension()
-            if extension in {".jpg", ".jpeg"}:
-                subprocess.call(["jpegoptim", "-o", "-p", "--strip-com", self.image.path], stderr=open(os.devnull, 'wb'))
-            elif extension == ".png":
-                subprocess.call(["pngquant", "--speed", "2", "--force", "--quality", "70-100", "--ext", ".png", self.image.path], stderr=open(os.devnull, 'wb'))
-                subprocess.call(["optipng", "-strip", "all", "-o7", self.image.path], stderr=open(os.devnull, 'wb'))
-            return True
-        return False
+        return self.process(['optimize'])
 
     def resize(self, width=None, height=None):
         """ Redimensionner l'image en conservant le ratio """
-        if self.exists():
-            if width is None or height is None:
-                width, height = settings.DEFAULT_THUMBNAIL_DIMENSIONS.values()
-            if self.width >= width or self.height >= height:
-                subprocess.call(["convert", self.image.path, "-resize", "{}x{}>".format(width, height), self.image.path])
-                self.update_size()
+        return self.process([('resize', {'width': width, 'height': height})])
 
     def remove_icc(self):
         """ Supprimer le profil de couleur et les métadonnées """
-        if self.exists():
-            subprocess.call(["convert", self.image.path, "-strip", self.image.path])
+        return self.process(['remove_icc'])
 
     def rotate(self, angle=90):
         """ Pivoter l'image dans le sens des aiguilles d'une montre """
-        if self.exists():
-            subprocess.call(["convert", self.image.path, "-rotate", "{}".format(angle), self.image.path])
-            self.update_size()
+        return self.process([('rotate', {'angle': angle})])
 
     def mirror(self, orientation='x'):
         """ Appliquer un miroir à l'image dans le sens x ou y """
-        if self.exists():
-            subprocess.call(["convert", self.image.path, "-flop" if orientation == "x" else "-flip", self.image.path])
+        return self.process([('mirror', {'orientation': orientation})])
 
     def autocrop(self):
         """ Rogner automatiquement par couleur de bordure """
-        if self.exists():
-            subprocess.call(["convert", self.image.path, "-fuzz", "5%", "-trim", "+repage", self.image.path])
-            self.update_size()
+        return self.process(['autocrop'])
 
     def autocrop_advanced(self):
         """ Rogner automatiquement selon les zones d'intérêt """
@@ -712,11 +712,7 @@ class Picture(DatetimeModel, WeightedModel, RectangleModel, ModeratedModel, Free
         if self.exists():
             if save:
                 self.clone(self.description)
-            if depth <= 8:
-                subprocess.call(["convert", self.image.path, "-dither", "FloydSteinberg", "-colors", "{0}".format(2 ** depth), self.image.path])
-            else:
-                subprocess.call(["convert", self.image.path, "-depth", "{0}".format(depth // 3), "-ordered-dither",
-                                 "threshold,{0},{0},{0}".format(2 ** (depth // 3)), self.image.path])
+            self.process([('quantize', {'depth': depth})])
 
     def contrast(self, save=True):
         """ Augmenter le contraste dans l'espace de couleur Lab """
@@ -781,6 +777,13 @@ class Picture(DatetimeModel, WeightedModel, RectangleModel, ModeratedModel, Free
             return True
         return False
 
+    # Privé
+    def _set_processed(self, path, width, height):
+        """ Enregistrer le chemin et les dimensions d'un fichier image traité """
+        name = os.path.join(os.path.dirname(self.image.name), os.path.basename(path))
+        self.image.name, self.width, self.height = name, width, height
+        Picture.objects.filter(pk=self.pk).update(image=name, width=width, height=height)
+
     # Overrides
     def __str__(self):
         """ Renvoyer la représentation unicode de l'objet """
@@ -0,0 +1,48 @@
+# coding: utf-8
+from django.db import models, transaction
+from django.db.models.aggregates import Count
+from django.utils.translation import ugettext_lazy as _
+
+
+class SimilarityBandManager(models.Manager):
+    """ Manager des clés LSH de similarité des contenus """
+
+    # Getter
+    def get_candidates(self, keys, exclude=None, limit=200):
+        """
+        Renvoyer les ID des contenus partageant des clés LSH, par nombre de clés partagées
+
+        :param keys: clés LSH d'un contenu
+        :param exclude: ID de contenu à ignorer
+        :param limit: nombre maximum de candidats
+        """
+        bands = self.filter(key__in=list(keys)).exclude(content_id=exclude)
+        rows = bands.values('content_id').annotate(hits=Count('id')).order_by('-hits')[:limit]
+        return [row['content_id'] for row in rows]
+
+    # Setter
+    @transaction.atomic()
+    def set_keys(self, content, keys):
+        """ Remplacer les clés LSH d'un contenu """
+        self.filter(content=content).delete()
+        self.bulk_create([SimilarityBand(content=content, key=key) for key in keys])
+
+
+class SimilarityBand(models.Model):
+    """ Clé LSH d'une bande de signature MinHash de contenu """
+
+    # Champs
+    content = models.ForeignKey('content.Content', on_delete=models.CASCADE, related_name='similarity_bands', verbose_name=_("Content"))
+    key = models.BigIntegerField(db_index=True, verbose_name=_("Key"))
+    objects = SimilarityBandManager()
+
+    # Overrides
+    def __str__(self):
+        """ Renvoyer la représentation unicode de l'objet """
+        return "{content}:{key:x}".format(content=self.content_id, key=self.key)
+
+    # Métadonnées
+    class Meta:
+        verbose_name = _("similarity band")
+        verbose_name_plural = _("similarity bands")
+        app_label = 'content'
@@ -12,6 +12,10 @@ class ContentIndex(indexes.SearchIndex, indexes.Indexable):
         from scoop.content.models.content import Content
         return Content
 
+    def get_updated_field(self):
+        """ Renvoyer le champ de date de mise à jour, pour l'indexation incrémentale """
+        return 'updated'
+
     def index_queryset(self, using=None):
         """ Renvoyer le queryset de l'index """
         return self.get_model().objects.all()
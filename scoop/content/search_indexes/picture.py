@@ -12,6 +12,10 @@ class PictureIndex(indexes.SearchIndex, indexes.Indexable):
         """ Renvoyer le modèle de l'index """
         return Picture
 
+    def get_updated_field(self):
+        """ Renvoyer le champ de date de mise à jour, pour l'indexation incrémentale """
+        return 'updated'
+
     def index_queryset(self, using=None):
         """ Renvoyer le queryset de l'index """
         return self.get_model().objects.all()
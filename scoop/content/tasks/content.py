@@ -5,6 +5,9 @@ from celery import task
 @task(expires=60, rate_limit='2/s')
 def populate_similar(content, *args, **kwargs):
     """ Définir les contenus similaires à un document """
+    from scoop.content.models import Content
+    # Mettre à jour la signature, puis la liste des similaires sans renvoyer de signal post_save
+    content.update_signature()
     result = content._populate_similar(*args, **kwargs)
-    content.save()
+    Content.objects.filter(pk=content.pk).update(data=content.data)
     return result
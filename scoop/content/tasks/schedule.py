@@ -7,6 +7,7 @@ from django.utils import timezone
 from easy_thumbnails.files import generate_all_aliases
 from scoop.content.models.picture import Picture
 from scoop.core.util.django.sitemaps import ping_feed
+from scoop.core.util.model.deletion import delete_in_chunks
 
 
 @periodic_task(run_every=timedelta(hours=48), options={'expires': 3600})
@@ -14,8 +15,7 @@ def clean_transient_pictures():
     """ Supprimer les images volatiles de plus de 24 heures """
     limit = timezone.now() - timedelta(hours=2)
     pictures = Picture.objects.filter(transient=True, updated__lt=limit)
-    for picture in pictures:
-        picture.delete(clear=True)
+    delete_in_chunks(pictures, clear=True)
 
 
 @periodic_task(run_every=timedelta(hours=4), options={'expires': 3600})
@@ -0,0 +1,44 @@
+# coding: utf-8
+import os
+import shutil
+import tempfile
+from os.path import join
+
+from django.test import SimpleTestCase
+from PIL import Image
+from scoop.content.util.pipeline import process_file
+
+path = os.path.dirname(__file__)
+
+
+class PipelineTest(SimpleTestCase):
+    """ Test de la chaîne de traitement d'images """
+
+    def setUp(self):
+        """ Copier les images de test dans un répertoire temporaire """
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """ Supprimer les fichiers générés """
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def copy(self, name):
+        """ Renvoyer le chemin d'une copie d'une image de test """
+        return shutil.copy(join(path, 'images', name), join(self.root, name))
+
+    def test_unchanged_jpeg(self):
+        """ Vérifier qu'une image jpeg non modifiée n'est pas réencodée """
+        filename = self.copy('croppable.jpg')
+        with open(filename, 'rb') as f:
+            original = f.read()
+        for _ in range(2):
+            self.assertEqual(process_file(filename, ['resize', 'optimize'])[0], filename)
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), original)
+
+    def test_modified_jpeg(self):
+        """ Vérifier qu'une image jpeg modifiée est réencodée """
+        filename = self.copy('croppable.jpg')
+        with Image.open(filename) as image:
+            width, height = image.size
+        self.assertEqual(process_file(filename, [('rotate', {'angle': 90}), 'optimize'])[1:], (height, width))
@@ -0,0 +1,52 @@
+# coding: utf-8
+import loremipsum
+from django.test.testcases import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from haystack import connection_router, connections
+from scoop.content.models import Content
+from scoop.content.search_indexes import ContentIndex
+from scoop.core.util.search import IndexBuffer, QueuedSignalProcessor
+from scoop.user.models.user import User
+
+SIMPLE_CONNECTIONS = {'default': {'ENGINE': 'haystack.backends.simple_backend.SimpleEngine'}}
+
+
+@override_settings(HAYSTACK_CONNECTIONS=SIMPLE_CONNECTIONS)
+class SearchIndexTest(TestCase):
+    """ Test de l'indexation incrémentale des contenus """
+    # Configuration
+    fixtures = ['category', 'mailtype', 'options']
+
+    def setUp(self):
+        """ Définit l'environnement des tests """
+        connections.reload('default')
+        self.user = User.objects.create(username='searchuser', email='search@foobar.foo')
+        self.processor = QueuedSignalProcessor(connections, connection_router)
+        self.processor.buffer = IndexBuffer(size=100, delay=3600)
+
+    def tearDown(self):
+        """ Déconnecter le processeur de signaux """
+        self.processor.teardown()
+
+    def test_queued_updates(self):
+        """ Vérifier que les contenus modifiés sont mis en file une seule fois """
+        content = Content.objects.post([self.user], 'blog', loremipsum.get_sentence()[0:100], loremipsum.get_paragraphs(2), visible=True)
+        content.save()
+        content.save()
+        other = Content.objects.post([self.user], 'blog', loremipsum.get_sentence()[0:100], loremipsum.get_paragraphs(2), visible=True)
+        other_pk = other.pk
+        other.delete()
+        self.user.save()  # modèle non indexé
+        self.assertEqual(self.processor.buffer.flush(direct=True), 2, "each content should be reindexed once")
+        self.assertEqual(self.processor.buffer.flush(direct=True), 0, "the buffer should be empty after a flush")
+        self.assertNotIn(other_pk, Content.objects.values_list('pk', flat=True))
+
+    def test_updated_field(self):
+        """ Vérifier que seuls les contenus modifiés récemment sont réindexés par update_index --age """
+        index = ContentIndex()
+        content = Content.objects.post([self.user], 'blog', loremipsum.get_sentence()[0:100], loremipsum.get_paragraphs(2), visible=True)
+        start = timezone.now()
+        self.assertFalse(index.build_queryset(start_date=start).filter(pk=content.pk).exists(), "content should not be in the delta")
+        content.save()
+        self.assertTrue(index.build_queryset(start_date=start).filter(pk=content.pk).exists(), "content should be in the delta")
@@ -0,0 +1,23 @@
+# coding: utf-8
+from django.test import TestCase
+from scoop.content.util.similarity import get_band_keys, get_shingles, get_signature, get_similarity
+
+
+class SimilarityTest(TestCase):
+    """ Test des signatures MinHash de contenus """
+
+    def test_shingles(self):
+        """ Tester le découpage d'un texte en n-grammes de mots """
+        self.assertEqual(get_shingles("Le chat, le chien", 2), {'le chat', 'chat le', 'le chien'})
+        self.assertEqual(get_shingles("", 3), set())
+
+    def test_similarity(self):
+        """ Tester que des textes proches ont des signatures proches et des clés LSH communes """
+        body = "the quick brown fox jumps over the lazy dog while the cat sleeps on the warm carpet near the fire"
+        first = get_signature({'title': "Quick fox", 'body': body, 'tags': "animals fox"})
+        second = get_signature({'title': "Quick fox", 'body': body + " tonight", 'tags': "animals fox"})
+        other = get_signature({'title': "Stock market", 'body': "shares fell sharply as investors sold bonds", 'tags': "finance"})
+        self.assertEqual(get_similarity(first, first), 1.0)
+        self.assertGreater(get_similarity(first, second), get_similarity(first, other))
+        self.assertTrue(get_band_keys(first) & get_band_keys(second))
+        self.assertFalse(get_band_keys(first) & get_band_keys(other))
@@ -0,0 +1,52 @@
+# coding: utf-8
+import gzip
+import os
+import shutil
+import tempfile
+
+import loremipsum
+from django.test.testcases import TestCase
+from scoop.content.models import Content
+from scoop.content.views.sitemap import ContentSitemap
+from scoop.core.util.django.sitemaps import SitemapGenerator
+from scoop.user.models.user import User
+
+
+class SitemapTest(TestCase):
+    """ Test de la génération des sitemaps partitionnés """
+    # Configuration
+    fixtures = ['category', 'mailtype', 'options']
+
+    def setUp(self):
+        """ Définit l'environnement des tests """
+        self.root = tempfile.mkdtemp()
+        self.administrator = User.objects.create(username='sitemapuser', email='sitemap@foobar.foo', is_superuser=True, is_staff=True)
+
+    def tearDown(self):
+        """ Supprimer les fichiers générés """
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_partitions(self):
+        """ Vérifier que seules les partitions modifiées sont regénérées """
+        sitemap = ContentSitemap()
+        sitemap.limit = 1
+        contents = [Content.objects.post(self.administrator, 'blog', loremipsum.get_sentence()[0:100], loremipsum.get_paragraphs(2), visible=True)
+                    for _ in range(3)]
+        for content in contents:
+            content.approval.approve(save=True)
+        generator = SitemapGenerator({'content': sitemap}, root=self.root, url='/sitemaps/', domain='example.com')
+        written = generator.generate()
+        self.assertEqual(len(written), 3, "each content should have its own partition")
+        with gzip.open(os.path.join(self.root, written[0]), 'rb') as f:
+            self.assertIn(b'http://example.com/', f.read())
+        with open(os.path.join(self.root, SitemapGenerator.INDEX_NAME), 'rb') as f:
+            self.assertEqual(f.read().count(b'<sitemap>'), 3)
+        # Rien n'a changé
+        self.assertEqual(generator.generate(), [], "no partition should be written again")
+        # Modifier un contenu et en supprimer un autre
+        contents[0].save()
+        contents[1].deleted = True
+        contents[1].save()
+        self.assertEqual(generator.generate(), [SitemapGenerator.PARTITION_NAME.format(section='content', partition=contents[0].pk)])
+        self.assertFalse(os.path.exists(os.path.join(self.root, SitemapGenerator.PARTITION_NAME.format(section='content', partition=contents[1].pk))))
+        self.assertEqual(len(generator.generate(force=True)), 2)
@@ -0,0 +1,192 @@
+# coding: utf-8
+"""
+Chaîne de traitement d'images en mémoire
+
+Une chaîne est une liste déclarative d'opérations, sous la forme d'un nom
+ou d'un tuple (nom, paramètres), ex. ['fix_exif', ('resize', {'width': 1024, 'height': 1024}), 'optimize'].
+Le fichier est décodé une seule fois, toutes les opérations sont appliquées
+avec PIL, puis l'image est encodée une seule fois, au lieu de lancer un
+processus externe qui relit et réécrit le fichier pour chaque opération.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageChops, ImageOps
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Transformations correspondant au champ EXIF Orientation
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_TRANSPOSE = {2: [Image.FLIP_LEFT_RIGHT], 3: [Image.ROTATE_180], 4: [Image.FLIP_TOP_BOTTOM], 5: [Image.ROTATE_90, Image.FLIP_TOP_BOTTOM],
+                  6: [Image.ROTATE_270], 7: [Image.ROTATE_270, Image.FLIP_TOP_BOTTOM], 8: [Image.ROTATE_90]}
+# Formats PIL des extensions de fichier
+FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.jpe': 'JPEG', '.png': 'PNG', '.gif': 'GIF'}
+
+
+class PictureState(object):
+    """ Image en cours de traitement et options d'enregistrement """
+
+    def __init__(self, image, path):
+        """ Initialiser l'état avec une image décodée """
+        self.image = image
+        self.path = path
+        self.extension = os.path.splitext(path)[1].lower()
+        self.options = dict()  # options de l'encodeur
+        self.changed = False  # l'image doit-elle être réencodée
+        self.modified = False  # les pixels de l'image ont-ils été modifiés
+        self.optimized = False  # réencoder sans perte, seulement si le fichier est plus petit
+        self.info = dict(image.info)  # métadonnées conservées à l'enregistrement
+
+    def set_image(self, image):
+        """ Remplacer l'image traitée """
+        self.image, self.changed, self.modified = image, True, True
+
+
+# Opérations
+def fix_exif(state):
+    """ Réorienter une image jpeg selon son champ EXIF Orientation """
+    if state.extension in {'.jpg', '.jpeg', '.jpe'}:
+        try:
+            orientation = state.image._getexif().get(EXIF_ORIENTATION_TAG, 1)
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+            orientation = 1
+        if orientation in EXIF_TRANSPOSE:
+            image = state.image
+            for method in EXIF_TRANSPOSE[orientation]:
+                image = image.transpose(method)
+            state.set_image(image)
+            state.info.pop('exif', None)
+
+
+def resize(state, width=None, height=None):
+    """ Réduire l'image en conservant le ratio """
+    if width is None or height is None:
+        width, height = settings.DEFAULT_THUMBNAIL_DIMENSIONS.values()
+    if state.image.size[0] > width or state.image.size[1] > height:
+        image = state.image.copy()
+        image.thumbnail((width, height), Image.LANCZOS)
+        state.set_image(image)
+
+
+def rotate(state, angle=90):
+    """ Pivoter l'image dans le sens des aiguilles d'une montre """
+    if angle % 360:
+        state.set_image(state.image.rotate(-angle, resample=Image.BICUBIC, expand=True))
+
+
+def mirror(state, orientation='x'):
+    """ Appliquer un miroir à l'image dans le sens x ou y """
+    state.set_image(ImageOps.mirror(state.image) if orientation == 'x' else ImageOps.flip(state.image))
+
+
+def autocrop(state, fuzz=0.05):
+    """ Rogner automatiquement par couleur de bordure, avec une tolérance en proportion """
+    image = state.image.convert('RGB')
+    background = Image.new('RGB', image.size, image.getpixel((0, 0)))
+    red, green, blue = ImageChops.difference(image, background).split()
+    difference = ImageChops.lighter(ImageChops.lighter(red, green), blue)  # plus grand écart par canal
+    box = difference.point(lambda value: 255 if value > 255 * fuzz else 0).getbbox()
+    if box and box != (0, 0) + image.size:
+        state.set_image(state.image.crop(box))
+
+
+def remove_icc(state):
+    """ Supprimer le profil de couleur et les métadonnées """
+    for key in ('icc_profile', 'exif', 'comment'):
+        if state.info.pop(key, None) is not None:
+            state.changed = True
+
+
+def quantize(state, depth=8):
+    """ Réduire le nombre de couleurs de l'image avec tramage """
+    image = state.image.convert('RGB')
+    if depth <= 8:
+        state.set_image(image.quantize(colors=2 ** depth, dither=Image.FLOYDSTEINBERG))
+    else:
+        state.set_image(ImageOps.posterize(image, depth // 3))
+
+
+def convert(state, ext='jpg'):
+    """ Convertir l'image en un format jpg ou png """
+    extension = '.{ext}'.format(ext=ext)
+    if extension in {'.png', '.jpg', '.jpeg'} and extension != state.extension:
+        state.extension, state.path = extension, '{base}{ext}'.format(base=os.path.splitext(state.path)[0], ext=extension)
+        state.set_image(state.image.convert('RGB') if FORMATS[extension] == 'JPEG' else state.image)
+
+
+def optimize(state, quality=None):
+    """
+    Optimiser la taille du fichier à l'enregistrement
+
+    Une image jpeg n'est réencodée avec perte que si ses pixels ont été
+    modifiés par une opération précédente. Les autres formats sont réencodés
+    sans perte, et le fichier n'est remplacé que s'il devient plus petit.
+    """
+    state.options.update({'optimize': True})
+    if FORMATS.get(state.extension) != 'JPEG':
+        state.optimized = True
+    elif state.modified:
+        state.options.update({'quality': quality or getattr(settings, 'CONTENT_PICTURE_QUALITY', 90), 'progressive': True})
+
+
+OPERATIONS = {function.__name__: function for function in [fix_exif, resize, rotate, mirror, autocrop, remove_icc, quantize, convert, optimize]}
+
+
+def process_file(path, operations):
+    """
+    Appliquer une chaîne d'opérations à un fichier image
+
+    Les images animées ne sont traitées que si elles sont converties,
+    auquel cas seule la première image est conservée.
+    :param path: chemin local du fichier
+    :param operations: liste de noms d'opérations ou de tuples (nom, paramètres)
+    :returns: un tuple (chemin, largeur, hauteur), ou None si le fichier n'a pas pu être traité
+    """
+    operations = [(operation, dict()) if isinstance(operation, str) else operation for operation in operations]
+    try:
+        with Image.open(path) as source:
+            if getattr(source, 'is_animated', False) and 'convert' not in {name for name, _ in operations}:
+                return path, source.size[0], source.size[1]
+            source.load()
+            state = PictureState(source, path)
+            for name, parameters in operations:
+                OPERATIONS[name](state, **parameters)
+            if state.changed or state.optimized:
+                image, image_format = state.image, FORMATS.get(state.extension, source.format)
+                if image_format == 'JPEG' and image.mode not in {'RGB', 'L', 'CMYK'}:
+                    image = image.convert('RGB')
+                options = dict(state.options)
+                if image_format == 'JPEG' and not state.modified and source.format == 'JPEG':
+                    # Pixels inchangés (ex. métadonnées retirées) : conserver les tables de quantification
+                    options.setdefault('quality', 'keep')
+                options.update({key: state.info[key] for key in ('icc_profile', 'exif', 'dpi') if state.info.get(key)})
+                # Écrire dans un fichier temporaire, pour ne jamais laisser de fichier partiellement écrit
+                temporary = '{path}.tmp'.format(path=state.path)
+                image.save(temporary, format=image_format, **options)
+                if not state.changed and os.path.getsize(temporary) >= os.path.getsize(path):
+                    os.remove(temporary)
+                    return path, state.image.size[0], state.image.size[1]
+                os.replace(temporary, state.path)
+                if state.path != path:
+                    os.remove(path)
+            return state.path, state.image.size[0], state.image.size[1]
+    except (IOError, OSError, ValueError) as e:
+        logger.warning("Could not process picture {path}: {error}".format(path=path, error=e))
+        return None
+
+
+def process_files(paths, operations, processes=None):
+    """
+    Appliquer une chaîne d'opérations à plusieurs fichiers dans un pool de processus
+
+    :param processes: nombre maximum de processus, CONTENT_PICTURE_PROCESSES ou nombre de processeurs par défaut
+    :returns: la liste des résultats de process_file, dans l'ordre des chemins
+    """
+    processes = processes or getattr(settings, 'CONTENT_PICTURE_PROCESSES', None) or os.cpu_count() or 1
+    if processes == 1 or len(paths) <= 1:
+        return [process_file(path, operations) for path in paths]
+    with ProcessPoolExecutor(max_workers=min(processes, len(paths))) as executor:
+        return list(executor.map(process_file, paths, [operations] * len(paths), chunksize=4))
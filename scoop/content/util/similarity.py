@@ -0,0 +1,99 @@
+# coding: utf-8
+"""
+Similarité de contenus par MinHash et LSH
+
+Chaque champ d'un contenu (titre, corps, étiquettes) est découpé en shingles,
+puis résumé par une signature MinHash de taille fixe. La proportion de valeurs
+identiques entre deux signatures estime l'indice de Jaccard des shingles.
+Les signatures sont découpées en bandes, dont l'empreinte sert de clé de
+regroupement (Locality Sensitive Hashing) : deux contenus partageant au moins
+une clé de bande sont candidats à la similarité.
+"""
+import re
+import zlib
+from functools import lru_cache
+from hashlib import md5
+from random import Random
+
+from django.template.loader import render_to_string
+from scoop.core.util.data.textutil import text_to_dict
+
+# Nombre de permutations et nombre de bandes pour chaque champ
+FIELDS = {'title': (16, 8), 'body': (64, 16), 'tags': (16, 8)}
+# Taille en mots des shingles pour chaque champ
+SHINGLE_SIZES = {'title': 1, 'body': 3, 'tags': 1}
+PRIME = (1 << 61) - 1
+
+
+@lru_cache()
+def get_permutations(count):
+    """ Renvoyer les coefficients des fonctions de hachage, identiques dans tous les processus """
+    generator = Random(count)
+    return [(generator.randrange(1, PRIME), generator.randrange(0, PRIME)) for _ in range(count)]
+
+
+@lru_cache()
+def get_weights():
+    """ Renvoyer les poids de chaque champ dans l'indice de similarité """
+    return text_to_dict(render_to_string("content/similarity/weights.txt", {}), evaluate=True)  # texte de la forme key:value\n
+
+
+def get_shingles(text, size=1):
+    """
+    Renvoyer l'ensemble des shingles (n-grammes de mots) d'un texte
+
+    :param size: nombre de mots par shingle
+    """
+    words = re.findall(r'\w+', (text or "").lower())
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[index:index + size]) for index in range(len(words) - size + 1)}
+
+
+def get_minhash(shingles, count):
+    """
+    Renvoyer la signature MinHash d'un ensemble de shingles
+
+    :returns: une liste de count entiers, ou None si l'ensemble est vide
+    """
+    if not shingles:
+        return None
+    values = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles]
+    return [min((a * value + b) % PRIME for value in values) for a, b in get_permutations(count)]
+
+
+def get_signature(fields):
+    """
+    Renvoyer la signature MinHash de chaque champ d'un contenu
+
+    :param fields: dictionnaire {nom du champ: texte}
+    """
+    return {name: get_minhash(get_shingles(fields.get(name), SHINGLE_SIZES[name]), count) for name, (count, _) in FIELDS.items()}
+
+
+def get_band_keys(signature):
+    """ Renvoyer les clés LSH des bandes d'une signature """
+    keys = set()
+    for name, (count, bands) in FIELDS.items():
+        values = signature.get(name)
+        if values:
+            rows = count // bands
+            for band in range(bands):
+                digest = md5("{name}:{band}:{values}".format(name=name, band=band, values=values[band * rows:(band + 1) * rows]).encode('ascii'))
+                keys.add(int(digest.hexdigest()[:15], 16))
+    return keys
+
+
+def get_similarity(signature1, signature2):
+    """
+    Renvoyer l'indice de similarité pondéré de deux signatures
+
+    :returns: similarité entre 0.0 et 1.0, 1.0 étant l'identité
+    """
+    weights = get_weights()
+    total = 0.0
+    for name in FIELDS:
+        values1, values2 = signature1.get(name), signature2.get(name)
+        if values1 and values2 and len(values1) == len(values2):
+            total += weights.get(name, 1.0) * sum(1 for value1, value2 in zip(values1, values2) if value1 == value2) / len(values1)
+    return total / (sum(weights.get(name, 1.0) for name in FIELDS) or 1.0)
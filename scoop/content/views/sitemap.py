@@ -1,18 +1,20 @@
 # coding: utf-8
 from django.conf import settings
-from django.contrib.sitemaps import Sitemap
+from django.core.urlresolvers import reverse
 from scoop.content.models.content import Content
 from scoop.core.util.data.dateutil import is_new
+from scoop.core.util.django.sitemaps import PartitionedSitemap
 
 
-class ContentSitemap(Sitemap):
+class ContentSitemap(PartitionedSitemap):
     """ Sitemap des contenus """
     limit = getattr(settings, 'SITEMAPS_ITEMS_PER_PAGE', 50000)
+    fields = ['id', 'slug', 'updated', 'category__url']
 
     # Getter
     def items(self):
         """ Renvoyer la liste des éléments du sitemap """
-        return Content.objects.visible().only('updated', 'id', 'slug')
+        return Content.objects.visible().select_related('category').only('updated', 'id', 'slug', 'category__url')
 
     def lastmod(self, obj):
         """ Renvoyer la date de mise à jour d'un contenu """
@@ -25,3 +27,19 @@ class ContentSitemap(Sitemap):
     def changefreq(self, obj):
         """ Renvoyer la fréquence de modification du contenu """
         return is_new(obj.updated, 7) and 'hourly' or 'weekly'
+
+    def get_rows(self):
+        """ Renvoyer les éléments du sitemap, avec l'URL de leur catégorie """
+        return Content.objects.visible().values(*self.fields)
+
+    def get_row_location(self, row):
+        """ Renvoyer l'URL d'un contenu """
+        return reverse('content:content-view', kwargs={'category': row['category__url'], 'slug': row['slug']})
+
+    def get_row_lastmod(self, row):
+        """ Renvoyer la date de mise à jour d'un contenu """
+        return row['updated']
+
+    def get_row_changefreq(self, row):
+        """ Renvoyer la fréquence de modification du contenu """
+        return is_new(row['updated'], 7) and 'hourly' or 'weekly'
@@ -13,7 +13,8 @@ class LikableModel(models.Model):
     # Getter
     def get_like_count(self):
         """ Renvoyer le nombre de likes sur l'objet """
-        return self.likers.all().count()
+        from scoop.user.social.models.rating.summary import RatingSummary
+        return RatingSummary.objects.get_for(self, RatingSummary.LIKE).count
 
     def get_likers(self):
         """ Renvoyer les utilisateurs ayant liké l'objet """
@@ -1,4 +1,4 @@
 # coding: utf-8
 from .db import activate_pragmas
-from .recorder import record_action
+from .recorder import record_action, record_type_changed
 from .uuid import reference_create, reference_remove
\ No newline at end of file
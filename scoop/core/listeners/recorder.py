@@ -1,15 +1,21 @@
 # coding: utf-8
+from django.db.models.signals import post_delete, post_save
 from django.dispatch.dispatcher import receiver
-from scoop.core.tasks.recorder import record_action_async
-from scoop.core.util.model.model import make_lazy_picklable
+from scoop.core.models.recorder import RecordType, RecordTypeManager
+from scoop.core.util.recorder import RecordEntry, record_buffer
 from scoop.core.util.signals import record
 
-__all__ = ['record_action']
+__all__ = ['record_action', 'record_type_changed']
 
 
 @receiver(record)
 def record_action(sender, actor, action, target=None, content=None, **kwargs):
     """ Enregistrer une action dans le log """
     if actor is not None and action is not None:
-        actor, target = make_lazy_picklable(actor, target)
-        record_action_async.delay(actor, action, target=target, content=content)
+        record_buffer.add(RecordEntry.from_action(actor, action, target, content))
+
+
+@receiver([post_save, post_delete], sender=RecordType)
+def record_type_changed(sender, instance, **kwargs):
+    """ Invalider le cache des ID de types d'action lorsqu'un type est modifié ou supprimé, y compris par lots """
+    RecordTypeManager.invalidate_ids()
@@ -0,0 +1,50 @@
+# coding: utf-8
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from scoop.core.util.model.deletion import ChunkedDeleter
+
+
+class Command(BaseCommand):
+    """ Comparer la suppression instance par instance et la suppression par tranches """
+    args = ''
+    help = 'Compare row-by-row and chunked deletion on a synthetic record table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', '-c', action='store', type=int, dest='count', default=20000, help='Number of synthetic rows.')
+        parser.add_argument('--chunk', '-k', action='store', type=int, dest='chunk', default=500, help='Number of rows per chunk.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        from scoop.core.models import Record, RecordType
+        count, results = options['count'], []
+        with transaction.atomic():
+            record_type = RecordType.objects.create(codename='benchmark.delete', sentence="%(actor)s deleted", verb="deleted")
+            for label, method in [("Row by row", self.delete_rows), ("Chunks of {0}".format(options['chunk']), self.delete_chunks)]:
+                sid = transaction.savepoint()
+                Record.objects.bulk_create([Record(name='benchmark-{0}'.format(index), type=record_type) for index in range(count)], batch_size=1000)
+                start = perf_counter()
+                method(Record.objects.filter(type=record_type), options['chunk'])
+                results.append((label, perf_counter() - start))
+                transaction.savepoint_rollback(sid)
+            transaction.set_rollback(True)
+        for label, elapsed in results:
+            print("{label}: {count} rows in {time:.3f}s, {rate:.0f} rows/s".format(label=label, count=count, time=elapsed, rate=count / elapsed))
+
+    @staticmethod
+    def delete_rows(queryset, chunk):
+        """ Supprimer les instances une par une """
+        for item in queryset:
+            item.delete()
+
+    @staticmethod
+    def delete_chunks(queryset, chunk):
+        """ Supprimer les instances par tranches, en affichant la progression """
+
+        def _progress(done, total):
+            """ Afficher la progression """
+            if done % (chunk * 10) == 0 or done == total:
+                print("{percent:>5.1f}% ({done})".format(percent=done * 100 / total, done=done))
+
+        ChunkedDeleter(queryset, chunk_size=chunk, progress=_progress).run()
@@ -0,0 +1,35 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from scoop.core.util.profiling import profile_store
+
+
+class Command(BaseCommand):
+    """ Afficher les vues les plus lentes, depuis les profils échantillonnés """
+    args = ''
+    help = 'Print the slowest views measured by the sampled profiler middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', '-c', action='store', type=int, dest='count', default=10, help='Number of views to print.')
+        parser.add_argument('--minutes', '-m', action='store', type=int, dest='minutes', default=None, help='Only use the last n minutes.')
+        parser.add_argument('--sort', '-s', action='store', dest='sort', default='mean', choices=['mean', 'max', 'time', 'queries', 'sql_time'],
+                            help='Sort views by this measure.')
+        parser.add_argument('--functions', '-f', action='store', type=int, dest='functions', default=5, help='Number of hot functions per view.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        seconds = options['minutes'] * 60 if options['minutes'] else None
+        views = profile_store.get_slowest(options['count'], seconds=seconds, key=options['sort'])
+        if not views:
+            print("No profile found in {root}".format(root=profile_store.root))
+            return
+        print("{view:<60} {count:>7} {mean:>9} {max:>9} {queries:>8} {sql:>9} {memory:>10}".format(
+            view="View", count="Samples", mean="Mean (s)", max="Max (s)", queries="Queries", sql="SQL (s)", memory="Mem (KiB)"))
+        for view, stats in views:
+            count = stats['count']
+            print("{view:<60} {count:>7} {mean:>9.4f} {max:>9.4f} {queries:>8.1f} {sql:>9.4f} {memory:>10.1f}".format(
+                view=view[-60:], count=count, mean=stats['mean'], max=stats['max'], queries=stats['queries'] / count, sql=stats['sql_time'] / count,
+                memory=stats['memory'] / count / 1024.0))
+            functions = sorted(stats['functions'].items(), key=lambda item: item[1][1], reverse=True)[:options['functions']]
+            for name, (calls, inline, cumulative) in functions:
+                print("    {inline:>9.4f}s {cumulative:>9.4f}s {calls:>8} {name}".format(inline=inline / count, cumulative=cumulative / count, calls=calls,
+                                                                                       name=name))
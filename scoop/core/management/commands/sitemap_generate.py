@@ -0,0 +1,23 @@
+# coding: utf-8
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from scoop.core.util.django.sitemaps import SitemapGenerator
+
+
+class Command(BaseCommand):
+    """ Générer les fichiers sitemap partitionnés """
+    args = ''
+    help = 'Write the gzipped sitemap partitions whose items changed, and the sitemap index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', '-f', action='store_true', dest='force', default=False, help='Rewrite every partition.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        generator = SitemapGenerator()
+        start = perf_counter()
+        written = generator.generate(force=options['force'])
+        for name in written:
+            print(name)
+        print("{count} partitions written to {root} in {time:.3f}s".format(count=len(written), root=generator.root, time=perf_counter() - start))
@@ -1,14 +1,11 @@
 # coding: utf-8
-import cProfile
 import logging
-import os
 import re
 import sys
 from functools import reduce
 from operator import add
 from time import time
 
-import psutil
 from django.conf import settings
 from django.db import connection
 from django.template.context import RequestContext
@@ -16,6 +13,7 @@ from django.template.loader import render_to_string
 
 from scoop.core.util.django.middleware import MiddlewareBase
 from scoop.core.util.django.templates import render_to_code
+from scoop.core.util.profiling import ProfileStore, RequestProfile, get_memory, profile_store
 
 logger = logging.getLogger(__name__)
 
@@ -25,21 +23,22 @@ class ProfilerMiddleware(MiddlewareBase):
 
     # Constantes
     HTML_SIGNAL = "<!-- debug -->"
-    profiler = None
 
     def process_view(self, request, callback, callback_args, callback_kwargs):
         """ Traiter la vue """
         if settings.DEBUG and request.user.is_staff:
-            self.profiler = cProfile.Profile()
+            # Le profileur est propre à la requête, pas au middleware partagé entre threads
+            request._profile = RequestProfile()
             args = (request,) + callback_args
-            return self.profiler.runcall(callback, *args, **callback_kwargs)
+            return request._profile.runcall(callback, *args, **callback_kwargs)
 
     def __call__(self, request):
         """ Traiter la réponse """
         response = self.get_response(request)
-        if settings.DEBUG and request.user.is_staff and self.profiler is not None:
-            self.profiler.create_stats()
-            stats = self.profiler.getstats()
+        profiler = getattr(getattr(request, '_profile', None), 'profiler', None)
+        if settings.DEBUG and request.user.is_staff and profiler is not None:
+            profiler.create_stats()
+            stats = profiler.getstats()
             stats = sorted(stats, key=lambda k: -k.inlinetime)
             total_time = reduce(lambda x, y: x + y.inlinetime, stats, 0)
             total_calls = reduce(lambda x, y: x + y.callcount, stats, 0)
@@ -55,6 +54,31 @@ class ProfilerMiddleware(MiddlewareBase):
         return response
 
 
+class SampledProfilerMiddleware(MiddlewareBase):
+    """
+    Middleware de profilage échantillonné
+
+    Une fraction CORE_PROFILING_RATE des requêtes est profilée, et ses mesures
+    sont agrégées par vue dans le stockage local (voir la commande profile_report).
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """ Traiter la vue """
+        view = getattr(view_func, 'view_class', view_func)
+        request._profile_view = "{module}.{name}".format(module=view.__module__, name=getattr(view, '__qualname__', view.__name__))
+        return None
+
+    def __call__(self, request):
+        """ Traiter la requête et enregistrer ses mesures """
+        if not ProfileStore.is_sampled():
+            return self.get_response(request)
+        profile = RequestProfile()
+        response = profile.runcall(self.get_response, request)
+        if getattr(request, '_profile_view', None) is not None:
+            profile_store.add(request._profile_view, profile.get_stats(profile_store.functions))
+        return response
+
+
 class PageStatsMiddleware(object):
     """ Middleware de statistiques de performance de la page """
 
@@ -132,13 +156,13 @@ class MemoryUsageMiddleware(object):
 
     def process_request(self, request):
         """ Traiter la requête """
-        request._mem = psutil.Process(os.getpid()).get_memory_info()
+        request._mem = get_memory()
 
     def process_response(self, request, response):
         """ Traiter la réponse """
         if getattr(request, 'user', False) and getattr(request, '_mem', False) and request.user.is_active and request.user.is_staff:
-            mem = psutil.Process(os.getpid()).get_memory_info()
-            diff = mem.rss - request._mem.rss
-            output = render_to_string('core/middleware/memoryusage.html', {'usage': diff, 'start': request._mem.rss, 'end': mem.rss})
+            mem = get_memory()
+            diff = mem - request._mem
+            output = render_to_string('core/middleware/memoryusage.html', {'usage': diff, 'start': request._mem, 'end': mem})
             response.content = response.content + output.encode('utf-8')
         return response
@@ -3,11 +3,13 @@ import datetime
 import logging
 from datetime import timedelta
 from os.path import join
+from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.contenttypes import fields
 from django.contrib.contenttypes.fields import ContentType
-from django.db import models
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.utils.safestring import mark_safe
 from django.utils.translation import ugettext_lazy as _
@@ -16,7 +18,8 @@ from pretty_times import pretty
 from scoop.core.util.data.dateutil import datetime_round_hour
 from scoop.core.util.data.typeutil import get_color_name, hash_rgb
 from scoop.core.util.model.csvexport import csv_dump
-from scoop.core.util.model.model import SingleDeleteManager
+from scoop.core.util.model.model import SingleDeleteManager, SingleDeleteQuerySet
+from scoop.core.util.recorder import RecordEntry, record_buffer
 from scoop.core.util.shortcuts import addattr
 from scoop.core.util.stream.directory import Paths
 
@@ -38,7 +41,7 @@ class RecordManager(SingleDeleteManager):
             filename_info = {'year': fmt("%Y"), 'month': fmt("%m"), 'week': fmt("%W"), 'day': fmt("%d"), 'hour': fmt("%H"), 'minute': fmt("%M"),
                              'second': fmt("%S"), 'rows': queryset.count()}
             path = join(Paths.get_root_dir('isolated', 'var', 'log'), "record-log-{year}-{month}-{day}-{hour}-{minute}-{rows}.csv.gz".format(**filename_info))
-            csv_dump(queryset, path, compress=True)
+            csv_dump(queryset, path, compress=True, related={'user': 'username', 'type': 'codename'})
 
     # Getter
     @staticmethod
@@ -68,31 +71,92 @@ class RecordManager(SingleDeleteManager):
         """
         Enregistrer une nouvelle action
 
+        L'action est mise en tampon et enregistrée par lots, voir scoop.core.util.recorder
         :param user: instigateur de l'action
         :param codename: nom d'action en 3 parties séparées par des points, du type app.action.model
         :param target: objet concerné par l'action de user
         :type target: models.Model | str | object
         :param container: si target est dans un conteneur, l'ajouter
         """
+        record_buffer.add(RecordEntry.from_action(user, codename, target, container))
+
+    def add_batch(self, entries):
+        """
+        Enregistrer un lot d'actions en une requête
+
+        :param entries: liste d'actions
+        :type entries: list[scoop.core.util.recorder.RecordEntry]
+        :returns: le nombre d'actions enregistrées
+        """
+        if not getattr(settings, 'CORE_ACTION_RECORD', True):
+            return 0
         try:
-            target_object = target if isinstance(target, models.Model) else None
-            target_name = str(target) if target is not None else ""
-            action_type = RecordType.objects.get(codename=codename)
-            entry = Record(user=user, type=action_type, target_object=target_object, target_name=target_name,
-                           container_object=container)
-            entry.save()
-        except RecordType.DoesNotExist:
+            with transaction.atomic():
+                return self._add_batch(entries)
+        except IntegrityError:
+            # Un type d'action mis en cache a pu être supprimé par un autre processus
+            RecordTypeManager.invalidate_ids()
+            return self._add_batch(entries)
+
+    # Privé
+    def _add_batch(self, entries):
+        """ Enregistrer un lot d'actions en une requête, avec leur date d'origine """
+        type_ids = RecordType.objects.get_ids({entry.codename for entry in entries})
+        for codename in {entry.codename for entry in entries} - set(type_ids):
             logger.warning("The action type {type} must be registered in order to create this record.".format(type=codename))
+        # bulk_create n'appelle pas Record.save : les noms sont renseignés par RecordEntry.from_action
+        rows = [Record(user_id=entry.user_id, name=entry.name, type_id=type_ids[entry.codename], target_type_id=entry.target_type_id,
+                       target_id=entry.target_id, target_name=entry.target_name, container_type_id=entry.container_type_id,
+                       container_id=entry.container_id, container_name=entry.container_name, created=entry.created)
+                for entry in entries if entry.codename in type_ids]
+        self.bulk_create(rows)
+        return len(rows)
+
+
+class RecordTypeQuerySet(SingleDeleteQuerySet):
+    """ Queryset des types d'actions """
+
+    # Overrides
+    def update(self, **kwargs):
+        """ Mettre à jour les types, sans signal post_save : invalider le cache des ID """
+        updated = super(RecordTypeQuerySet, self).update(**kwargs)
+        if updated:
+            RecordTypeManager.invalidate_ids()
+        return updated
 
 
 class RecordTypeManager(SingleDeleteManager):
     """ Manager des types d'actions """
 
+    # Cache des ID de types d'action par nom de code, et version partagée du cache
+    ids = dict()
+    ids_version = None
+    IDS_VERSION_KEY = 'core.recordtype.ids.version'
+
     def get_queryset(self):
         """ Renvoyer le queryset par défaut """
-        return super(RecordTypeManager, self).get_queryset()
+        return RecordTypeQuerySet(self.model, using=self._db)
 
     # Getter
+    def get_ids(self, codenames):
+        """
+        Renvoyer les ID des types d'action, mis en cache dans le processus
+
+        Le cache est vidé lorsque la version partagée change, c'est-à-dire
+        lorsqu'un type d'action est modifié ou supprimé dans un processus.
+        :returns: un dictionnaire {nom de code: id}, sans les noms de code inconnus
+        """
+        version = cache.get(RecordTypeManager.IDS_VERSION_KEY)
+        if version is None or version != RecordTypeManager.ids_version:
+            if version is None:
+                cache.add(RecordTypeManager.IDS_VERSION_KEY, uuid4().hex, None)
+                version = cache.get(RecordTypeManager.IDS_VERSION_KEY)
+            RecordTypeManager.ids, RecordTypeManager.ids_version = dict(), version
+        missing = [codename for codename in codenames if codename not in RecordTypeManager.ids]
+        if missing:
+            RecordTypeManager.ids.update(dict(self.filter(codename__in=missing).values_list('codename', 'id')))
+        return {codename: RecordTypeManager.ids[codename] for codename in codenames if codename in RecordTypeManager.ids}
+
     def get_by_name(self, name):
         """ Renvoyer le type d'action portant un nom de code """
         try:
@@ -103,6 +167,13 @@ class RecordTypeManager(SingleDeleteManager):
     def get_by_natural_key(self, codename):
         return self.get(codename=codename)
 
+    # Actions
+    @staticmethod
+    def invalidate_ids():
+        """ Invalider le cache des ID de types d'action de tous les processus """
+        RecordTypeManager.ids = dict()
+        cache.set(RecordTypeManager.IDS_VERSION_KEY, uuid4().hex, None)
+
 
 class Record(models.Model):
     """ Action """
@@ -111,7 +182,7 @@ class Record(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, related_name='action_records', verbose_name=_("User"))
     name = models.CharField(max_length=32, verbose_name=_("Name"))
     type = models.ForeignKey('core.RecordType', related_name='records', verbose_name=_("Action type"))
-    created = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name=pgettext_lazy('record', "Created"))
+    created = models.DateTimeField(default=timezone.now, editable=False, db_index=True, verbose_name=pgettext_lazy('record', "Created"))
     # Cible de l'action
     target_type = models.ForeignKey('contenttypes.ContentType', related_name='target_record', null=True, verbose_name=_("Target type"))
     target_id = models.PositiveIntegerField(null=True, db_index=True, verbose_name=_("Target Id"))
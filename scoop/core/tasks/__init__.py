@@ -1,2 +1,3 @@
 # coding: utf-8
 from scoop.core.tasks.schedule import *  # NOQA
+from scoop.core.tasks.search import update_search_objects  # NOQA
@@ -23,12 +23,20 @@ def clean_media_folders():
     clean_empty_folders(settings.MEDIA_ROOT)
 
 
-@periodic_task(run_every=timedelta(days=1), options={'expires': 3600})
+@periodic_task(run_every=timedelta(hours=1), options={'expires': 3600})
 def update_search_index():
-    """ Mettre à jour l'index Haystack """
+    """ Mettre à jour l'index Haystack avec les objets modifiés depuis 2 heures """
     call_command('update_index', age=2, batchsize=1000)
 
 
+@periodic_task(run_every=timedelta(hours=1), options={'expires': 3600})
+def generate_sitemaps():
+    """ Regénérer les partitions modifiées des fichiers sitemap """
+    if getattr(settings, 'SITEMAPS_GENERATE', False):
+        from scoop.core.util.django.sitemaps import SitemapGenerator
+        return len(SitemapGenerator().generate())
+
+
 @periodic_task(run_every=timedelta(days=7), options={'expires': 3600})
 def vacuum_postgres_database():
     """ Vacuum Full pour les bases de données Postgres """
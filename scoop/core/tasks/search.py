@@ -0,0 +1,13 @@
+# coding: utf-8
+from celery.task import task
+
+
+@task(name='core.update_search_objects', ignore_result=True)
+def update_search_objects(batch):
+    """
+    Réindexer un lot d'objets modifiés
+
+    :param batch: dictionnaire {label du modèle: (pks à mettre à jour, pks à retirer)}
+    """
+    from scoop.core.util.search import update_objects
+    return update_objects(batch)
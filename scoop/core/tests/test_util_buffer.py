@@ -0,0 +1,47 @@
+# coding: utf-8
+import time
+
+from django.test import TestCase
+from scoop.core.util.buffer import ProcessBuffer
+
+
+class ListBuffer(ProcessBuffer):
+    """ Tampon de test, conservant les lots envoyés """
+
+    def __init__(self, size, delay):
+        """ Initialiser le tampon """
+        super(ListBuffer, self).__init__(size, delay)
+        self.sent, self.written = [], []
+
+    def _send(self, batch):
+        """ Conserver un lot envoyé """
+        self.sent.append(batch)
+
+    def _write(self, batch):
+        """ Conserver un lot écrit """
+        self.written.append(batch)
+
+
+class BufferTest(TestCase):
+    """ Test des tampons de processus """
+
+    # Tests
+    def test_size(self):
+        """ Vérifier l'envoi d'un lot plein et l'écriture directe """
+        buffer = ListBuffer(size=2, delay=3600)
+        buffer.append(1)
+        self.assertEqual(buffer.sent, [])
+        buffer.append(2)
+        self.assertEqual(buffer.sent, [[1, 2]])
+        buffer.append(3)
+        self.assertEqual(buffer.flush(direct=True), 1)
+        self.assertEqual(buffer.written, [[3]])
+        self.assertIsNone(buffer.timer, "the timer should be cancelled once the buffer is empty")
+
+    def test_timer(self):
+        """ Vérifier qu'un lot est envoyé à échéance, sans nouvel élément """
+        buffer = ListBuffer(size=100, delay=0.1)
+        buffer.append(1)
+        time.sleep(0.5)
+        self.assertEqual(buffer.sent, [[1]])
+        self.assertEqual(buffer.count, 0)
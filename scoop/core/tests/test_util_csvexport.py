@@ -0,0 +1,42 @@
+# coding: utf-8
+import csv
+import gzip
+import os
+import tempfile
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.core.models.recorder import Record, RecordType
+from scoop.core.util.django.testing import TEST_CONFIGURATION
+from scoop.core.util.model.csvexport import CSVExporter, csv_dump
+from scoop.user.models import User
+
+
+@override_settings(**TEST_CONFIGURATION)
+class CSVExportTest(TestCase):
+    """ Test de l'export CSV en flux """
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        self.user = User.objects.create(username='csvuser', email='csv@foobar.foo')
+        self.type = RecordType.objects.create(codename='test.csv', sentence="{actor} exported {target}", verb="exported")
+        Record.objects.bulk_create([Record(user=self.user, name='record-{0}'.format(index), type=self.type) for index in range(7)])
+
+    # Tests
+    def test_rows(self):
+        """ Vérifier que les lignes sont lues par tranches, avec les colonnes jointes """
+        exporter = CSVExporter(Record.objects.all(), fields=['user', 'name', 'type'], related={'user': 'username'}, chunk_size=3)
+        rows = list(exporter.get_rows())
+        self.assertEqual(rows[0], ['user', 'name', 'type'])
+        self.assertEqual(len(rows), 8, "all records should be exported across chunks")
+        self.assertEqual(rows[1], ['csvuser', 'record-0', self.type.id])
+        self.assertEqual(len(list(exporter.get_lines())), 8)
+
+    def test_dump(self):
+        """ Vérifier l'écriture d'un fichier compressé """
+        path = os.path.join(tempfile.mkdtemp(), 'records.csv')
+        self.assertTrue(csv_dump(Record.objects.all(), path, compress=True, related={'type': 'codename'}))
+        with gzip.open(path + '.gz', 'rt', encoding='utf-8') as infile:
+            rows = list(csv.reader(infile))
+        self.assertEqual(len(rows), 8)
+        self.assertIn('test.csv', rows[1])
@@ -0,0 +1,58 @@
+# coding: utf-8
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.core.models.recorder import Record, RecordType
+from scoop.core.util.django.testing import TEST_CONFIGURATION
+from scoop.core.util.model.deletion import ChunkedDeleter
+from scoop.core.util.model.model import SingleDeleteQuerySet
+from scoop.core.util.signals import post_delete_batch
+
+
+@override_settings(**TEST_CONFIGURATION)
+class DeletionTest(TestCase):
+    """ Test de la suppression par tranches """
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        self.type = RecordType.objects.create(codename='test.delete', sentence="{actor} deleted {target}", verb="deleted")
+        Record.objects.bulk_create([Record(name='record-{0}'.format(index), type=self.type) for index in range(7)])
+
+    # Tests
+    def test_chunks(self):
+        """ Vérifier que les tranches, la progression et les signaux de lot fonctionnent """
+        batches, progress = [], []
+
+        def _receiver(sender, instances, **kwargs):
+            batches.append(len(instances))
+
+        post_delete_batch.connect(_receiver, sender=Record)
+        try:
+            deleted = ChunkedDeleter(Record.objects.filter(type=self.type), chunk_size=3, progress=lambda done, total: progress.append((done, total))).run()
+        finally:
+            post_delete_batch.disconnect(_receiver, sender=Record)
+        self.assertEqual(deleted, 7)
+        self.assertEqual(batches, [3, 3, 1])
+        self.assertEqual(progress[-1], (7, 7))
+        self.assertFalse(Record.objects.filter(type=self.type).exists())
+
+    def test_queryset(self):
+        """ Vérifier que le queryset des enregistrements supprime par tranches """
+        batches = []
+
+        def _receiver(sender, instances, **kwargs):
+            batches.append(len(instances))
+
+        post_delete_batch.connect(_receiver, sender=Record)
+        try:
+            with override_settings(CORE_DELETE_CHUNK_SIZE=3):
+                deleted = Record.objects.filter(type=self.type).delete()
+        finally:
+            post_delete_batch.disconnect(_receiver, sender=Record)
+        self.assertEqual(deleted, (7, {'core.Record': 7}))
+        self.assertEqual(batches, [3, 3, 1])
+        self.assertFalse(Record.objects.filter(type=self.type).exists())
+        # Comme Django, refuser la suppression d'un queryset découpé
+        with self.assertRaises(AssertionError):
+            Record.objects.all()[:2].delete()
+        # Comme Django, ne pas permettre de vider la table depuis un manager
+        self.assertFalse(hasattr(SingleDeleteQuerySet.as_manager(), 'delete'))
@@ -0,0 +1,61 @@
+# coding: utf-8
+import socket
+import threading
+import time
+from xmlrpc.server import SimpleXMLRPCServer
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.core.util.django.sitemaps import PingDispatcher
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ping-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PingTest(TestCase):
+    """ Test de l'envoi concurrent des pings XML-RPC """
+
+    def setUp(self):
+        """ Démarrer des serveurs XML-RPC locaux """
+        cache.clear()
+        self.pings, self.servers = [], []
+        self.fast = self._serve(lambda name, url: self.pings.append(url) or {'flerror': False, 'message': "Thanks"})
+        self.slow = self._serve(lambda name, url: time.sleep(1) or {'flerror': False, 'message': "Late"})
+        # Port sans serveur
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.dead = 'http://127.0.0.1:{0}/'.format(sock.getsockname()[1])
+
+    def tearDown(self):
+        """ Arrêter les serveurs """
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def _serve(self, ping):
+        """ Démarrer un serveur répondant à weblogUpdates.ping et renvoyer son URL """
+        server = SimpleXMLRPCServer(('127.0.0.1', 0), logRequests=False, allow_none=True)
+        server.register_function(ping, 'weblogUpdates.ping')
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return 'http://127.0.0.1:{0}/'.format(server.server_address[1])
+
+    # Tests
+    def test_dispatch(self):
+        """ Vérifier les délais d'attente, la pénalité des moteurs en échec et la fusion des pings """
+        dispatcher = PingDispatcher(workers=4, timeout=0.2, window=60, backoff=60)
+        start = time.time()
+        results = dispatcher.dispatch('http://example.com/feed/', [self.fast, self.slow, self.dead], name="Example")
+        self.assertLess(time.time() - start, 1, "pings should run concurrently and time out")
+        self.assertEqual(results[self.fast]['message'], "Thanks")
+        self.assertIsNone(results[self.slow])
+        self.assertIsNone(results[self.dead])
+        self.assertEqual(self.pings, ['http://example.com/feed/'])
+        # Le même flux n'est pas pingé à nouveau dans la fenêtre
+        self.assertIsNone(dispatcher.dispatch('http://example.com/feed/', [self.fast], name="Example"))
+        # Les moteurs en échec sont ignorés
+        self.assertFalse(dispatcher.is_available(self.dead))
+        results = dispatcher.dispatch('http://example.com/other/', [self.fast, self.slow, self.dead], name="Example")
+        self.assertEqual(set(results), {self.fast})
+        self.assertEqual(len(self.pings), 2)
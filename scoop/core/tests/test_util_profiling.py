@@ -0,0 +1,48 @@
+# coding: utf-8
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from scoop.core.util.profiling import ProfileStore, RequestProfile
+
+
+class ProfilingTest(TestCase):
+    """ Test du profilage échantillonné """
+
+    def setUp(self):
+        """ Préparer un stockage temporaire """
+        self.root = tempfile.mkdtemp()
+        self.store = ProfileStore(root=self.root, window=600, bucket=60, delay=0)
+
+    def tearDown(self):
+        """ Supprimer les fichiers générés """
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_request_profile(self):
+        """ Vérifier les mesures d'une requête """
+        profile = RequestProfile()
+        self.assertGreater(profile.runcall(lambda: Permission.objects.count()), 0)
+        stats = profile.get_stats()
+        self.assertEqual(stats['queries'], 1)
+        self.assertGreater(stats['time'], 0)
+        self.assertTrue(stats['functions'])
+
+    def test_store(self):
+        """ Vérifier l'agrégation par vue, le classement et la fenêtre glissante """
+        now = time.time()
+        sample = {'count': 1, 'queries': 2, 'sql_time': 0.5, 'memory': 1024, 'functions': {'views.py:10(slow)': [1, 1.5, 2.0]}}
+        self.store.add('app.views.slow', dict(sample, time=2.0, max=2.0), now)
+        self.store.add('app.views.slow', dict(sample, time=1.0, max=1.0), now)
+        self.store.add('app.views.fast', dict(sample, time=0.1, max=0.1), now)
+        self.store.add('app.views.old', dict(sample, time=9.0, max=9.0), now - 1200)
+        self.store.flush(now)
+        views = self.store.get_slowest()
+        self.assertEqual([view for view, _ in views], ['app.views.slow', 'app.views.fast'])
+        self.assertEqual(views[0][1]['count'], 2)
+        self.assertAlmostEqual(views[0][1]['mean'], 1.5)
+        self.assertEqual(views[0][1]['max'], 2.0)
+        self.assertEqual(views[0][1]['functions']['views.py:10(slow)'], [2, 3.0, 4.0])
+        self.store.clear()
+        self.assertEqual(self.store.get_views(), {})
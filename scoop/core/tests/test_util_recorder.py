@@ -0,0 +1,57 @@
+# coding: utf-8
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.core.models.recorder import Record, RecordType, RecordTypeManager
+from scoop.core.util.django.testing import TEST_CONFIGURATION
+from scoop.core.util.recorder import RecordBuffer, RecordEntry
+from scoop.user.models import User
+
+
+@override_settings(**TEST_CONFIGURATION)
+class RecorderTest(TestCase):
+    """ Test de l'enregistrement des actions par lots """
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        self.user = User.objects.create(username='recorduser', email='record@foobar.foo')
+        RecordType.objects.create(codename='test.record', sentence="%(actor)s recorded", verb="recorded")
+
+    # Tests
+    def test_buffer(self):
+        """ Vérifier que les actions sont mises en tampon puis écrites en un lot """
+        buffer = RecordBuffer(size=100, delay=3600)
+        buffer.add(RecordEntry.from_action(self.user, 'test.record', target=self.user))
+        buffer.add(RecordEntry.from_action(self.user, 'test.record', target="text target"))
+        buffer.add(RecordEntry.from_action(self.user, 'test.unknown'))
+        self.assertEqual(Record.objects.count(), 0, "records should stay in the buffer")
+        self.assertEqual(buffer.flush(direct=True), 3)
+        self.assertEqual(Record.objects.count(), 2, "records with an unknown type should be skipped")
+        record = Record.objects.filter(target_id=self.user.pk).first()
+        self.assertEqual(record.target_object, self.user)
+        self.assertEqual(record.name, self.user.get_short_name())
+        self.assertEqual(Record.objects.filter(target_name="text target").count(), 1)
+
+    def test_batch(self):
+        """ Vérifier la date d'origine des actions et l'invalidation du cache des types """
+        entry = RecordEntry.from_action(self.user, 'test.record')._replace(created=self.user.date_joined - timedelta(days=1))
+        self.assertEqual(Record.objects.add_batch([entry]), 1)
+        self.assertEqual(Record.objects.get().created, entry.created)
+        self.assertIn('test.record', RecordTypeManager.ids)
+        RecordType.objects.create(codename='test.other', sentence="%(actor)s recorded", verb="recorded")
+        self.assertEqual(RecordTypeManager.ids, dict(), "the cache should be cleared when a type is added")
+        record_type = RecordType.objects.get(codename='test.record')
+        record_type.delete()
+        RecordType.objects.create(codename='test.record', sentence="%(actor)s recorded", verb="recorded")
+        self.assertEqual(Record.objects.add_batch([entry]), 1)
+        self.assertNotEqual(RecordType.objects.get_ids(['test.record'])['test.record'], record_type.pk)
+
+    def test_names(self):
+        """ Vérifier les noms de l'instigateur et du conteneur, et l'instigateur anonyme """
+        Record.objects.add_batch([RecordEntry.from_action(self.user, 'test.record', target="target", container=self.user),
+                                  RecordEntry.from_action(None, 'test.record')])
+        record = Record.objects.get(user=self.user)
+        self.assertEqual((record.name, record.container_name), (self.user.get_short_name(), str(self.user)))
+        self.assertEqual(Record.objects.get(user__isnull=True).name, settings.ANONYMOUS_USER_NAME[:32])
@@ -0,0 +1,129 @@
+# coding: utf-8
+import atexit
+import logging
+import os
+import threading
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+from scoop.core.util.data.dateutil import now
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessBuffer(object):
+    """
+    Tampon local d'éléments envoyés par lots
+
+    Les éléments sont accumulés dans le processus courant puis envoyés
+    par lots lorsque le tampon atteint une taille ou un âge maximum.
+    L'âge maximum est garanti par un minuteur, même si le processus ne
+    reçoit plus d'éléments. À la sortie du processus ou à l'arrêt d'un
+    worker Celery, le tampon est écrit directement.
+
+    Les classes enfant définissent _send et _write, et peuvent redéfinir
+    _clear, _store, _pop et _count pour un autre stockage qu'une liste.
+    """
+
+    def __init__(self, size, delay):
+        """
+        Initialiser le tampon
+
+        :param size: nombre d'éléments déclenchant l'envoi du lot
+        :param delay: âge maximum en secondes du lot avant envoi
+        """
+        self.size = size
+        self.delay = delay
+        self.count = 0
+        self.started = now()
+        self.timer = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self._clear()
+        atexit.register(self.flush, direct=True)
+        # Les processus enfants des workers ne passent pas par atexit
+        worker_process_shutdown.connect(self._on_shutdown, weak=False)
+        worker_shutdown.connect(self._on_shutdown, weak=False)
+
+    # Getter
+    def is_full(self):
+        """ Renvoyer si le tampon doit être vidé """
+        return self.count >= self.size or now() - self.started >= self.delay
+
+    # Setter
+    def append(self, item):
+        """ Ajouter un élément au tampon, et envoyer le lot si nécessaire """
+        with self.lock:
+            if not self.count:
+                self.started = now()
+                self._schedule()
+            self._store(item)
+            self.count += 1
+            batch = self._pop() if self.is_full() else None
+        if batch:
+            self._send(batch)
+
+    def flush(self, direct=False):
+        """
+        Envoyer immédiatement les éléments du tampon
+
+        :param direct: écrire directement plutôt que via Celery
+        :returns: le nombre d'éléments envoyés
+        """
+        with self.lock:
+            batch = self._pop()
+        if batch and direct:
+            self._write(batch)
+        elif batch:
+            self._send(batch)
+        return self._count(batch)
+
+    # Privé
+    def _clear(self):
+        """ Réinitialiser le contenu du tampon """
+        self.entries = []
+
+    def _store(self, item):
+        """ Stocker un élément dans le tampon """
+        self.entries.append(item)
+
+    def _pop(self):
+        """ Vider le tampon et renvoyer son contenu """
+        batch = self.entries
+        self._clear()
+        self.count = 0
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        return batch
+
+    def _count(self, batch):
+        """ Renvoyer le nombre d'éléments d'un lot """
+        return len(batch)
+
+    def _schedule(self):
+        """ Programmer l'envoi du lot à l'échéance de son âge maximum """
+        # Les threads ne survivent pas à un fork : le minuteur d'un processus parent n'existe pas ici
+        if self.timer is None or self.pid != os.getpid():
+            self.timer = threading.Timer(self.delay, self._on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+            self.pid = os.getpid()
+
+    def _on_timer(self):
+        """ Envoyer le lot arrivé à échéance """
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning("Could not flush {name}: {error}".format(name=type(self).__name__, error=e))
+
+    def _on_shutdown(self, **kwargs):
+        """ Écrire le tampon à l'arrêt d'un worker """
+        self.flush(direct=True)
+
+    def _send(self, batch):
+        """ Envoyer un lot à sa tâche Celery """
+        raise NotImplementedError()
+
+    def _write(self, batch):
+        """ Écrire un lot directement """
+        raise NotImplementedError()
@@ -1,13 +1,37 @@
 # coding: utf-8
+import gzip
+import json
+import logging
 import math
-from random import shuffle
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from hashlib import md5
+from itertools import groupby
+from random import sample
+from xml.sax.saxutils import escape
 
-from xmlrpc import server
+from xmlrpc import client
 
+from django.apps.registry import apps
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.urlresolvers import reverse_lazy as reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
 from scoop.core.util.signals import ping_failed
 
+logger = logging.getLogger(__name__)
+
+# Sitemaps pré-générés par défaut, s'ils sont installés
+DEFAULT_SITEMAPS = {
+    'content': 'scoop.content.views.sitemap.ContentSitemap',
+    'editorial': 'scoop.editorial.views.sitemap.EditorialSitemap',
+    'profile': 'scoop.user.views.sitemap.ProfileSitemap',
+}
+
 # Liste de moteurs de Ping de sitemap ou RSS
 PING_ENGINES = [
     "http://api.feedster.com/ping",
@@ -38,6 +62,120 @@ PING_ENGINES = [
 ]
 
 
+class TimeoutTransport(client.Transport):
+    """ Transport XML-RPC HTTP avec délai d'attente """
+
+    def __init__(self, timeout, *args, **kwargs):
+        super(TimeoutTransport, self).__init__(*args, **kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        """ Renvoyer la connexion HTTP, avec le délai d'attente """
+        connection = super(TimeoutTransport, self).make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class SafeTimeoutTransport(client.SafeTransport):
+    """ Transport XML-RPC HTTPS avec délai d'attente """
+
+    def __init__(self, timeout, *args, **kwargs):
+        super(SafeTimeoutTransport, self).__init__(*args, **kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        """ Renvoyer la connexion HTTPS, avec le délai d'attente """
+        connection = super(SafeTimeoutTransport, self).make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class PingDispatcher(object):
+    """
+    Envoi concurrent de pings XML-RPC aux moteurs
+
+    Les moteurs sont pingés en parallèle par un pool de threads borné,
+    chacun avec son propre délai d'attente. Un moteur en échec est ignoré
+    pendant une durée doublée à chaque échec consécutif. Les pings
+    répétés d'un même flux dans une fenêtre de temps sont fusionnés.
+    L'état (fenêtres et pénalités) est conservé dans le cache, et donc
+    partagé entre les workers.
+    """
+    FEED_KEY = 'core.ping.feed.{0}'
+    BACKOFF_KEY = 'core.ping.backoff.{0}'
+
+    def __init__(self, workers=None, timeout=None, window=None, backoff=None, backoff_max=None):
+        """
+        Initialiser le dispatcher
+
+        :param workers: nombre maximum de pings simultanés
+        :param timeout: délai d'attente en secondes de chaque ping
+        :param window: durée en secondes pendant laquelle les pings d'un même flux sont fusionnés
+        :param backoff: pénalité en secondes après un premier échec
+        :param backoff_max: pénalité maximum en secondes
+        """
+        self.workers = workers or getattr(settings, 'CORE_PING_WORKERS', 8)
+        self.timeout = timeout or getattr(settings, 'CORE_PING_TIMEOUT', 5)
+        self.window = window if window is not None else getattr(settings, 'CORE_PING_WINDOW', 600)
+        self.backoff = backoff or getattr(settings, 'CORE_PING_BACKOFF', 300)
+        self.backoff_max = backoff_max or getattr(settings, 'CORE_PING_BACKOFF_MAX', 86400)
+
+    # Getter
+    def is_available(self, engine):
+        """ Renvoyer si un moteur n'est pas pénalisé """
+        state = cache.get(self._get_backoff_key(engine))
+        return state is None or state[1] <= time.time()
+
+    # Actions
+    def dispatch(self, feed, engines, name=None):
+        """
+        Pinger des moteurs avec l'URL d'un flux
+
+        :param feed: URL complète du flux
+        :param engines: URL des moteurs XML-RPC
+        :param name: nom du site, le nom du site courant par défaut
+        :returns: un dictionnaire {moteur: réponse}, ou None si le flux a déjà été pingé dans la fenêtre
+        """
+        if self.window and not cache.add(self.FEED_KEY.format(md5(feed.encode('utf-8')).hexdigest()), True, self.window):
+            return None
+        name = name or Site.objects.get_current().name
+        engines = [engine for engine in engines if self.is_available(engine)]
+        results = dict()
+        if not engines:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(engines))) as executor:
+            futures = {executor.submit(self._ping, engine, name, feed): engine for engine in engines}
+            for future in as_completed(futures):
+                engine = futures[future]
+                try:
+                    results[engine] = future.result()
+                    cache.delete(self._get_backoff_key(engine))
+                except Exception as e:
+                    results[engine] = None
+                    self._penalize(engine)
+                    logger.info("Ping to {engine} failed: {error}".format(engine=engine, error=e))
+                    ping_failed.send(None, engine=engine, feed=feed)
+        return results
+
+    # Privé
+    def _ping(self, engine, name, feed):
+        """ Pinger un moteur """
+        transport = (SafeTimeoutTransport if engine.startswith('https') else TimeoutTransport)(self.timeout)
+        proxy = client.ServerProxy(engine, transport=transport)
+        return proxy.weblogUpdates.ping(name, feed)
+
+    def _penalize(self, engine):
+        """ Ignorer un moteur pendant une durée croissante avec le nombre d'échecs consécutifs """
+        key = self._get_backoff_key(engine)
+        failures = (cache.get(key) or (0, 0))[0] + 1
+        delay = min(self.backoff * 2 ** (failures - 1), self.backoff_max)
+        cache.set(key, (failures, time.time() + delay), self.backoff_max * 2)
+
+    def _get_backoff_key(self, engine):
+        """ Renvoyer la clé de cache de l'état d'un moteur """
+        return self.BACKOFF_KEY.format(md5(engine.encode('utf-8')).hexdigest())
+
+
 def ping_feed(url_name, args=None, kwargs=None, percent=25):
     """
     Ping des moteurs
@@ -49,20 +187,170 @@ def ping_feed(url_name, args=None, kwargs=None, percent=25):
     :param url_name: nom d'URL à pinger
     :param args: arguments positionnels pour le reverse d'URL
     :param kwargs: arguments nommés pour le reverse d'URL
+    :returns: un dictionnaire {moteur: réponse}, ou None si le flux a déjà été pingé récemment
     """
     # Récupérer le chemin depuis le nom d'URL
     path = reverse(url_name, args or [], kwargs or {})
-    domain = Site.objects.get_current().domain
-    full_path = "%(domain)s%(path)s" % {'domain': domain, 'path': path}
+    site = Site.objects.get_current()
+    full_path = "%(protocol)s://%(domain)s%(path)s" % {'protocol': getattr(settings, 'SITEMAPS_PROTOCOL', 'http'), 'domain': site.domain, 'path': path}
     # Récupérer une liste de percent% des moteurs
-    shuffle(PING_ENGINES)
     count = math.ceil(percent * len(PING_ENGINES) / 100.0)
-    selected = PING_ENGINES[0:int(count)]
-    # Pinger chacun des moteurs choisis
-    for url in selected:
+    selected = sample(PING_ENGINES, int(count))
+    # Pinger les moteurs choisis en parallèle
+    return PingDispatcher().dispatch(full_path, selected, name=site.name)
+
+
+class PartitionedSitemap(Sitemap):
+    """
+    Sitemap pouvant être pré-généré en fichiers partitionnés
+
+    Les éléments sont lus par une seule requête values() (avec jointures),
+    parcourue en flux, sans instancier les objets. Une partition regroupe
+    les éléments d'une plage de clés primaires de taille `limit`, pour
+    qu'un ajout ou une suppression ne décale pas les autres partitions.
+    """
+    fields = ['id']  # champs lus par get_rows, doit contenir id
+
+    # Getter
+    def get_rows(self):
+        """ Renvoyer le queryset values() des éléments du sitemap """
+        raise NotImplementedError()
+
+    def get_row_location(self, row):
+        """ Renvoyer le chemin de l'URL d'un élément """
+        raise NotImplementedError()
+
+    def get_row_lastmod(self, row):
+        """ Renvoyer la date de modification d'un élément, ou None """
+        return None
+
+    def get_row_changefreq(self, row):
+        """ Renvoyer la fréquence de modification d'un élément, ou None """
+        return None
+
+    def get_row_priority(self, row):
+        """ Renvoyer la priorité d'un élément, ou None """
+        return None
+
+
+class SitemapGenerator(object):
+    """
+    Générateur de fichiers sitemap partitionnés et compressés
+
+    Écrit un fichier sitemap-<section>-<partition>.xml.gz par partition,
+    et un index sitemap.xml référençant toutes les partitions. L'empreinte
+    des éléments de chaque partition est conservée dans un fichier d'état,
+    et seules les partitions dont l'empreinte a changé sont réécrites.
+    """
+    INDEX_NAME = 'sitemap.xml'
+    STATE_NAME = 'sitemap-state.json'
+    PARTITION_NAME = 'sitemap-{section}-{partition}.xml.gz'
+
+    def __init__(self, sitemaps=None, root=None, url=None, domain=None):
+        """
+        Initialiser le générateur
+
+        :param sitemaps: dictionnaire {section: classe ou instance de PartitionedSitemap}
+        :param root: répertoire de destination des fichiers
+        :param url: URL publique du répertoire de destination
+        :param domain: domaine des URL, celui du site courant par défaut
+        """
+        sitemaps = sitemaps or {section: import_string(path) for section, path in getattr(settings, 'SITEMAPS_CLASSES', DEFAULT_SITEMAPS).items()
+                                if apps.is_installed(path.rsplit('.views.', 1)[0])}
+        self.sitemaps = {section: sitemap() if isinstance(sitemap, type) else sitemap for section, sitemap in sitemaps.items()}
+        self.root = root or getattr(settings, 'SITEMAPS_ROOT', os.path.join(settings.MEDIA_ROOT, 'sitemaps'))
+        self.url = url or getattr(settings, 'SITEMAPS_URL', "{0}sitemaps/".format(settings.MEDIA_URL))
+        self.domain = domain
+        self.protocol = getattr(settings, 'SITEMAPS_PROTOCOL', 'http')
+
+    # Getter
+    def get_state(self):
+        """ Renvoyer l'état de la dernière génération """
+        try:
+            with open(os.path.join(self.root, self.STATE_NAME), 'r') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return dict()
+
+    def get_base_url(self):
+        """ Renvoyer le préfixe absolu des URL """
+        domain = self.domain or Site.objects.get_current().domain
+        return "{protocol}://{domain}".format(protocol=self.protocol, domain=domain)
+
+    # Actions
+    def generate(self, force=False):
+        """
+        Générer les partitions modifiées et l'index
+
+        :param force: réécrire toutes les partitions
+        :returns: la liste des noms de fichiers écrits
+        """
+        os.makedirs(self.root, exist_ok=True)
+        state, base_url, written = self.get_state(), self.get_base_url(), []
+        new_state = dict()
+        for section, sitemap in sorted(self.sitemaps.items()):
+            previous, current = state.get(section, dict()), dict()
+            rows = sitemap.get_rows().order_by('id').iterator()
+            for partition, items in groupby(rows, key=lambda row: row['id'] // sitemap.limit):
+                items = list(items)
+                key, name = str(partition), self.PARTITION_NAME.format(section=section, partition=partition)
+                digest = md5("\n".join(repr(tuple(row.values())) for row in items).encode('utf-8')).hexdigest()
+                lastmods = [lastmod for lastmod in (sitemap.get_row_lastmod(row) for row in items) if lastmod is not None]
+                if force or previous.get(key, [None])[0] != digest or not os.path.exists(os.path.join(self.root, name)):
+                    self._write(name, self._render_partition(sitemap, items, base_url))
+                    written.append(name)
+                    lastmod = max(lastmods) if lastmods else timezone.now()
+                    current[key] = [digest, lastmod.isoformat()]
+                else:
+                    current[key] = previous[key]
+            # Supprimer les partitions devenues vides
+            for key in set(previous) - set(current):
+                self._remove(self.PARTITION_NAME.format(section=section, partition=key))
+            new_state[section] = current
+        self._write(self.INDEX_NAME, self._render_index(new_state))
+        self._write(self.STATE_NAME, json.dumps(new_state).encode('utf-8'), compress=False)
+        return written
+
+    # Privé
+    def _render_partition(self, sitemap, rows, base_url):
+        """ Renvoyer le document XML d'une partition """
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for row in rows:
+            entry = ["<loc>{0}</loc>".format(escape(base_url + str(sitemap.get_row_location(row))))]
+            lastmod, changefreq, priority = sitemap.get_row_lastmod(row), sitemap.get_row_changefreq(row), sitemap.get_row_priority(row)
+            if lastmod is not None:
+                entry.append("<lastmod>{0}</lastmod>".format(lastmod.strftime('%Y-%m-%d')))
+            if changefreq is not None:
+                entry.append("<changefreq>{0}</changefreq>".format(changefreq))
+            if priority is not None:
+                entry.append("<priority>{0:.1f}</priority>".format(priority))
+            lines.append("<url>{0}</url>".format("".join(entry)))
+        lines.append('</urlset>')
+        return "\n".join(lines).encode('utf-8')
+
+    def _render_index(self, state):
+        """ Renvoyer le document XML de l'index des partitions """
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        base_url = self.url if '://' in self.url else self.get_base_url() + self.url
+        for section, partitions in sorted(state.items()):
+            for key, (digest, lastmod) in sorted(partitions.items(), key=lambda item: int(item[0])):
+                location = base_url + self.PARTITION_NAME.format(section=section, partition=key)
+                lines.append("<sitemap><loc>{0}</loc><lastmod>{1}</lastmod></sitemap>".format(escape(location), lastmod))
+        lines.append('</sitemapindex>')
+        return "\n".join(lines).encode('utf-8')
+
+    def _write(self, name, data, compress=None):
+        """ Écrire un fichier de manière atomique, compressé si son nom se termine par .gz """
+        path = os.path.join(self.root, name)
+        temporary = "{0}.tmp".format(path)
+        opener = gzip.open if (name.endswith('.gz') if compress is None else compress) else open
+        with opener(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def _remove(self, name):
+        """ Supprimer un fichier s'il existe """
         try:
-            engine = server.SimpleXMLRPCServer(url)
-            result = engine.weblogUpdates.ping(full_path)
-        except:
-            ping_failed.send(None, engine=url, feed=full_path)
-    return locals().get('result', None)
+            os.remove(os.path.join(self.root, name))
+        except OSError:
+            pass
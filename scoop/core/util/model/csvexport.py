@@ -1,44 +1,123 @@
 # coding: utf-8
+import csv
 import gzip
 import os
 from datetime import date, datetime
 
-import unicodecsv as csv
+from django.http.response import StreamingHttpResponse
 
 
-def csv_dump(queryset, path, compress=False):
+class Echo(object):
+    """ Pseudo-fichier renvoyant directement la ligne écrite par le writer CSV """
+
+    def write(self, value):
+        """ Renvoyer la valeur écrite """
+        return value
+
+
+class CSVExporter(object):
+    """
+    Export CSV en flux d'un queryset
+
+    Les lignes sont lues par tranches, par pagination sur la clé primaire
+    (mémoire constante quelle que soit la taille du queryset, sans curseur serveur),
+    via values_list : les colonnes des clés étrangères sont jointes dans la même
+    requête au lieu d'être lues objet par objet.
+    """
+
+    def __init__(self, queryset, fields=None, related=None, chunk_size=2000):
+        """
+        Initialiser l'export
+
+        :param fields: noms des champs à exporter, tous les champs du modèle par défaut
+        :param related: dictionnaire {nom de clé étrangère: champ du modèle lié à exporter}.
+        Les clés étrangères absentes sont exportées sous forme d'ID.
+        :param chunk_size: nombre de lignes lues par requête
+        :type queryset: django.db.models.QuerySet
+        """
+        model = queryset.model
+        related = related or dict()
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self.headers = fields or [field.name for field in model._meta.fields]
+        self.columns = []
+        for name in self.headers:
+            field = model._meta.get_field(name)
+            if field.is_relation and name in related:
+                self.columns.append('{name}__{field}'.format(name=name, field=related[name]))
+            else:
+                self.columns.append(field.attname)
+        self.pk_name = model._meta.pk.attname
+
+    # Getter
+    @staticmethod
+    def format_value(value):
+        """ Renvoyer une valeur au format CSV """
+        if value is None:
+            return ""
+        if isinstance(value, (datetime, date)):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, bytes):
+            return value.decode('utf-8', 'replace')
+        return value
+
+    def get_rows(self):
+        """ Renvoyer un itérateur sur les lignes de l'export, en-têtes compris """
+        yield self.headers
+        columns = [self.pk_name] + self.columns
+        queryset, last = self.queryset.order_by(self.pk_name), None
+        while True:
+            chunk = queryset if last is None else queryset.filter(**{'{pk}__gt'.format(pk=self.pk_name): last})
+            rows = list(chunk.values_list(*columns)[:self.chunk_size])
+            for row in rows:
+                yield [self.format_value(value) for value in row[1:]]
+            if len(rows) < self.chunk_size:
+                break
+            last = rows[-1][0]
+
+    def get_lines(self):
+        """ Renvoyer un itérateur sur les lignes CSV encodées de l'export """
+        writer = csv.writer(Echo())
+        for row in self.get_rows():
+            yield writer.writerow(row).encode('utf-8')
+
+    def get_response(self, filename):
+        """ Renvoyer une réponse HTTP diffusant l'export en flux """
+        response = StreamingHttpResponse(self.get_lines(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="{filename}"'.format(filename=filename)
+        return response
+
+    # Actions
+    def write(self, path, compress=False):
+        """
+        Écrire l'export dans un fichier, au fur et à mesure de la lecture
+
+        :param compress: compresser le fichier avec gzip
+        :returns: le nombre de lignes de données écrites
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        count = -1
+        with (gzip.open(path, 'wt', encoding='utf-8', newline='') if compress else open(path, 'w', encoding='utf-8', newline='')) as outfile:
+            writer = csv.writer(outfile)
+            for row in self.get_rows():
+                writer.writerow(row)
+                count += 1
+        return count
+
+
+def csv_dump(queryset, path, compress=False, related=None):
     """
     Exporter un queryset au format CSV
 
     :param compress: Enregistrer le dump dans un fichier gzip
+    :param related: champs des modèles liés à exporter à la place des ID, voir CSVExporter
     :type queryset: django.db.models.QuerySet
     :type path: str
     :type compress: bool
     """
-    # TODO: Vérifier qu'on passe en Python3
-    model = queryset.model
     if compress and not path.endswith(".gz"):
         path += ".gz"
-    folder = os.path.dirname(path)
-    if not os.path.exists(folder):
-        os.makedirs(folder)
-    writer = csv.writer(gzip.open(path, 'wb') if compress else open(path, 'w+'), encoding='utf-8')
-    # Écrire la liste des en-têtes
-    headers = []
-    for field in model._meta.fields:
-        headers.append(field.name)
-    writer.writerow(headers)
-    # Écrire la liste des données du queryset
-    for obj in queryset:
-        row = []
-        for field in headers:
-            val = getattr(obj, field)
-            if callable(val):
-                val = val()
-            if type(val) == str:
-                val = val.encode("utf-8")
-            if isinstance(val, (datetime, date)):
-                val = val.strftime("%Y-%m-%d %H:%M:%S")
-            row.append(val)
-        writer.writerow(row)
+    CSVExporter(queryset, related=related).write(path, compress=compress)
     return True
@@ -0,0 +1,97 @@
+# coding: utf-8
+import logging
+
+from django.conf import settings
+from django.db import models, transaction
+from scoop.core.util.signals import post_delete_batch, pre_delete_batch
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkedDeleter(object):
+    """
+    Suppression d'un queryset par tranches de clés primaires
+
+    Chaque tranche est supprimée dans une transaction courte, ce qui évite
+    de verrouiller les tables pendant toute la durée de la suppression.
+    - si le modèle redéfinit delete(), la méthode est appelée pour chaque instance (suppression logique, fichiers etc.)
+    - sinon la tranche est supprimée en une requête ; les signaux pre_delete et post_delete
+    sont toujours envoyés par Django pour chaque instance
+    Les signaux pre_delete_batch et post_delete_batch sont envoyés pour chaque tranche,
+    avec la liste des instances, afin de traiter les effets de bord par lots.
+    """
+
+    def __init__(self, queryset, chunk_size=None, single=None, progress=None, **kwargs):
+        """
+        Initialiser la suppression
+
+        :param chunk_size: nombre d'instances par tranche, CORE_DELETE_CHUNK_SIZE ou 500 par défaut
+        :param single: forcer (True) ou empêcher (False) l'appel de delete() sur chaque instance. Détecté si None
+        :param progress: fonction appelée après chaque tranche avec le nombre d'instances traitées et le total
+        :param kwargs: arguments passés à la méthode delete() des instances
+        :type queryset: django.db.models.QuerySet
+        """
+        self.queryset = queryset
+        self.model = queryset.model
+        self.chunk_size = chunk_size or getattr(settings, 'CORE_DELETE_CHUNK_SIZE', 500)
+        self.single = self.is_delete_overridden() if single is None else single
+        self.progress = progress
+        self.kwargs = kwargs
+
+    # Getter
+    def is_delete_overridden(self):
+        """ Renvoyer si le modèle redéfinit la méthode delete() """
+        return getattr(self.model, 'delete') is not models.Model.delete
+
+    def get_chunks(self):
+        """ Renvoyer un itérateur sur les tranches de clés primaires à supprimer """
+        queryset, last = self.queryset.order_by('pk'), None
+        while True:
+            chunk = queryset if last is None else queryset.filter(pk__gt=last)
+            keys = list(chunk.values_list('pk', flat=True)[:self.chunk_size])
+            if keys:
+                yield keys
+            if len(keys) < self.chunk_size:
+                break
+            last = keys[-1]
+
+    # Actions
+    def run(self):
+        """
+        Supprimer les instances du queryset
+
+        :returns: le nombre d'instances traitées
+        """
+        total = self.queryset.count() if self.progress else None
+        done = 0
+        for keys in self.get_chunks():
+            done += self.delete_chunk(keys)
+            if self.progress:
+                self.progress(done, total)
+        logger.debug("Deleted {count} {name} instances".format(count=done, name=self.model._meta.model_name))
+        return done
+
+    def delete_chunk(self, keys):
+        """ Supprimer une tranche d'instances dans une transaction """
+        manager = self.model._base_manager
+        with transaction.atomic():
+            batched = pre_delete_batch.has_listeners(self.model) or post_delete_batch.has_listeners(self.model)
+            instances = list(manager.filter(pk__in=keys).order_by('pk')) if self.single or batched else []
+            pre_delete_batch.send(self.model, instances=instances)
+            if self.single:
+                for instance in instances:
+                    instance.delete(**self.kwargs)
+            else:
+                manager.filter(pk__in=keys).delete()
+            post_delete_batch.send(self.model, instances=instances)
+        return len(keys)
+
+
+def delete_in_chunks(queryset, **kwargs):
+    """
+    Supprimer un queryset par tranches
+
+    :param kwargs: voir ChunkedDeleter
+    :returns: le nombre d'instances traitées
+    """
+    return ChunkedDeleter(queryset, **kwargs).run()
@@ -6,8 +6,9 @@ from inspect import isclass
 from random import choice, randrange
 from time import sleep
 
-from django.db import models, transaction
+from django.db import models
 from django.db.transaction import atomic
+from scoop.core.util.model.deletion import delete_in_chunks
 
 
 def patch_methods(cls, *bases):
@@ -199,18 +200,27 @@ def make_lazy_picklable(*args):
 class SingleDeleteQuerySetMixin(object):
     """ Mixin de queryset implémentant la suppression individuelle des instances du queryset """
 
-    @transaction.atomic()
     def delete(self):
         """
-        Supprimer indépendamment chaque objet du queryset
+        Supprimer indépendamment chaque objet du queryset, par tranches
 
+        Voir scoop.core.util.model.deletion.ChunkedDeleter
+        Le mixin doit précéder models.QuerySet dans les classes parentes.
+        Les modèles qui redéfinissent delete() (suppression logique, fichiers)
+        voient cette méthode appelée pour chaque instance.
         :type self: django.db.models.Queryset
+        :returns: le nombre d'objets supprimés et le nombre par modèle, comme QuerySet.delete
         """
-        for item in self:
-            item.delete()
+        assert self.query.can_filter(), "Cannot use 'limit' or 'offset' with delete."
+        count = delete_in_chunks(self)
+        return count, {self.model._meta.label: count}
 
+    # Comme QuerySet.delete, ne pas copier la méthode sur les managers (Model.objects.delete())
+    delete.alters_data = True
+    delete.queryset_only = True
 
-class SingleDeleteQuerySet(models.QuerySet, SingleDeleteQuerySetMixin):
+
+class SingleDeleteQuerySet(SingleDeleteQuerySetMixin, models.QuerySet):
     """ Queryset implémentant la suppression individuelle des instances du queryset """
     pass
 
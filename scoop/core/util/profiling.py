@@ -0,0 +1,261 @@
+# coding: utf-8
+"""
+Profilage échantillonné des requêtes
+
+Une fraction des requêtes est profilée dans un contexte propre à la requête
+(profileur cProfile, requêtes SQL de la connexion du thread, mémoire du processus).
+Les mesures sont agrégées par vue et par tranche de temps dans un stockage local
+glissant, écrit régulièrement dans un fichier JSON par processus, et lu par la
+commande profile_report.
+"""
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+from os.path import join
+
+import psutil
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['RequestProfile', 'ProfileStore', 'profile_store']
+
+
+def get_memory():
+    """ Renvoyer la mémoire résidente du processus, en octets """
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+def merge_stats(target, source):
+    """ Ajouter des statistiques agrégées d'une vue à d'autres """
+    for name in ['count', 'time', 'queries', 'sql_time', 'memory']:
+        target[name] = target.get(name, 0) + source.get(name, 0)
+    target['max'] = max(target.get('max', 0.0), source.get('max', 0.0))
+    functions = target.setdefault('functions', dict())
+    for key, values in source.get('functions', dict()).items():
+        functions[key] = [a + b for a, b in zip(functions.get(key, [0, 0.0, 0.0]), values)]
+    return target
+
+
+class RequestProfile(object):
+    """
+    Contexte de profilage d'une requête
+
+    Chaque requête profilée possède son propre contexte, qui ne doit pas être
+    partagé entre threads. Un seul profileur cProfile peut être actif à la fois
+    dans certaines versions de Python : si un autre est déjà actif, seuls le
+    temps, le SQL et la mémoire sont mesurés.
+    """
+
+    def __init__(self, functions=True):
+        """
+        Initialiser le contexte
+
+        :param functions: profiler les appels de fonctions avec cProfile
+        """
+        self.profiler = cProfile.Profile() if functions else None
+        self.start = self.elapsed = None
+        self.memory = self.queries = 0
+        self.sql_time = 0.0
+        self.query_start = 0
+        self.debug_cursor = False
+
+    # Actions
+    def enable(self):
+        """ Démarrer les mesures """
+        self.debug_cursor = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        self.query_start = len(connection.queries_log)
+        self.memory = get_memory()
+        self.start = time.perf_counter()
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                self.profiler = None
+
+    def disable(self):
+        """ Arrêter les mesures """
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.elapsed = time.perf_counter() - self.start
+        self.memory = get_memory() - self.memory
+        queries = list(connection.queries_log)[self.query_start:]
+        self.queries = len(queries)
+        self.sql_time = sum(float(query['time']) for query in queries)
+        connection.force_debug_cursor = self.debug_cursor
+
+    def runcall(self, function, *args, **kwargs):
+        """ Exécuter une fonction en la profilant """
+        self.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.disable()
+
+    # Getter
+    def get_functions(self, limit=20):
+        """
+        Renvoyer les fonctions ayant consommé le plus de temps propre
+
+        :returns: un dictionnaire {"fichier:ligne(fonction)": [appels, temps propre, temps cumulé]}
+        """
+        if self.profiler is None:
+            return dict()
+        stats = pstats.Stats(self.profiler).stats
+        items = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return {"{0}:{1}({2})".format(*key): [values[1], values[2], values[3]] for key, values in items}
+
+    def get_stats(self, limit=20):
+        """ Renvoyer les mesures de la requête, au format agrégé du stockage """
+        return {'count': 1, 'time': self.elapsed, 'max': self.elapsed, 'queries': self.queries, 'sql_time': self.sql_time, 'memory': self.memory,
+                'functions': self.get_functions(limit)}
+
+
+class ProfileStore(object):
+    """
+    Stockage local glissant des profils agrégés par vue
+
+    Les mesures du processus sont agrégées par tranches de `bucket` secondes,
+    conservées `window` secondes, et écrites toutes les `delay` secondes dans
+    le fichier du processus, dans le répertoire `root`.
+    """
+
+    FILE_NAME = 'profile-{pid}.json'
+
+    def __init__(self, root=None, window=None, bucket=None, delay=None, functions=None):
+        """
+        Initialiser le stockage
+
+        :param root: répertoire des fichiers, CORE_PROFILING_ROOT par défaut
+        :param window: durée en secondes de conservation des mesures
+        :param bucket: largeur en secondes d'une tranche de temps
+        :param delay: délai en secondes entre deux écritures du fichier du processus
+        :param functions: nombre de fonctions conservées par vue et par tranche
+        """
+        self.root = root or getattr(settings, 'CORE_PROFILING_ROOT', join(tempfile.gettempdir(), 'scoop-profiling'))
+        self.window = window or getattr(settings, 'CORE_PROFILING_WINDOW', 3600)
+        self.bucket = bucket or 60
+        self.delay = delay if delay is not None else getattr(settings, 'CORE_PROFILING_FLUSH_DELAY', 10)
+        self.functions = functions or getattr(settings, 'CORE_PROFILING_FUNCTIONS', 20)
+        self.buckets = dict()
+        self.flushed = time.time()
+        self.lock = threading.Lock()
+
+    # Getter
+    def get_filename(self, pid=None):
+        """ Renvoyer le chemin du fichier d'un processus """
+        return join(self.root, self.FILE_NAME.format(pid=pid or os.getpid()))
+
+    def get_views(self, seconds=None, timestamp=None):
+        """
+        Renvoyer les statistiques agrégées par vue de tous les processus
+
+        :param seconds: durée en secondes de la période, toute la fenêtre par défaut
+        :returns: un dictionnaire {vue: statistiques}
+        """
+        limit = self.get_bucket((timestamp or time.time()) - (seconds or self.window))
+        views = dict()
+        for buckets in self.load():
+            for bucket, items in buckets.items():
+                if int(bucket) >= limit:
+                    for view, stats in items.items():
+                        merge_stats(views.setdefault(view, dict()), stats)
+        return views
+
+    def get_slowest(self, count=10, seconds=None, key='mean'):
+        """
+        Renvoyer les vues les plus lentes
+
+        :param key: critère de tri, 'mean', 'max', 'time' (total), 'queries' ou 'sql_time'
+        :returns: une liste de tuples (vue, statistiques), avec la clé 'mean' renseignée
+        """
+        views = self.get_views(seconds)
+        for stats in views.values():
+            stats['mean'] = stats['time'] / stats['count'] if stats['count'] else 0.0
+        return sorted(views.items(), key=lambda item: item[1].get(key, 0), reverse=True)[:count]
+
+    def get_bucket(self, timestamp):
+        """ Renvoyer le numéro de tranche d'un timestamp """
+        return int(timestamp // self.bucket)
+
+    @staticmethod
+    def is_sampled(rate=None):
+        """ Renvoyer si une requête doit être profilée, selon CORE_PROFILING_RATE """
+        rate = rate if rate is not None else getattr(settings, 'CORE_PROFILING_RATE', 0.01)
+        return rate > 0 and random.random() < rate
+
+    # Setter
+    def add(self, view, stats, timestamp=None):
+        """
+        Ajouter les mesures d'une requête aux statistiques d'une vue
+
+        :param view: nom de la vue
+        :param stats: mesures renvoyées par RequestProfile.get_stats
+        """
+        timestamp = timestamp or time.time()
+        with self.lock:
+            items = self.buckets.setdefault(self.get_bucket(timestamp), dict())
+            merged = merge_stats(items.setdefault(view, dict()), stats)
+            if len(merged['functions']) > self.functions * 4:
+                merged['functions'] = dict(sorted(merged['functions'].items(), key=lambda item: item[1][1], reverse=True)[:self.functions])
+            flush = timestamp - self.flushed >= self.delay
+        if flush:
+            self.flush(timestamp)
+
+    # Actions
+    def flush(self, timestamp=None):
+        """ Écrire les statistiques du processus, sans les tranches sorties de la fenêtre """
+        timestamp = timestamp or time.time()
+        limit = self.get_bucket(timestamp - self.window)
+        with self.lock:
+            self.buckets = {bucket: items for bucket, items in self.buckets.items() if bucket >= limit}
+            data = json.dumps(self.buckets)
+            self.flushed = timestamp
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            temporary = "{name}.tmp".format(name=self.get_filename())
+            with open(temporary, 'w') as f:
+                f.write(data)
+            os.replace(temporary, self.get_filename())
+        except OSError as e:
+            logger.warning("Could not write the profiling data to {root}: {error}".format(root=self.root, error=e))
+
+    def load(self):
+        """ Renvoyer les tranches de tous les processus, et supprimer les fichiers trop anciens """
+        result = []
+        try:
+            names = [name for name in os.listdir(self.root) if name.endswith('.json')]
+        except OSError:
+            return result
+        for name in names:
+            path = join(self.root, name)
+            try:
+                if os.path.getmtime(path) < time.time() - self.window:
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    result.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return result
+
+    def clear(self):
+        """ Supprimer les statistiques du processus """
+        with self.lock:
+            self.buckets = dict()
+        try:
+            os.remove(self.get_filename())
+        except OSError:
+            pass
+
+
+# Stockage du processus
+profile_store = ProfileStore()
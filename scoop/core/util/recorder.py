@@ -0,0 +1,101 @@
+# coding: utf-8
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from scoop.core.util.buffer import ProcessBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class RecordEntry(namedtuple('RecordEntry', ['user_id', 'name', 'codename', 'target_type_id', 'target_id', 'target_name', 'container_type_id',
+                                             'container_id', 'container_name', 'created'])):
+    """
+    Action à enregistrer, version légère et picklable
+
+    :attr user_id: id de l'utilisateur instigateur, ou None pour l'utilisateur anonyme
+    :attr name: nom court de l'utilisateur instigateur
+    :attr codename: nom de code du type d'action
+    :attr target_type_id: id du content type de la cible, ou None
+    :attr target_id: id de la cible, ou None
+    :attr target_name: représentation texte de la cible
+    :attr container_type_id: id du content type du conteneur, ou None
+    :attr container_id: id du conteneur, ou None
+    :attr container_name: représentation texte du conteneur, conservée après sa suppression
+    :attr created: date de l'action
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def from_action(actor, action, target=None, container=None):
+        """
+        Renvoyer une entrée depuis les paramètres du signal record
+
+        :param actor: utilisateur instigateur de l'action, l'utilisateur anonyme si None ou non enregistré
+        :param action: nom de code ou instance de RecordType
+        :param target: objet concerné par l'action
+        :param container: conteneur de l'objet concerné
+        """
+        from django.contrib.auth import get_user_model
+        from django.contrib.contenttypes.models import ContentType
+        if getattr(actor, 'pk', None) is None:
+            actor = get_user_model().objects.get_anonymous()
+        name = actor.get_short_name() if hasattr(actor, 'get_short_name') else actor.username
+        target_type, container_type = [ContentType.objects.get_for_model(item).id if isinstance(item, models.Model) else None for item in (target, container)]
+        return RecordEntry(actor.pk, (name or "")[:32], getattr(action, 'codename', action), target_type,
+                           target.pk if target_type else None, str(target)[:80] if target is not None else "",
+                           container_type, container.pk if container_type else None, str(container)[:80] if container_type else "", timezone.now())
+
+
+class RecordBuffer(ProcessBuffer):
+    """
+    Tampon local des actions à enregistrer
+
+    Les actions sont accumulées dans le processus courant puis envoyées
+    par lots à la tâche record_actions_async, lorsque le tampon atteint
+    une taille ou un âge maximum (voir ProcessBuffer).
+    """
+
+    def __init__(self, size=None, delay=None):
+        """
+        Initialiser le tampon
+
+        :param size: nombre d'actions déclenchant l'envoi du lot
+        :param delay: âge maximum en secondes du lot avant envoi
+        """
+        super(RecordBuffer, self).__init__(size or getattr(settings, 'CORE_RECORD_BUFFER_SIZE', 50), delay or getattr(settings, 'CORE_RECORD_BUFFER_DELAY', 10))
+
+    # Setter
+    def add(self, entry):
+        """
+        Ajouter une action au tampon, et envoyer le lot si nécessaire
+
+        :type entry: RecordEntry
+        """
+        if getattr(settings, 'CORE_ACTION_RECORD', True):
+            self.append(entry)
+
+    # Privé
+    def _send(self, batch):
+        """ Envoyer un lot d'actions à la tâche d'enregistrement, ou l'écrire directement si Celery est indisponible """
+        from scoop.core.tasks.recorder import record_actions_async
+        try:
+            record_actions_async.delay(batch)
+        except Exception as e:
+            logger.warning("Could not send {count} records: {error}".format(count=len(batch), error=e))
+            self._write(batch)
+
+    @staticmethod
+    def _write(batch):
+        """ Écrire un lot d'actions en base de données """
+        from scoop.core.models.recorder import Record
+        try:
+            Record.objects.add_batch(batch)
+        except Exception as e:
+            logger.warning("Could not write {count} records: {error}".format(count=len(batch), error=e))
+
+
+# Tampon du processus
+record_buffer = RecordBuffer()
@@ -0,0 +1,153 @@
+# coding: utf-8
+import logging
+
+from django.apps.registry import apps
+from django.conf import settings
+from django.db import models
+from haystack import connection_router, connections
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor
+from scoop.core.util.buffer import ProcessBuffer
+
+logger = logging.getLogger(__name__)
+
+
+def update_objects(batch):
+    """
+    Réindexer ou retirer des index un lot d'objets
+
+    Les objets modifiés qui ne font plus partie du queryset de leur index
+    (ex. messages supprimés) sont retirés de l'index.
+    :param batch: dictionnaire {label du modèle: (pks à mettre à jour, pks à retirer)}
+    :returns: le nombre d'objets traités
+    """
+    processed = 0
+    for label, (updates, removals) in batch.items():
+        model = apps.get_model(label)
+        for alias in connection_router.for_write(models=[model]):
+            try:
+                index = connections[alias].get_unified_index().get_index(model)
+            except NotHandled:
+                continue
+            backend = connections[alias].get_backend()
+            removed = set(removals)
+            if updates:
+                objects = list(index.index_queryset(using=alias).filter(pk__in=updates))
+                backend.update(index, objects)
+                removed |= set(updates) - {item.pk for item in objects}
+            for pk in removed:
+                backend.remove('{label}.{pk}'.format(label=model._meta.label_lower, pk=pk))
+        processed += len(set(updates) | set(removals))
+    return processed
+
+
+class IndexBuffer(ProcessBuffer):
+    """
+    Tampon local des objets à réindexer
+
+    Les clés primaires des objets modifiés ou supprimés sont accumulées
+    par modèle dans le processus courant, puis envoyées par lots à la tâche
+    update_search_objects lorsque le tampon atteint une taille ou un âge
+    maximum (voir ProcessBuffer). Un objet modifié plusieurs fois n'est
+    réindexé qu'une fois.
+    """
+
+    def __init__(self, size=None, delay=None):
+        """
+        Initialiser le tampon
+
+        :param size: nombre d'objets déclenchant l'envoi du lot
+        :param delay: âge maximum en secondes du lot avant envoi
+        """
+        super(IndexBuffer, self).__init__(size or getattr(settings, 'CORE_SEARCH_BUFFER_SIZE', 100), delay or getattr(settings, 'CORE_SEARCH_BUFFER_DELAY', 30))
+
+    # Setter
+    def add(self, model, pk, remove=False):
+        """
+        Ajouter un objet au tampon, et envoyer le lot si nécessaire
+
+        :param model: classe du modèle de l'objet
+        :param pk: clé primaire de l'objet
+        :param remove: l'objet doit être retiré de l'index
+        """
+        self.append((model._meta.label_lower, pk, remove))
+
+    # Privé
+    def _clear(self):
+        """ Réinitialiser le contenu du tampon """
+        self.entries = dict()
+
+    def _store(self, item):
+        """ Stocker un objet dans les clés à mettre à jour ou à retirer de son modèle """
+        label, pk, remove = item
+        updates, removals = self.entries.setdefault(label, (set(), set()))
+        (updates if not remove else removals).add(pk)
+        (removals if not remove else updates).discard(pk)
+
+    def _pop(self):
+        """ Vider le tampon et renvoyer son contenu sous forme picklable """
+        entries = super(IndexBuffer, self)._pop()
+        return {label: (list(updates), list(removals)) for label, (updates, removals) in entries.items()}
+
+    def _count(self, batch):
+        """ Renvoyer le nombre d'objets distincts d'un lot """
+        return sum(len(updates) + len(removals) for updates, removals in batch.values())
+
+    def _send(self, batch):
+        """ Envoyer un lot à la tâche de réindexation, ou le réindexer directement si Celery est indisponible """
+        from scoop.core.tasks.search import update_search_objects
+        try:
+            update_search_objects.delay(batch)
+        except Exception as e:
+            logger.warning("Could not send {count} models to reindex: {error}".format(count=len(batch), error=e))
+            self._write(batch)
+
+    @staticmethod
+    def _write(batch):
+        """ Réindexer un lot d'objets """
+        try:
+            update_objects(batch)
+        except Exception as e:
+            logger.warning("Could not reindex {count} models: {error}".format(count=len(batch), error=e))
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """
+    Processeur de signaux Haystack mettant en file les objets modifiés
+
+    Contrairement à RealtimeSignalProcessor, aucune écriture dans l'index
+    n'a lieu pendant la requête : les objets des modèles indexés sont ajoutés
+    au tampon du processus, réindexé par lots en tâche de fond.
+    À activer via HAYSTACK_SIGNAL_PROCESSOR.
+    """
+    buffer = None  # Tampon utilisé, celui du processus si None
+
+    # Actions
+    def setup(self):
+        """ Connecter les signaux des modèles """
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        """ Déconnecter les signaux des modèles """
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        """ Mettre en file un objet enregistré """
+        if self.is_indexed(sender):
+            (self.buffer or index_buffer).add(sender, instance.pk)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        """ Mettre en file un objet supprimé """
+        if self.is_indexed(sender):
+            (self.buffer or index_buffer).add(sender, instance.pk, remove=True)
+
+    # Getter
+    def is_indexed(self, model):
+        """ Renvoyer si un modèle fait partie d'un index """
+        return any(model in self.connections[alias].get_unified_index().get_indexed_models() for alias in self.connection_router.for_write(models=[model]))
+
+
+# Tampon du processus
+index_buffer = IndexBuffer()
@@ -8,3 +8,6 @@ record = Signal(['actor', 'action', 'target', 'content'])
 ping_failed = Signal(['engine', 'feed'])
 # Check si un élément peut être indexé
 check_indexable = Signal(['instance'])  # Renvoie True si indexable, sinon None
+# Suppression par lots : avant et après la suppression d'une tranche d'instances
+pre_delete_batch = Signal(['instances'])
+post_delete_batch = Signal(['instances'])
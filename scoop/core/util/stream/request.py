@@ -25,6 +25,7 @@ class RequestMixin(object):
     PICKLABLE_META = ['HTTP_X_REAL_IP', 'HTTP_X_FORWARDED_FOR', 'REMOTE_ADDR', 'REMOTE_HOST', 'SERVER_NAME', 'SERVER_PORT', 'LANG', 'LANGUAGE', 'HTTP_REFERER',
                       'CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_HOST', 'HTTP_USER_AGENT', 'REMOTE_USER', 'REQUEST_METHOD']
     POST_CACHE_KEY = "post.data.%(user)s.%(name)s"
+    ANONYMOUS, AUTHENTICATED, STAFF = 'anonymous', 'authenticated', 'staff'  # classes d'accès
 
     # Getter
     def get_ip(self):
@@ -48,6 +49,19 @@ class RequestMixin(object):
         """ Renvoyer si le référent est externe au site """
         return not self.get_referrer().startswith(getattr(settings, 'DOMAIN_NAME', '--'))
 
+    def get_access_class(self):
+        """
+        Renvoyer la classe d'accès de l'utilisateur de la requête
+
+        Permet de mettre en cache des rendus partagés par tous les utilisateurs d'une classe.
+        :type self: django.http.HttpRequest
+        :returns: RequestMixin.ANONYMOUS, AUTHENTICATED ou STAFF
+        """
+        user = getattr(self, 'user', None)
+        if user is None or not user.is_authenticated():
+            return RequestMixin.ANONYMOUS
+        return RequestMixin.STAFF if user.is_staff else RequestMixin.AUTHENTICATED
+
     def get_reverse(self):
         """ Renvoyer le reverse de l'IP de la requête """
         from scoop.user.access.util.access import reverse_lookup
@@ -57,11 +71,9 @@ class RequestMixin(object):
 
     def get_geoip(self):
         if getattr(self, 'geoip', None) is None:
-            from scoop.user.access.models import IP
-            # Renvoyer les infos GeoIP
-            ip = IP.objects.get_by_ip(self.get_ip())
-            geoip = ip.get_geoip()
-            self.geoip = geoip
+            from scoop.user.access.util.geoip import geoip_resolver
+            # Renvoyer les infos GeoIP, sans passer par la base de données
+            self.geoip = geoip_resolver.get_record(self.get_ip())
         return self.geoip
 
     def get_city(self):
@@ -70,11 +82,11 @@ class RequestMixin(object):
             from scoop.location.models import City
             # Renvoyer la ville
             geoip = self.get_geoip()
-            if geoip is None:
+            if not geoip or geoip.get('latitude') is None:
                 return None
             latitude = geoip['latitude']
-            longitude = geoip['longitude']
-            cityname = geoip['city']
+            longitude = geoip.get('longitude', 0.0)
+            cityname = geoip.get('city') or ""
             # Trouver la ville alentours au bon nom
             city = City.objects.find_by_name([latitude, longitude], cityname)
             return city
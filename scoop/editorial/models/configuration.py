@@ -11,6 +11,7 @@ from scoop.core.util.django.templates import render_to
 from scoop.core.util.model.model import limit_to_model_names
 from scoop.core.util.shortcuts import import_qualified_name
 from scoop.editorial.util.decorators import EDITORIAL_VIEW_ATTRIBUTE
+from scoop.editorial.util.fragments import invalidate
 
 
 logger = logging.getLogger('editorial')
@@ -45,6 +46,10 @@ class Configuration(DatetimeModel, WeightedModel):
                 return True
         return False
 
+    def is_personal(self):
+        """ Renvoyer si le rendu dépend de la requête et ne peut pas être mis en cache """
+        return bool(self.view_path)
+
     def get_view_callable(self):
         """
         Renvoyer la vue selon le chemin renseigné dans view_path
@@ -101,6 +106,12 @@ class Configuration(DatetimeModel, WeightedModel):
     def save(self, *args, **kwargs):
         """ Enregistrer l'objet dans la base de données """
         super(Configuration, self).save(*args, **kwargs)
+        invalidate('configuration', self.pk)
+
+    def delete(self, *args, **kwargs):
+        """ Supprimer l'objet de la base de données """
+        invalidate('configuration', self.pk)
+        return super(Configuration, self).delete(*args, **kwargs)
 
     # Métadonnées
     class Meta:
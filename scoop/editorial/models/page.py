@@ -1,6 +1,5 @@
 # coding: utf-8
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.db import models
 from django.template.base import Template
 from django.template.context import RequestContext
@@ -11,6 +10,7 @@ from scoop.core.abstract.core.uuid import UUID64Model
 from scoop.core.abstract.core.weight import WeightedModel
 from scoop.core.abstract.seo.index import SEIndexModel
 from scoop.core.abstract.user.authorable import AuthorableModel
+from scoop.editorial.util.fragments import render_configurations
 from unidecode import unidecode
 
 
@@ -64,9 +64,6 @@ class PageManager(models.Manager):
 class Page(WeightedModel, DatetimeModel, AuthorableModel, UUID64Model, SEIndexModel):
     """ Page personnalisée """
 
-    # Constantes
-    DEFAULT_CACHE_DURATION = 300
-
     # Champs
     name = models.CharField(max_length=128, unique=True, blank=False, verbose_name=_("Name"))
     title = models.CharField(max_length=128, blank=False, verbose_name=_("Title"))
@@ -86,31 +83,26 @@ class Page(WeightedModel, DatetimeModel, AuthorableModel, UUID64Model, SEIndexMo
 
     # Getter
     def render(self, request):
-        """ Rendre la page """
-        cache_key = 'editorial.page.render.{id}'.format(id=self.id)
-        output = cache.get(cache_key, [])
-        if output:
-            return output
+        """
+        Rendre la page
+
+        Le rendu des configurations est lu depuis le cache de fragments,
+        par classe d'accès de l'utilisateur ; la page est assemblée à chaque requête.
+        """
         # Ligne extends
         extends = '{{% extends "{path}" %}}'.format(path=self.template.path)
         filters = '{% load i18n panels inlines %}'
-        output.append(extends)
-        output.append(filters)
+        output = [extends, filters]
         # Blocs
         for position in self.get_positions():
             if position.has_access(request):
-                content = "{{block.super}}"
                 # Récupérer les configurations appartenant à ce block
-                for configuration in self.get_configurations(position):
-                    content += configuration.render(request)
-                output.append("{{% block {name} %}}{content}{{% endblock %}}".format(name=position.name, content=content))
+                content = "".join(render_configurations(list(self.get_configurations(position)), request))
+                output.append("{{% block {name} %}}{{{{block.super}}}}{content}{{% endblock %}}".format(name=position.name, content=content))
         # Utiliser le rendu comme un template
-        output = "".join(output)
-        template = Template(output)
+        template = Template("".join(output))
         context = RequestContext(request, {'page': self})
-        page_html = template.render(context)
-        cache.set(cache_key, page_html, Page.DEFAULT_CACHE_DURATION)
-        return page_html
+        return template.render(context)
 
     def get_children(self, active=True):
         """ Renvoyer les pages enfants """
@@ -119,7 +111,7 @@ class Page(WeightedModel, DatetimeModel, AuthorableModel, UUID64Model, SEIndexMo
 
     def get_configurations(self, position):
         """ Renvoyer les configurations dans cette page à une position """
-        return self.configurations.filter(position=position).order_by('weight')
+        return self.configurations.filter(position=position).select_related('template').order_by('weight')
 
     def get_position(self, name):
         """ Renvoyer la position portant un nom """
@@ -10,6 +10,7 @@ from django.template.loader_tags import BlockNode, ExtendsNode
 from django.utils.translation import ugettext_lazy as _
 from scoop.core.abstract.core.datetime import DatetimeModel
 from scoop.core.util.shortcuts import addattr
+from scoop.editorial.util.fragments import invalidate
 
 
 class TemplateQuerySet(models.QuerySet):
@@ -190,6 +191,7 @@ class Template(DatetimeModel):
         """ Enregistrer l'objet dans la base de données """
         super(Template, self).save(*args, **kwargs)
         self.auto_fill()
+        invalidate('template', self.pk)
 
     # Métadonnées
     class Meta:
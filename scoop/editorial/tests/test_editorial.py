@@ -2,6 +2,7 @@
 
 from django.http.response import HttpResponse
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from scoop.core.util.stream.request import default_request
 from scoop.editorial.models.configuration import Configuration
@@ -76,3 +77,21 @@ class EditorialTest(TestCase):
         self.assertContains(output, '<body>')
         self.assertContains(output, '</body>')
         self.assertContains(output, 'Je suis un extrait')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_fragment_cache(self):
+        """ Tester la mise en cache et l'invalidation des rendus de configurations """
+        template = Template.at_path('tests/editorial/extended.html')
+        excerpt_template = Template.at_path('tests/editorial/excerpt.html')
+        page = Page.objects.create(name='p3', title='Cached page', path='/p3', template=template, author=self.user)
+        excerpt = Excerpt.objects.create_translated({'en': {'text': "Cached excerpt"}}, name='x3', title="Cached", description="Cached", author=self.user)
+        configuration = Configuration(page=page, position=page.get_position('title'), template=excerpt_template, content_object=excerpt)
+        configuration.save()
+        self.assertContains(HttpResponse(page.render(default_request())), 'Cached excerpt')
+
+        # Modifier le texte sans invalider : le fragment en cache est utilisé
+        excerpt.translations.update(text="Fresh excerpt")
+        self.assertContains(HttpResponse(page.render(default_request())), 'Cached excerpt')
+        # Enregistrer la configuration invalide le fragment
+        configuration.save()
+        self.assertContains(HttpResponse(page.render(default_request())), 'Fresh excerpt')
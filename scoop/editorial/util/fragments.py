@@ -0,0 +1,68 @@
+# coding: utf-8
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from scoop.core.util.stream.request import RequestMixin
+
+# Clés de cache des rendus de configurations et des versions des objets
+FRAGMENT_KEY = 'editorial.fragment.{id}.{configuration}.{template}.{access}'
+VERSION_KEY = 'editorial.fragment.version.{kind}.{id}'
+
+
+def get_versions(keys):
+    """
+    Renvoyer les versions courantes de plusieurs objets, en une lecture du cache
+
+    Les versions absentes sont initialisées.
+    :param keys: clés de version, voir VERSION_KEY
+    :returns: un dictionnaire {clé: version}
+    """
+    versions = cache.get_many(keys)
+    for key in set(keys).difference(versions):
+        cache.add(key, uuid4().hex, None)
+        versions[key] = cache.get(key)
+    return versions
+
+
+def invalidate(kind, pk):
+    """
+    Invalider les rendus en cache liés à un objet
+
+    :param kind: 'configuration' ou 'template'
+    :param pk: identifiant de l'objet
+    """
+    cache.set(VERSION_KEY.format(kind=kind, id=pk), uuid4().hex, None)
+
+
+def render_configurations(configurations, request=None):
+    """
+    Renvoyer le rendu de plusieurs configurations, depuis le cache si possible
+
+    Les rendus sont mis en cache par version de la configuration et de son template,
+    et par classe d'accès de l'utilisateur (anonyme, connecté, équipe).
+    Les configurations personnalisées (vues) sont toujours rendues.
+    :type configurations: list<scoop.editorial.models.Configuration>
+    :returns: la liste des rendus, dans l'ordre des configurations
+    """
+    access = request.get_access_class() if request is not None else RequestMixin.ANONYMOUS
+    cacheable = [configuration for configuration in configurations if not configuration.is_personal()]
+    version_keys = {configuration.pk: (VERSION_KEY.format(kind='configuration', id=configuration.pk),
+                                       VERSION_KEY.format(kind='template', id=configuration.template_id)) for configuration in cacheable}
+    versions = get_versions([key for pair in version_keys.values() for key in pair])
+    keys = {pk: FRAGMENT_KEY.format(id=pk, configuration=versions[pair[0]], template=versions[pair[1]], access=access)
+            for pk, pair in version_keys.items()}
+    fragments, missing = cache.get_many(list(keys.values())), dict()
+    output = []
+    for configuration in configurations:
+        key = keys.get(configuration.pk)
+        if key in fragments:
+            output.append(fragments[key])
+        else:
+            content = str(configuration.render(request))
+            output.append(content)
+            if key is not None:
+                missing[key] = content
+    if missing:
+        cache.set_many(missing, getattr(settings, 'EDITORIAL_FRAGMENT_CACHE_DURATION', 600))
+    return output
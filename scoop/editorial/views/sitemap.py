@@ -1,14 +1,18 @@
 # coding: utf-8
+from datetime import datetime
+
 from django.conf import settings
-from django.contrib.sitemaps import Sitemap
+from django.utils import timezone
+from scoop.core.util.django.sitemaps import PartitionedSitemap
 from scoop.editorial.models.page import Page
 
 
-class EditorialSitemap(Sitemap):
+class EditorialSitemap(PartitionedSitemap):
     """ Sitemap des pages """
     changefreq = 'weekly'
     priority = 0.5
     limit = getattr(settings, 'SITEMAPS_ITEMS_PER_PAGE', 50000)
+    fields = ['id', 'path', 'time']
 
     # Getter
     def items(self):
@@ -27,3 +31,23 @@ class EditorialSitemap(Sitemap):
         """ Renvoyer la fréquence de modification de la page """
         # Renvoyer hourly si le contenu a été modifié récemment
         return 'weekly'
+
+    def get_rows(self):
+        """ Renvoyer les éléments du sitemap """
+        return Page.objects.filter(active=True, anonymous=True).values(*self.fields)
+
+    def get_row_location(self, row):
+        """ Renvoyer l'URL de la page """
+        return row['path']
+
+    def get_row_lastmod(self, row):
+        """ Renvoyer la dernière modification de la page """
+        return datetime.fromtimestamp(row['time'], timezone.utc)
+
+    def get_row_changefreq(self, row):
+        """ Renvoyer la fréquence de modification de la page """
+        return 'weekly'
+
+    def get_row_priority(self, row):
+        """ Renvoyer la priorité de la page """
+        return self.priority
@@ -15,7 +15,9 @@ class ForumConfig(AppConfig):
 
     def ready(self):
         """ Le registre d'applications est prêt """
-        pass
+        from django.conf import settings
+        if not settings.SCOOP_DISABLE_SIGNALS:
+            from scoop.forum import listeners
 
 
 # Charger la configuration ci-dessus par défaut
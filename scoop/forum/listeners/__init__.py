@@ -0,0 +1,2 @@
+# coding: utf-8
+from .vote import vote_deleted
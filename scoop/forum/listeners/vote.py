@@ -0,0 +1,14 @@
+# coding: utf-8
+from django.db.models.signals import post_delete
+from django.dispatch.dispatcher import receiver
+from scoop.forum.models.tally import PollTally
+from scoop.forum.models.vote import Vote
+
+__all__ = ['vote_deleted']
+
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender, instance, **kwargs):
+    """ Retirer un vote supprimé des décomptes du sondage, y compris par lots ou en cascade """
+    if not Vote.objects.is_pruning(instance.poll_id):
+        PollTally.objects.tally(instance.poll_id, instance.choice, -1)
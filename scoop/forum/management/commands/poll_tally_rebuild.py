@@ -0,0 +1,19 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from scoop.forum.models.poll import Poll
+from scoop.forum.models.tally import PollTally
+
+
+class Command(BaseCommand):
+    """ Recalculer les décomptes des sondages depuis les votes """
+    args = ''
+    help = 'Rebuild poll tallies from individual votes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', '-p', action='append', type=int, dest='polls', default=None, help='Id of a poll to rebuild. All polls by default.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        polls = Poll.objects.filter(pk__in=options['polls']) if options['polls'] else None
+        count = PollTally.objects.rebuild(polls)
+        print("Rebuilt tallies for {count} polls".format(count=count))
@@ -5,5 +5,6 @@ from .mutelist import Mutelist
 from .participant import Participant
 from .poll import Poll
 from .sanction import Sanction
+from .tally import PollTally
 from .thread import Thread
 from .vote import Vote
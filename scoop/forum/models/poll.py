@@ -1,6 +1,6 @@
 # coding: utf-8
 from autoslug.fields import AutoSlugField
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import pgettext_lazy
@@ -12,6 +12,8 @@ from scoop.core.abstract.user.authored import AuthoredModel
 from scoop.core.util.model.fields import LineListField
 from scoop.core.util.model.model import SingleDeleteManager
 from scoop.core.util.shortcuts import addattr
+from scoop.forum.models.tally import PollTally
+from scoop.forum.models.vote import Vote
 
 
 class PollManager(SingleDeleteManager):
@@ -81,10 +83,14 @@ class Poll(DatetimeModel, AuthoredModel, UUID128Model, PicturableModel, DataMode
         """ Renvoie le nombre de choix disponibles """
         return len(self.get_choices())
 
+    def get_vote_counts(self):
+        """ Renvoyer un dictionnaire {choix: nombre de votes}, lu depuis les décomptes """
+        return PollTally.objects.get_counts(self)
+
     @addattr(boolean=True, short_description=_("Has votes"))
     def has_votes(self):
         """ Renvoyer s'il y a des votes pour ce sondage """
-        return self.votes.all().exists()
+        return self.get_vote_count() > 0
 
     def get_votes(self):
         """ Renvoyer les votes du sondage """
@@ -93,21 +99,32 @@ class Poll(DatetimeModel, AuthoredModel, UUID128Model, PicturableModel, DataMode
     @addattr(short_description=_("Votes"))
     def get_vote_count(self):
         """ Renvoyer le nombre de votes du sondage """
-        return self.votes.only('pk').count()
+        return sum(self.get_vote_counts().values())
+
+    def get_vote_percent(self, choice, counts=None):
+        """
+        Renvoyer le pourcentage de votes sur un choix
 
-    def get_vote_percent(self, choice):
-        """ Renvoyer le pourcentage de votes sur un choix """
-        total = self.get_vote_count()
-        count = self.votes.filter(choice=choice)
-        return count * 100.0 / total
+        :param counts: décomptes déjà lus avec get_vote_counts, lus si None
+        """
+        counts = self.get_vote_counts() if counts is None else counts
+        total = sum(counts.values())
+        return counts.get(choice, 0) * 100.0 / total if total else 0.0
 
     def get_vote_percents(self):
         """ Renvoyer un dictionnaire des pourcentages de votes """
-        result = []
-        for choice in self.answers.keys():
-            percent = self.get_vote_percent(choice)
-            result.append({'choice': choice, 'percent': percent})
-        return result
+        counts = self.get_vote_counts()
+        return [{'choice': choice, 'percent': self.get_vote_percent(choice, counts)} for choice in self.answers.keys()]
+
+    def get_results(self):
+        """ Renvoyer les résultats du sondage : réponse, nombre de votes et pourcentage par choix """
+        counts = self.get_vote_counts()
+        return [{'choice': choice, 'answer': answer, 'count': counts.get(choice, 0), 'percent': self.get_vote_percent(choice, counts)}
+                for choice, answer in self.answers.items()]
+
+    def is_pruned(self):
+        """ Renvoyer si les votes individuels du sondage ont été purgés """
+        return bool((self.get_data('statistics') or {}).get('pruned'))
 
     @addattr(boolean=True, short_description=_("Expired"))
     def has_expired(self):
@@ -129,10 +146,14 @@ class Poll(DatetimeModel, AuthoredModel, UUID128Model, PicturableModel, DataMode
         return False
 
     # Privé
+    @transaction.atomic
     def _prune_statistics(self):
-        """ TODO: Mettre à jour les données de stats pour le sondage et supprimer les votes individuels """
-        self.set_data('statistics', {}, save=True)
-        self.get_votes().delete()
+        """ Recalculer les décomptes du sondage et supprimer les votes individuels """
+        PollTally.objects.rebuild([self])
+        self.set_data('statistics', {'pruned': timezone.now(), 'total': self.get_vote_count()}, save=True)
+        # Supprimer les votes sans les retirer des décomptes, voir scoop.forum.listeners.vote
+        with Vote.objects.pruning(self):
+            Vote._base_manager.filter(poll=self).delete()
 
     # Overrides
     def __str__(self):
@@ -0,0 +1,77 @@
+# coding: utf-8
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.aggregates import Count
+from django.utils.translation import ugettext_lazy as _
+from scoop.core.util.model.model import SingleDeleteManager
+
+
+class PollTallyManager(SingleDeleteManager):
+    """ Manager des décomptes de votes """
+
+    # Getter
+    def get_counts(self, poll):
+        """ Renvoyer un dictionnaire {choix: nombre de votes} d'un sondage, en une requête """
+        return dict(self.filter(poll=poll).values_list('choice', 'count'))
+
+    # Setter
+    def tally(self, poll, choice, delta=1):
+        """
+        Ajouter ou retirer des votes au décompte d'un choix
+
+        La mise à jour est faite en SQL (count = count + delta), sans verrouiller le sondage.
+        :param delta: nombre de votes à ajouter, négatif pour en retirer
+        """
+        if choice is None:
+            return
+        tallies = self.filter(poll=poll, choice=choice)
+        if delta < 0:
+            tallies = tallies.filter(count__gte=-delta)
+        with transaction.atomic():
+            if not tallies.update(count=F('count') + delta) and delta > 0:
+                try:
+                    with transaction.atomic():
+                        self.create(poll=poll, choice=choice, count=delta)
+                except IntegrityError:
+                    # Décompte créé entre-temps par un autre processus
+                    self.filter(poll=poll, choice=choice).update(count=F('count') + delta)
+
+    # Actions
+    def rebuild(self, polls=None):
+        """
+        Recalculer les décomptes depuis les votes individuels
+
+        Les sondages dont les votes ont été purgés sont ignorés.
+        :param polls: queryset des sondages à traiter, tous par défaut
+        :returns: le nombre de sondages traités
+        """
+        from scoop.forum.models.poll import Poll
+        from scoop.forum.models.vote import Vote
+        polls = [poll for poll in (polls if polls is not None else Poll.objects.all()) if not poll.is_pruned()]
+        with transaction.atomic():
+            self.filter(poll__in=polls).delete()
+            counts = Vote.objects.filter(poll__in=polls, choice__isnull=False).values('poll', 'choice').annotate(count=Count('id'))
+            self.bulk_create([PollTally(poll_id=row['poll'], choice=row['choice'], count=row['count']) for row in counts], batch_size=1000)
+        return len(polls)
+
+
+class PollTally(models.Model):
+    """ Nombre de votes pour un choix d'un sondage """
+
+    # Champs
+    poll = models.ForeignKey('forum.Poll', null=False, related_name='tallies', verbose_name=_("Poll"))
+    choice = models.SmallIntegerField(verbose_name=_("Choice"))
+    count = models.PositiveIntegerField(default=0, verbose_name=_("Votes"))
+    objects = PollTallyManager()
+
+    # Overrides
+    def __str__(self):
+        """ Représentation unicode de l'objet """
+        return _('{count} votes for {choice} in poll "{poll}"').format(count=self.count, choice=self.choice, poll=self.poll)
+
+    # Métadonnées
+    class Meta:
+        unique_together = (('poll', 'choice'),)
+        verbose_name = _("poll tally")
+        verbose_name_plural = _("poll tallies")
+        app_label = 'forum'
@@ -1,16 +1,38 @@
 # coding: utf-8
-from django.db import models
+import threading
+from contextlib import contextmanager
+
+from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 from scoop.core.abstract.core.datetime import DatetimeModel
 from scoop.core.abstract.user.authored import AuthoredModel
 from scoop.core.util.model.model import SingleDeleteManager
+from scoop.forum.models.tally import PollTally
 from scoop.forum.util.signals import poll_vote_cast
 
 
 class VoteManager(SingleDeleteManager):
     """ Manager des votes """
 
+    # Sondages dont les votes sont purgés sans modifier les décomptes, par thread
+    local = threading.local()
+
+    # Getter
+    def is_pruning(self, poll_id):
+        """ Renvoyer si les votes d'un sondage sont en cours de purge dans le thread """
+        return poll_id in getattr(VoteManager.local, 'polls', ())
+
     # Actions
+    @contextmanager
+    def pruning(self, poll):
+        """ Supprimer les votes d'un sondage sans les retirer de ses décomptes, dans un bloc with """
+        polls = VoteManager.local.__dict__.setdefault('polls', set())
+        polls.add(poll.pk)
+        try:
+            yield
+        finally:
+            polls.discard(poll.pk)
+
     def cast(self, author, poll, choice):
         """
         Voter dans un sondage
@@ -19,7 +41,7 @@ class VoteManager(SingleDeleteManager):
         :param poll: objet sondage
         :param choice: indice de la réponse à la question
         """
-        if choice in poll.choices.all():
+        if choice in poll.answers:
             vote, created = self.get_or_create(author=author, poll=poll, choice=choice)
             if created:
                 poll_vote_cast.send(vote)
@@ -38,6 +60,15 @@ class Vote(DatetimeModel, AuthoredModel):
         """ Représentation unicode de l'objet """
         return _('Vote: {vote} in poll "{poll}"').format(poll=self.poll, vote=self.choice)
 
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        """ Enregistrer le vote et mettre à jour les décomptes du sondage """
+        previous = Vote._base_manager.filter(pk=self.pk).values_list('choice', flat=True).first() if self.pk else None
+        super(Vote, self).save(*args, **kwargs)
+        if previous != self.choice:
+            PollTally.objects.tally(self.poll_id, previous, -1)
+            PollTally.objects.tally(self.poll_id, self.choice, 1)
+
     # Métadonnées
     class Meta:
         unique_together = (('author', 'poll'),)
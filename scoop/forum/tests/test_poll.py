@@ -0,0 +1,58 @@
+# coding: utf-8
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.core.util.django.testing import TEST_CONFIGURATION
+from scoop.forum.models.poll import Poll
+from scoop.forum.models.tally import PollTally
+from scoop.forum.models.vote import Vote
+from scoop.user.models import User
+
+
+@override_settings(**TEST_CONFIGURATION)
+class PollTest(TestCase):
+    """ Test des décomptes de votes des sondages """
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        self.users = [User.objects.create(username='voter{0}'.format(index), email='voter{0}@foobar.foo'.format(index)) for index in range(3)]
+        poll = Poll.objects.create(author=self.users[0], title="Poll", description="Poll description")
+        self.poll = Poll.objects.get(pk=poll.pk)
+
+    # Tests
+    def test_tally(self):
+        """ Vérifier les décomptes au vote, au changement de choix et à la suppression """
+        for user, choice in zip(self.users, [0, 0, 1]):
+            Vote.objects.cast(user, self.poll, choice)
+        self.assertEqual(self.poll.get_vote_counts(), {0: 2, 1: 1})
+        # Changer de choix
+        vote = Vote.objects.get(author=self.users[0], poll=self.poll)
+        vote.choice = 1
+        vote.save()
+        self.assertEqual(self.poll.get_vote_counts(), {0: 1, 1: 2})
+        # Supprimer un vote, puis des votes par lots
+        vote.delete()
+        self.assertEqual(self.poll.get_vote_counts(), {0: 1, 1: 1})
+        Vote.objects.filter(poll=self.poll).delete()
+        self.assertEqual(self.poll.get_vote_count(), 0)
+
+    def test_prune(self):
+        """ Vérifier que la purge des votes conserve les décomptes """
+        for user, choice in zip(self.users, [0, 1, 1]):
+            Vote.objects.cast(user, self.poll, choice)
+        self.poll._prune_statistics()
+        self.assertFalse(Vote.objects.filter(poll=self.poll).exists())
+        self.assertTrue(self.poll.is_pruned())
+        self.assertEqual(self.poll.get_vote_counts(), {0: 1, 1: 2})
+        self.assertFalse(Vote.objects.is_pruning(self.poll.pk))
+        # Les sondages purgés sont ignorés par la reconstruction
+        call_command('poll_tally_rebuild', polls=[self.poll.pk])
+        self.assertEqual(self.poll.get_vote_counts(), {0: 1, 1: 2})
+
+    def test_rebuild(self):
+        """ Vérifier la reconstruction des décomptes depuis les votes """
+        for user, choice in zip(self.users, [0, 1, 1]):
+            Vote.objects.cast(user, self.poll, choice)
+        PollTally.objects.filter(poll=self.poll).update(count=9)
+        call_command('poll_tally_rebuild')
+        self.assertEqual(self.poll.get_vote_counts(), {0: 1, 1: 2})
@@ -0,0 +1,21 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """ Reconstruire l'index des noms de villes """
+    args = ''
+    help = 'Rebuild the trigram and phonetic city name index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--country', '-c', action='append', dest='countries', default=[], help='ISO code of a country to reindex.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        from scoop.location.models import CitySearchName, Country
+        if options['countries']:
+            countries = Country.objects.filter(code2__in=[code.upper() for code in options['countries']])
+            count = sum(CitySearchName.objects.rebuild(country, output=True) for country in countries)
+        else:
+            count = CitySearchName.objects.rebuild(output=True)
+        print("{count} city names indexed".format(count=count))
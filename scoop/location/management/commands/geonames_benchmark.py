@@ -0,0 +1,47 @@
+# coding: utf-8
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from scoop.location.util.geonames import populate_cities, reparent_cities
+from scoop.location.util.importer import CityImporter
+
+
+class Command(BaseCommand):
+    """ Comparer l'import séquentiel et l'import parallèle des villes d'un pays """
+    args = ''
+    help = 'Compare the sequential and parallel Geonames city importers on one country, rolling back every run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--country', '-c', action='store', dest='country', default='BE', help='ISO code of the country to import.')
+        parser.add_argument('--processes', '-p', action='store', type=int, dest='processes', default=None, help='Number of parsing processes.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        from scoop.location.models import City, Country
+        country, results = Country.objects.get(code2=options['country'].upper()), []
+
+        def _sequential():
+            """ Import actuel """
+            populate_cities(country)
+            reparent_cities(country)
+
+        def _parallel():
+            """ Import parallèle """
+            CityImporter(country, processes=options['processes']).run()
+
+        with override_settings(DEBUG=False), transaction.atomic():
+            for label, method in [("Sequential", _sequential), ("Parallel", _parallel)]:
+                sid = transaction.savepoint()
+                start = perf_counter()
+                method()
+                elapsed = perf_counter() - start
+                count = City.objects.filter(country=country).count()
+                parented = City.objects.filter(country=country, parent__isnull=False).count()
+                results.append((label, elapsed, count, parented))
+                transaction.savepoint_rollback(sid)
+                country.refresh_from_db()
+            transaction.set_rollback(True)
+        for label, elapsed, count, parented in results:
+            print("{label}: {count} cities ({parented} with a parent) in {time:.3f}s".format(label=label, count=count, parented=parented, time=elapsed))
@@ -1,5 +1,6 @@
 # coding: utf-8
 from .city import City, CityName
+from .cityindex import CitySearchName, CityTrigram
 from .country import Country, CountryName
 from .currency import Currency
 from .position import Position
@@ -64,7 +64,13 @@ class CityQuerySet(models.QuerySet):
             return self.filter(ascii__iexact=name, **kwargs)
 
     def get_by_name(self, name, **kwargs):
-        """ Renvoyer la ville la plus peuplée parmi celles portant un nom """
+        """ Renvoyer la ville la plus peuplée parmi celles portant un nom, ou la plus proche de ce nom """
+        from scoop.location.models.cityindex import CitySearchName
+        if CitySearchName.objects.exists():
+            queryset = self.filter(**kwargs)
+            cities = CitySearchName.objects.fuzzy(name, limit=1, queryset=queryset if queryset.query.has_filters() else None)
+            return cities[0] if cities else None
+        # Sans index, comparer le nom à tous les noms des villes candidates
         cities = self.by_name(name, **kwargs)
         min_distance = None
         fittest_city = None
@@ -78,6 +84,23 @@ class CityQuerySet(models.QuerySet):
                         return fittest_city
         return fittest_city
 
+    def search_by_name(self, name, limit=10, fuzzy=True):
+        """
+        Renvoyer les villes correspondant à un nom, pour l'autocomplétion
+
+        Les villes dont un nom commence par le texte sont renvoyées en premier,
+        les plus peuplées d'abord, puis les villes au nom approchant.
+        :type self: django.db.models.Manager
+        :param fuzzy: compléter les résultats par une recherche approchante
+        :returns: une liste d'objets City
+        """
+        from scoop.location.models.cityindex import CitySearchName
+        queryset = self if self.query.has_filters() else None
+        cities = CitySearchName.objects.prefix(name, limit=limit, queryset=queryset)
+        if fuzzy and len(cities) < limit:
+            cities += [city for city in CitySearchName.objects.fuzzy(name, limit=limit, queryset=queryset) if city not in cities][:limit - len(cities)]
+        return cities
+
     def by_population(self, country_codes, value, operator=">="):
         """
         Renvoyer les villes correspondant à un critère sur leur population
@@ -162,11 +185,15 @@ class CityQuerySet(models.QuerySet):
         if result is not None:
             return self.get(id=result)
         # Ou retrouver la ville la plus proche
-        cities = self.filter(ascii=name, city=True).in_square(point, 64)
-        if not cities.exists():
-            cities = self.filter(alternates__ascii=name, city=True).in_square(point, 64).distinct()
+        from scoop.location.models.cityindex import CitySearchName
+        if CitySearchName.objects.exists():
+            cities = self.filter(id__in=CitySearchName.objects.exact(name or "").values('city'), city=True).in_square(point, 64)
+        else:
+            cities = self.filter(ascii=name, city=True).in_square(point, 64)
             if not cities.exists():
-                cities = self.filter(city=True).in_square(point, 8)  # recherche par lat/lon -> 8km
+                cities = self.filter(alternates__ascii=name, city=True).in_square(point, 64).distinct()
+        if not cities.exists():
+            cities = self.filter(city=True).in_square(point, 8)  # recherche par lat/lon -> 8km
         if cities.exists():
             if not quick:
                 cities = cities.annotate(distance=Distance('position', Point(point[1], point[0], srid=4326))).order_by('distance')
@@ -208,6 +235,7 @@ class City(CoordinatesModel, PicturableModel):
     timezone = models.ForeignKey('location.Timezone', null=True, db_index=False, related_name='cities', verbose_name=_("Timezone"))
     level = models.SmallIntegerField(default=0, verbose_name=_("Level"))
     parent = models.ForeignKey('self', null=True, related_name='children', verbose_name=_("Parent"))
+    updated = models.DateTimeField(auto_now=True, db_index=True, verbose_name=_("Updated"))
     objects = CityQuerySet.as_manager()
 
     # Getter
@@ -394,7 +422,11 @@ class City(CoordinatesModel, PicturableModel):
 
     def save(self, *args, **kwargs):
         """ Enregistrer l'objet dans la base de données """
+        from scoop.location.models.cityindex import CitySearchName
+        index = kwargs.pop('index', True)  # False pour les imports, qui reconstruisent l'index à la fin
         super(City, self).save(*args, **kwargs)
+        if index:
+            CitySearchName.objects.index_cities([self.pk])
 
     # Métadonnées
     class Meta:
@@ -439,8 +471,10 @@ class CityName(models.Model):
 
     def save(self, *args, **kwargs):
         """ Enregistrer l'objet dans la base de données """
+        from scoop.location.models.cityindex import CitySearchName
         self._asciize()
         super(CityName, self).save(*args, **kwargs)
+        CitySearchName.objects.index_cities([self.city_id])
 
     # Métadonnées
     class Meta:
@@ -0,0 +1,191 @@
+# coding: utf-8
+import re
+
+from django.db import models, transaction
+from django.db.models.aggregates import Count
+from django.utils.translation import ugettext_lazy as _
+from scoop.content.util.phonex import phonex
+from unidecode import unidecode
+
+# Langues de noms alternatifs qui ne sont pas des noms (codes postaux, liens)
+EXCLUDED_LANGUAGES = ['post', 'link']
+
+
+def normalize_name(name):
+    """ Renvoyer la version normalisée d'un nom : ASCII, minuscules, sans ponctuation """
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", unidecode(name or "").lower()).split())
+
+
+def get_trigrams(name):
+    """ Renvoyer les trigrammes d'un nom normalisé, avec marqueurs de début et de fin """
+    padded = "  {name} ".format(name=name)
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def get_phonex(name):
+    """ Renvoyer le code phonex d'un nom normalisé, ou None s'il ne peut pas être calculé """
+    try:
+        return phonex(name) if name else None
+    except (KeyError, IndexError):
+        return None
+
+
+class CitySearchNameManager(models.Manager):
+    """ Manager de l'index des noms de villes """
+
+    # Getter
+    def exact(self, name):
+        """ Renvoyer les entrées portant exactement un nom, une fois normalisé """
+        return self.filter(name=normalize_name(name))
+
+    def prefix(self, name, limit=10, queryset=None):
+        """
+        Renvoyer les villes dont un nom commence par un texte, les plus peuplées en premier
+
+        :param queryset: queryset de villes auquel restreindre la recherche
+        :returns: une liste d'objets City
+        """
+        entries = self.filter(name__startswith=normalize_name(name))
+        if queryset is not None:
+            entries = entries.filter(city__in=queryset.values('pk'))
+        ids = []
+        for city_id in entries.order_by('-population').values_list('city_id', flat=True)[:limit * 4]:
+            if city_id not in ids:
+                ids.append(city_id)
+        return self._get_cities(ids[:limit], {})
+
+    def fuzzy(self, name, limit=10, queryset=None):
+        """
+        Renvoyer les villes dont un nom ressemble à un texte, classées par pertinence
+
+        La pertinence est la similarité (Jaccard) des trigrammes des deux noms,
+        augmentée si les noms ont le même code phonex. La population départage
+        les villes de même pertinence.
+        :param queryset: queryset de villes auquel restreindre la recherche
+        :returns: une liste d'objets City, avec un attribut search_score
+        """
+        name = normalize_name(name)
+        if not name:
+            return []
+        trigrams, code = get_trigrams(name), get_phonex(name)
+        postings = CityTrigram.objects.filter(trigram__in=trigrams)
+        entries = self.all()
+        if queryset is not None:
+            postings = postings.filter(entry__city__in=queryset.values('pk'))
+            entries = entries.filter(city__in=queryset.values('pk'))
+        hits = dict(postings.values('entry').annotate(hits=Count('id')).order_by('-hits').values_list('entry', 'hits')[:limit * 20])
+        # Ajouter les noms identiques et les noms de même prononciation
+        ids = set(hits)
+        ids.update(entries.filter(name=name).order_by('-population').values_list('id', flat=True)[:limit * 4])
+        if code is not None:
+            ids.update(entries.filter(phonex=code).order_by('-population').values_list('id', flat=True)[:limit * 4])
+        scores = dict()
+        for entry_id, city_id, entry_name, size, entry_code, population in self.filter(id__in=ids).values_list('id', 'city', 'name', 'size', 'phonex',
+                                                                                                                'population'):
+            common = hits.get(entry_id, 0)
+            score = common / float(len(trigrams) + size - common) + (0.25 if code is not None and entry_code == code else 0.0) + (entry_name == name)
+            if city_id not in scores or scores[city_id][0] < score:
+                scores[city_id] = (score, population)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return self._get_cities([item[0] for item in ranked], {item[0]: item[1][0] for item in ranked})
+
+    # Setter
+    @transaction.atomic
+    def index_cities(self, city_ids):
+        """
+        Indexer les noms d'un ensemble de villes
+
+        :param city_ids: ids des villes à (ré)indexer
+        :returns: le nombre de noms indexés
+        """
+        from scoop.location.models.city import City, CityName
+        city_ids = list(city_ids)
+        CityTrigram.objects.filter(entry__city_id__in=city_ids).delete()
+        self.filter(city_id__in=city_ids).delete()
+        names, populations = dict(), dict()
+        for city_id, ascii, name, population, country_id in City.objects.filter(id__in=city_ids).values_list('id', 'ascii', 'name', 'population', 'country'):
+            names.setdefault(city_id, set()).update({normalize_name(ascii), normalize_name(name)})
+            populations[city_id] = (population, country_id)
+        alternates = CityName.objects.filter(city_id__in=city_ids).exclude(language__in=EXCLUDED_LANGUAGES).values_list('city_id', 'ascii')
+        for city_id, ascii in alternates.iterator():
+            names.setdefault(city_id, set()).add(normalize_name(ascii))
+        entries = [CitySearchName(city_id=city_id, name=name[0:128], size=len(get_trigrams(name[0:128])), phonex=get_phonex(name),
+                                  population=populations[city_id][0], country_id=populations[city_id][1])
+                   for city_id, items in names.items() for name in items if name and city_id in populations]
+        self.bulk_create(entries, batch_size=1000)
+        postings = [CityTrigram(entry_id=entry_id, trigram=trigram)
+                    for entry_id, name in self.filter(city_id__in=city_ids).values_list('id', 'name').iterator() for trigram in get_trigrams(name)]
+        CityTrigram.objects.bulk_create(postings, batch_size=5000)
+        return len(entries)
+
+    def rebuild(self, country=None, batch_size=2000, output=False):
+        """
+        Reconstruire l'index des noms de villes
+
+        :param country: pays à réindexer, tous si None
+        :returns: le nombre de noms indexés
+        """
+        from scoop.location.models.city import City
+        cities = City.objects.filter(country=country) if country is not None else City.objects.all()
+        ids, count = list(cities.order_by('id').values_list('id', flat=True)), 0
+        for start in range(0, len(ids), batch_size):
+            count += self.index_cities(ids[start:start + batch_size])
+            if output:
+                print("{done}/{total} cities indexed".format(done=min(start + batch_size, len(ids)), total=len(ids)))
+        return count
+
+    # Privé
+    @staticmethod
+    def _get_cities(ids, scores):
+        """ Renvoyer les villes dans l'ordre des ids """
+        from scoop.location.models.city import City
+        cities = City.objects.in_bulk(ids)
+        for city_id, score in scores.items():
+            if city_id in cities:
+                setattr(cities[city_id], 'search_score', score)
+        return [cities[city_id] for city_id in ids if city_id in cities]
+
+
+class CitySearchName(models.Model):
+    """
+    Nom normalisé de ville, pour la recherche
+
+    Contient un nom par ville et variante normalisée (nom, nom ASCII et noms
+    alternatifs), avec son code phonex et la population de la ville.
+    """
+
+    # Champs
+    city = models.ForeignKey('location.City', on_delete=models.CASCADE, related_name='search_names', verbose_name=_("City"))
+    country = models.ForeignKey('location.Country', on_delete=models.CASCADE, related_name='+', verbose_name=_("Country"))
+    name = models.CharField(max_length=128, db_index=True, verbose_name=_("Name"))
+    size = models.SmallIntegerField(default=0, verbose_name=_("Trigrams"))
+    phonex = models.FloatField(null=True, db_index=True, verbose_name=_("Phonex"))
+    population = models.IntegerField(default=0, verbose_name=_("Population"))
+    objects = CitySearchNameManager()
+
+    # Overrides
+    def __str__(self):
+        """ Renvoyer la représentation unicode de l'objet """
+        return self.name
+
+    # Métadonnées
+    class Meta:
+        verbose_name = _("city search name")
+        verbose_name_plural = _("city search names")
+        index_together = [['name', 'population']]
+        app_label = 'location'
+
+
+class CityTrigram(models.Model):
+    """ Trigramme d'un nom de ville (liste inversée) """
+
+    # Champs
+    trigram = models.CharField(max_length=3, verbose_name=_("Trigram"))
+    entry = models.ForeignKey('location.CitySearchName', on_delete=models.CASCADE, related_name='trigrams', verbose_name=_("Name"))
+
+    # Métadonnées
+    class Meta:
+        verbose_name = _("city trigram")
+        verbose_name_plural = _("city trigrams")
+        index_together = [['trigram', 'entry']]
+        app_label = 'location'
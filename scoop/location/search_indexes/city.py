@@ -14,6 +14,10 @@ class CityIndex(indexes.SearchIndex, indexes.Indexable):
         from scoop.location.models import City
         return City
 
+    def get_updated_field(self):
+        """ Renvoyer le champ de date de mise à jour, pour l'indexation incrémentale """
+        return 'updated'
+
     def index_queryset(self, using=None):
         """ Renvoyer les objets de l'index """
         return self.get_model().objects.all()
@@ -3,7 +3,9 @@ import time
 
 from celery import task
 from django.utils.translation import ugettext as _
-from scoop.location.util.geonames import populate_cities, populate_currency, rename_cities, reparent_cities
+from scoop.location.models.cityindex import CitySearchName
+from scoop.location.util.geonames import populate_currency, rename_cities
+from scoop.location.util.importer import import_cities
 
 
 @task(expires=60)
@@ -13,9 +15,8 @@ def geonames_fill(countries, rename=True):
     for country in countries:
         print("Starting population for {}".format(country.name))
         start_time = time.time()
-        if populate_cities(country) is True:
+        if import_cities(country) is True:
             renaming_allowed = True
-            reparent_cities(country)
             populate_currency(country)
             print("population was successfully run in {time:.02f} seconds.".format(time=time.time() - start_time))
         else:
@@ -23,5 +24,6 @@ def geonames_fill(countries, rename=True):
     if renaming_allowed and rename:
         start_time = time.time()
         rename_cities()
+        CitySearchName.objects.rebuild()
         print("\nrenaming was successfully done in {time:.02f} seconds.".format(time=time.time() - start_time))
     return True
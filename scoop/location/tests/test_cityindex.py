@@ -0,0 +1,38 @@
+# coding: utf-8
+from django.test import TestCase
+from scoop.location.models import City, CityName, CitySearchName, Country
+from scoop.location.models.cityindex import get_trigrams, normalize_name
+
+
+class CityIndexTest(TestCase):
+    """ Test de l'index des noms de villes """
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        self.country = Country.objects.create(id=2802361, name="Belgium", code2='BE', code3='BEL', continent='EU')
+        cities = [(2792413, "Liège", 195968), (2800866, "Brussels", 1019022), (2793508, "La Louvière", 76920), (2792414, "Liedekerke", 12500)]
+        for geoid, name, population in cities:
+            City.objects.create(id=geoid, country=self.country, name=name, ascii=normalize_name(name), population=population, city=True, type='PPL',
+                                feature='P')
+        CityName.objects.create(id=1, city_id=2800866, language='fr', name="Bruxelles")
+        CityName.objects.create(id=2, city_id=2792413, language='post', name="4000")
+
+    # Tests
+    def test_normalize(self):
+        """ Vérifier la normalisation des noms """
+        self.assertEqual(normalize_name("  La  Louvière-Centre "), "la louviere centre")
+        self.assertEqual(get_trigrams("liege"), {"  l", " li", "lie", "ieg", "ege", "ge "})
+
+    def test_lookups(self):
+        """ Vérifier les recherches exactes, par préfixe et approchantes """
+        self.assertEqual(CitySearchName.objects.filter(city_id=2800866).count(), 2, "Brussels and Bruxelles should be indexed")
+        self.assertFalse(CitySearchName.objects.filter(name="4000").exists(), "postal codes should not be indexed")
+        self.assertEqual(City.objects.get_by_name("Bruxelles").pk, 2800866)
+        self.assertEqual(City.objects.get_by_name("liege").pk, 2792413)
+        self.assertEqual(City.objects.get_by_name("Lieje").pk, 2792413, "a misspelled name should still find Liège")
+        self.assertEqual([city.pk for city in City.objects.search_by_name("lie", fuzzy=False)], [2792413, 2792414], "prefix results are ranked by population")
+        self.assertEqual(City.objects.search_by_name("brusels", limit=1)[0].pk, 2800866)
+        self.assertEqual(City.objects.filter(population__lt=100000).search_by_name("lie", fuzzy=False)[0].pk, 2792414)
+        # Réindexer après suppression d'un nom
+        CityName.objects.filter(id=1).delete()
+        self.assertEqual(CitySearchName.objects.rebuild(self.country), 4)
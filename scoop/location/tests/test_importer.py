@@ -0,0 +1,53 @@
+# coding: utf-8
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from scoop.location.models import City, Country
+from scoop.location.util.importer import CityImporter, get_acode, get_level, parse_lines
+
+
+class ImporterTest(TestCase):
+    """ Test de l'import parallèle des villes """
+
+    # Tests
+    def test_acode(self):
+        """ Vérifier que les codes administratifs sont stables """
+        self.assertEqual(get_acode(['BRU', '', '', '']), '0xoRAAAAAAAAAAAA', "acodes should not depend on the process hash seed")
+        self.assertEqual(get_acode(['WAL', 'WLG', '62', '62063']), 'upLYxjUdEtIKxp/i')
+        self.assertEqual(get_level(get_acode(['BRU', '', '', ''])), 1)
+        self.assertEqual(get_level(get_acode(['WAL', 'WLG', '62', ''])), 3)
+
+    def test_parse(self):
+        """ Vérifier le filtrage des lignes du fichier Geonames """
+        columns = ['2800866', 'Brussels', 'Brussels', '', '50.85045', '4.34878', 'P', 'PPLC', 'BE', '', 'BRU', '', '', '', '1019022', '', '28',
+                   'Europe/Brussels', '2016-03-30']
+        lines = ["\t".join(columns) + "\n", "\t".join(columns[:7] + ['MT'] + columns[8:]) + "\n", "broken line\n"]
+        rows = parse_lines(lines)
+        self.assertEqual(len(rows), 1, "only ADM and PPL features should be kept")
+        self.assertEqual(rows[0][0], 2800866)
+        self.assertEqual(rows[0][9], '0xoRAAAAAAAAAAAA')
+        self.assertEqual(rows[0][10], '2016-03-30')
+
+    def test_legacy_acodes(self):
+        """ Vérifier qu'un import réécrit les acodes anciens des villes non modifiées, et que la hiérarchie est retrouvée """
+        country = Country.objects.create(id=2802361, name="Belgium", code2='BE', code3='BEL', continent='EU', updated=timezone.now() - timedelta(days=1))
+        columns = ['', '', '', '', '50.5', '4.5', '', '', 'BE', '', 'WAL', '', '', '', '0', '', '', 'Europe/Brussels', '2016-01-01']
+
+        def _line(geoid, name, feature, kind, updated):
+            """ Renvoyer une ligne Geonames """
+            return "\t".join([str(geoid), name, name] + columns[3:6] + [feature, kind] + columns[8:18] + [updated]) + "\n"
+
+        # Villes importées par une ancienne version, avec des acodes dépendant de hash()
+        City.objects.create(id=1, country=country, name="Wallonia", ascii="wallonia", type='ADM1', feature='A', acode='legacy0000000001', level=1)
+        City.objects.create(id=2, country=country, name="Namur", ascii="namur", type='PPL', feature='P', acode='legacy0000000001', parent_id=1, level=1,
+                            city=True)
+        table = {row[0]: row for row in parse_lines([_line(1, "Wallonia", 'A', 'ADM1', '2016-01-01'), _line(2, "Namur", 'P', 'PPL', '2016-01-01'),
+                                                     _line(3, "Wavre", 'P', 'PPL', timezone.now().date().isoformat())])}
+        importer = CityImporter(country, processes=1)
+        self.assertEqual(importer.upsert(table), 3, "unchanged cities with a legacy acode should be rewritten")
+        self.assertEqual(set(City.objects.filter(country=country).values_list('acode', flat=True)), {get_acode(['WAL', '', '', ''])})
+        self.assertEqual(City.objects.get(id=2).parent_id, 1, "the upsert should keep the hierarchy")
+        importer.reparent()
+        self.assertEqual(City.objects.get(id=3).parent_id, 1, "a new city should find its existing parent")
+        self.assertEqual(importer.upsert(table), 1, "only the recently modified city should be written again")
@@ -1,5 +1,4 @@
 # coding: utf-8
-import base64
 import csv
 import datetime
 import os
@@ -24,6 +23,7 @@ from scoop.core.util.stream.directory import Paths
 from scoop.core.util.stream.fileutil import auto_open_file, open_zip_file
 from scoop.core.util.stream.urlutil import download_url_resource
 from scoop.location.models import City, CityName, Country, CountryName, Currency, Timezone
+from scoop.location.util.importer import get_acode
 from unidecode import unidecode
 
 # Codes Feature : http://www.geonames.org/export/codes.html
@@ -181,11 +181,11 @@ def populate_cities(country, output_every=8192):
                     if updateable or geoid not in db_ids:
                         # Le acode est un hash de tous les codes A1, A2, A3 et A4. AAAA est le hash de la chaîne vide (ou 0)
                         # Note : en base64, 4 caractères permettent de représenter 24 bits
-                        acode = ''.join([base64.b64encode((hash(code) & 0xffffff).to_bytes(3, 'big')).decode('ascii') for code in row[10:14]])
+                        acode = get_acode(row[10:14])
                         latitude, longitude = float(row[4]), float(row[5])
                         city = City(id=geoid, level=0, country=country, timezone=timezones[row[17]], name=row[1], ascii=row[2].lower(), acode=acode,
                                     type=row[7], feature=row[6], city=(row[6] == 'P'), population=int(row[14]), position=Point(longitude, latitude))
-                        city.save()
+                        city.save(index=False)
                         updated_count += int(updateable)
                     if idx % output_every == 0 or idx == rows - 1:
                         output_progress("Updating {country:>15}: {pc:>5.1f}% ({idx:>10}/{rows:>10}, {updated:>10} updated)", idx, rows, output_every,
@@ -196,7 +196,7 @@ def populate_cities(country, output_every=8192):
                 append = bulk.append
                 for idx, row in enumerate(table.values(), start=1):
                     latitude, longitude = float(row[4]), float(row[5])
-                    acode = ''.join([base64.b64encode((hash(code) & 0xffffff).to_bytes(3, 'big')).decode('ascii') for code in row[10:14]])
+                    acode = get_acode(row[10:14])
                     city = City(id=int(row[0]), level=0, country=country, timezone=timezones[row[17]], name=row[1], ascii=row[2], acode=acode, type=row[7],
                                 feature=row[6], city=row[6] == 'P', population=int(row[14]), position=Point(longitude, latitude, srid=4326))
                     append(city)
@@ -0,0 +1,252 @@
+# coding: utf-8
+"""
+Import parallèle des villes Geonames
+
+Le fichier d'un pays est lu en flux et découpé en tranches de lignes,
+analysées en parallèle par un pool de processus. Les villes sont ensuite
+insérées ou mises à jour par lots (INSERT … ON CONFLICT), et la hiérarchie
+est calculée en mémoire puis appliquée par des UPDATE ensemblistes.
+Nécessite PostgreSQL (PostGIS), comme le reste de l'application location.
+"""
+import base64
+import logging
+import os
+import tempfile
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import current_process
+from os.path import join
+
+from django.conf import settings
+from django.contrib.gis.db.models.aggregates import Extent
+from django.contrib.gis.geos.point import Point
+from django.db import connection, transaction
+from django.utils import timezone
+from scoop.core.util.stream.directory import Paths
+from scoop.core.util.stream.fileutil import open_zip_file
+from scoop.core.util.stream.urlutil import download_url_resource
+from scoop.location.models import City, CitySearchName, Timezone
+from unidecode import unidecode
+
+logger = logging.getLogger(__name__)
+
+# Codes Feature : http://www.geonames.org/export/codes.html
+USED_FEATURES = frozenset({'ADM', 'PPL'})
+UNUSED_FEATURES = frozenset({'PCLH', 'PCLI', 'PCLIX', 'PCLS', 'ADM1H', 'ADM2H', 'ADM3H', 'ADM4H', 'PPLCH', 'PPLF', 'PPLH', 'PPLQ', 'PPLR', 'PPLW'})
+PARENT_TYPES = frozenset({'PPLA', 'PPLA2', 'PPLA3', 'PPLA4'})
+EMPTY_CODE = 'AAAA'
+
+
+def get_acode(codes):
+    """
+    Renvoyer le code administratif (acode) d'une ville depuis ses codes A1 à A4
+
+    Chaque code est représenté par 4 caractères base64 (24 bits) d'un CRC32,
+    stable d'un processus à l'autre, contrairement à hash().
+    Un code vide est toujours représenté par AAAA.
+    """
+    return ''.join(base64.b64encode(((zlib.crc32(code.encode('utf-8')) & 0xffffff) if code else 0).to_bytes(3, 'big')).decode('ascii')
+                   for code in codes)
+
+
+def get_level(acode):
+    """ Renvoyer le niveau administratif d'un acode, soit l'index du dernier code non vide """
+    level = 1
+    for index, start in enumerate(range(0, 16, 4), start=1):
+        level = index if acode[start:start + 4] != EMPTY_CODE else level
+    return level
+
+
+def parse_lines(lines):
+    """
+    Analyser une tranche de lignes d'un fichier de villes Geonames
+
+    :returns: une liste de tuples (id, nom, ascii, latitude, longitude, feature, type, population, timezone, acode, date de modification)
+    """
+    # [0:id,1:name,2:ascii,3:altname,4:lat,5:lon,6:f,7:type,8:country,9:c1,10:a1,11:a2,12:a3,13:a4,14:population,15:elevation,16:gtopo,17:tz,18:updated]
+    rows = []
+    for line in lines:
+        row = line.rstrip('\r\n').split('\t')
+        if len(row) in {18, 19} and row[7][:3] in USED_FEATURES and row[7] not in UNUSED_FEATURES:
+            rows.append((int(row[0]), row[1], row[2], float(row[4]), float(row[5]), row[6], row[7], int(row[14] or 0), row[17], get_acode(row[10:14]),
+                         row[18] if len(row) == 19 else ''))
+    return rows
+
+
+class CityImporter(object):
+    """ Import parallèle des villes d'un pays depuis Geonames """
+
+    def __init__(self, country, processes=None, chunk_size=None, batch_size=None):
+        """
+        Initialiser l'import
+
+        :param processes: nombre de processus d'analyse, LOCATION_IMPORT_PROCESSES ou nombre de processeurs par défaut
+        :param chunk_size: nombre de lignes par tranche analysée
+        :param batch_size: nombre de villes par requête d'écriture
+        """
+        self.country = country
+        self.processes = processes or getattr(settings, 'LOCATION_IMPORT_PROCESSES', None) or os.cpu_count() or 1
+        self.chunk_size = chunk_size or getattr(settings, 'LOCATION_IMPORT_CHUNK_SIZE', 16384)
+        self.batch_size = batch_size or getattr(settings, 'BATCH_SIZE', 1000)
+
+    # Getter
+    def get_filename(self):
+        """ Renvoyer le chemin du fichier zip du pays, téléchargé si nécessaire """
+        code = self.country.code2.upper()
+        default_path = join(Paths.get_root_dir('files', 'geonames'), '{country}.zip'.format(country=code))
+        if os.path.exists(default_path):
+            return default_path
+        return download_url_resource('http://download.geonames.org/export/dump/{country}.zip'.format(country=code),
+                                     '{path}/geonames-country-{country}.zip'.format(path=tempfile.gettempdir(), country=code))
+
+    def get_chunks(self, handle):
+        """ Renvoyer les tranches de lignes d'un fichier """
+        while True:
+            lines = list(islice(handle, self.chunk_size))
+            if not lines:
+                break
+            yield lines
+
+    # Actions
+    def run(self, reparent=True):
+        """
+        Importer les villes du pays, puis recalculer la hiérarchie
+
+        :returns: le nombre de villes écrites
+        """
+        rows = self.parse()
+        with transaction.atomic():
+            written = self.upsert(rows)
+            if reparent:
+                self.reparent()
+            self.country.update(updated=timezone.now(), public=True, position=self.country.position, save=True)
+        return written
+
+    def parse(self):
+        """ Analyser le fichier du pays en parallèle et renvoyer les lignes retenues, par id """
+        handle = open_zip_file(self.get_filename(), unidecode(self.country.code2))
+        table = dict()
+        try:
+            # Les processus démons (ex. workers Celery) ne peuvent pas créer de processus enfants
+            if self.processes == 1 or current_process().daemon:
+                for rows in map(parse_lines, self.get_chunks(handle)):
+                    table.update((row[0], row) for row in rows)
+            else:
+                with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                    for rows in executor.map(parse_lines, self.get_chunks(handle)):
+                        table.update((row[0], row) for row in rows)
+        finally:
+            handle.close()
+        return table
+
+    def upsert(self, table):
+        """
+        Insérer ou mettre à jour les villes par lots, et supprimer celles absentes du fichier
+
+        Seules les villes nouvelles ou modifiées depuis la dernière mise à jour du pays sont écrites,
+        ainsi que celles dont l'acode enregistré diffère (ex. acodes calculés par une ancienne version),
+        pour que reparent() retrouve les parents par préfixe d'acode.
+        :param table: dictionnaire {id: ligne analysée}
+        :returns: le nombre de villes écrites
+        """
+        existing = dict(City.objects.filter(country=self.country).values_list('id', 'acode'))
+        removed = list(set(existing).difference(table))
+        for start in range(0, len(removed), self.batch_size):
+            City.objects.filter(id__in=removed[start:start + self.batch_size]).delete()
+        since = self.country.updated.date().isoformat() if existing and self.country.updated else None
+        rows = [row for row in table.values() if row[0] not in existing or since is None or row[10] >= since or existing[row[0]] != row[9]]
+        timezones = {name: item.id for name, item in Timezone.get_dict().items()}
+        now = timezone.now()
+        values = [(row[0], row[5] == 'P' and row[6] != 'PPLX', row[6], row[5], row[4], row[3], row[9], self.country.id, row[1], row[2].lower(), '', row[7],
+                   timezones.get(row[8]), 0, None, False, now) for row in rows]
+        with connection.cursor() as cursor:
+            for start in range(0, len(values), self.batch_size):
+                cursor.executemany(self._get_upsert_sql(), values[start:start + self.batch_size])
+        return len(values)
+
+    def reparent(self, clear=False):
+        """
+        Recalculer la hiérarchie des villes du pays
+
+        Le parent de chaque ville est calculé en mémoire, puis appliqué
+        par lots via UPDATE … FROM (VALUES …).
+        :param clear: recalculer aussi le parent des villes qui en ont déjà un
+        """
+        if clear:
+            City.objects.filter(country=self.country).update(parent=None)
+        cities = list(City.objects.filter(country=self.country).values_list('id', 'acode', 'feature', 'type', 'parent_id'))
+        locked = {city[0] for city in cities if city[4] is not None}
+        by_acode, by_prefix = defaultdict(list), defaultdict(list)
+        for city in cities:
+            by_acode[city[1]].append(city)
+            if city[2] == 'A':
+                for level in range(1, 4):
+                    by_prefix[(level, city[1][0:level * 4])].append(city)
+        parents = sorted((city for city in cities if city[2] == 'A' or city[3] in PARENT_TYPES), key=lambda item: (item[3], item[0]))
+        assigned = dict()
+        for parent in parents:
+            pid, acode, feature, kind = parent[0:4]
+            level = get_level(acode)
+            # Les P et ADMD enfants
+            for child in by_acode[acode]:
+                if child[0] != pid and child[0] not in assigned and child[0] not in locked and (child[2] == 'P' or (child[3] == 'ADMD' and kind != 'ADMD')):
+                    assigned[child[0]] = (pid, level)
+            # Les A enfants
+            if level < 4 and feature == 'A' and kind != 'ADMD':
+                suffix = EMPTY_CODE * (3 - level)
+                for child in by_prefix[(level, acode[0:level * 4])]:
+                    if child[0] != pid and child[0] not in assigned and child[0] not in locked and child[1].endswith(suffix):
+                        assigned[child[0]] = (pid, level)
+        items = [(cid, pid, level) for cid, (pid, level) in assigned.items()]
+        with connection.cursor() as cursor:
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                cursor.execute(self._get_reparent_sql(len(batch)), [value for item in batch for value in item])
+        # Calculer la latitude et longitude moyennes du pays
+        extent = City.objects.filter(country=self.country, city=True).aggregate(bounds=Extent('position'))
+        if extent['bounds']:
+            self.country.position = Point((extent['bounds'][0] + extent['bounds'][2]) / 2, (extent['bounds'][1] + extent['bounds'][3]) / 2)
+        return len(items)
+
+    # Privé
+    @staticmethod
+    def _get_upsert_sql():
+        """ Renvoyer la requête d'insertion ou de mise à jour d'une ville """
+        quote, table = connection.ops.quote_name, connection.ops.quote_name(City._meta.db_table)
+        columns = [quote(City._meta.get_field(name).column) for name in ['id', 'city', 'type', 'feature']]
+        position = quote(City._meta.get_field('position').column)
+        others = [quote(City._meta.get_field(name).column) for name in ['acode', 'country', 'name', 'ascii', 'code', 'population', 'timezone', 'level',
+                                                                         'parent', 'pictured', 'updated']]
+        # La hiérarchie des villes existantes n'est modifiée que par reparent()
+        kept = {quote(City._meta.get_field(name).column) for name in ['code', 'pictured', 'level', 'parent']}
+        updated = [column for column in columns[1:] + [position] + others if column not in kept]
+        return "INSERT INTO {table} ({columns}) VALUES ({placeholders}, ST_SetSRID(ST_MakePoint(%s, %s), {srid}), {others}) " \
+               "ON CONFLICT ({pk}) DO UPDATE SET {updates}".format(
+                   table=table, columns=", ".join(columns + [position] + others), placeholders=", ".join(["%s"] * len(columns)),
+                   srid=City.SRID, others=", ".join(["%s"] * len(others)), pk=columns[0],
+                   updates=", ".join("{0} = EXCLUDED.{0}".format(column) for column in updated))
+
+    @staticmethod
+    def _get_reparent_sql(count):
+        """ Renvoyer la requête de mise à jour du parent et du niveau de plusieurs villes """
+        quote, table = connection.ops.quote_name, connection.ops.quote_name(City._meta.db_table)
+        pk, parent, level = [quote(City._meta.get_field(name).column) for name in ['id', 'parent', 'level']]
+        return "UPDATE {table} SET {parent} = v.parent, {level} = v.level FROM (VALUES {values}) AS v(id, parent, level) WHERE {table}.{pk} = v.id".format(
+            table=table, parent=parent, level=level, pk=pk, values=", ".join(["(%s, %s, %s)"] * count))
+
+
+def import_cities(country, reparent=True):
+    """
+    Importer les villes d'un pays, avec le moteur d'import parallèle
+
+    :returns: True si l'import a réussi
+    """
+    try:
+        CityImporter(country).run(reparent=reparent)
+        CitySearchName.objects.rebuild(country)
+        return True
+    except Exception as e:
+        logger.exception("Could not import cities for {country}: {error}".format(country=country, error=e))
+        return False
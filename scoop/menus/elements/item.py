@@ -11,6 +11,7 @@ class Item(object):
     target = None  # URL cible (fonction prenant un argument request ou chaîne)
     children = None
     is_child = False  # Renseigné lorsque le menu est ajouté à un autre
+    dynamic = False  # Le libellé change à chaque requête (compteurs etc.) et n'est pas mis en cache
 
     # Initialiseur
     def __init__(self, *args, **kwargs):
@@ -60,8 +61,9 @@ class Item(object):
 
     def get_tree(self, request=None):
         """ Renvoyer tous les descendants de l'objet """
-        tree = self.children or []
+        tree = []
         for child in self.get_children(request):
+            tree.append(child)
             tree += child.get_tree(request)
         return tree
 
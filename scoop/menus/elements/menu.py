@@ -1,5 +1,12 @@
 # coding: utf-8
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
 from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from scoop.core.util.stream.request import RequestMixin
 
 from .item import Item
 
@@ -9,11 +16,24 @@ class Menu(object):
     Menu complet (racine contenant les Items)
 
     Un menu n'a pas de libellé, ce n'est qu'un conteneur
+    Lorsque le menu est statique (cacheable), son arbre est compilé une seule fois
+    en une liste à plat, et son rendu est mis en cache par classe d'accès,
+    langue et état (visible, actif) des éléments. Seuls les libellés
+    des éléments dynamiques (compteurs) sont rendus à chaque requête.
+    Un menu dont un élément a une cible appelable (URL calculée depuis la
+    requête, ex. propre à l'utilisateur) est toujours rendu entièrement.
     """
 
     name = "Menu container"
     children = None
     style = 'nav'
+    cacheable = True  # False si get_children renvoie des éléments différents selon la requête. Ignoré si un élément a une cible appelable
+    items = None  # Arbre compilé
+    fingerprint = None
+
+    # Constantes
+    CACHE_KEY = 'menus.render.{fingerprint}.{style}.{language}.{access}.{states}'
+    DYNAMIC_TOKEN = '<!--menu-dynamic-{index}-->'
 
     # Initialiser
     def __init__(self, *args, **kwargs):
@@ -41,6 +61,7 @@ class Menu(object):
         for item in items:
             if isinstance(item, Item):
                 self.children.append(item)
+        self.items = None
 
     # Getter
     def get_children(self, request=None):
@@ -54,9 +75,71 @@ class Menu(object):
         """
         return self.children or tuple()
 
+    def get_items(self, request=None):
+        """ Renvoyer la liste à plat des éléments du menu, compilée une seule fois si le menu est statique """
+        if not self.cacheable:
+            return self._flatten(request)
+        if self.items is None:
+            self.items = self._flatten()
+            signature = "|".join("{0}.{1}:{2}".format(type(item).__module__, type(item).__qualname__, item.identifier) for item in self.items)
+            self.fingerprint = md5("{0}|{1}".format(self.name, signature).encode('utf-8')).hexdigest()
+        return self.items
+
+    def is_cacheable(self, request=None):
+        """ Renvoyer si le rendu du menu peut être mis en cache : aucune URL d'élément ne dépend de la requête """
+        return self.cacheable and not any(callable(item.target) for item in self.get_items(request))
+
+    def get_cache_key(self, request):
+        """ Renvoyer la clé de cache du rendu du menu pour une requête """
+        states = "".join("{0:d}{1:d}".format(*self._get_state(item, request)) for item in self.get_items(request))
+        access = request.get_access_class() if hasattr(request, 'get_access_class') else RequestMixin.ANONYMOUS
+        return Menu.CACHE_KEY.format(fingerprint=self.fingerprint, style=self.style, language=get_language(), access=access,
+                                     states=md5(states.encode('ascii')).hexdigest())
+
     # Rendu
     def render(self, request, style=None):
-        """ Rendre le menu """
+        """ Rendre le menu, depuis le cache si possible """
+        if request is None or not self.is_cacheable(request):
+            return self.render_full(request, style)
+        items = self.get_items(request)
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            request.menu_placeholders = dict()
+            try:
+                output = self.render_full(request, style)
+            finally:
+                placeholders = request.__dict__.pop('menu_placeholders')
+            # Remplacer les marqueurs propres au processus par l'index des éléments dans l'arbre compilé
+            dynamic = []
+            for token, item in placeholders.items():
+                index = items.index(item)
+                output = output.replace(token, Menu.DYNAMIC_TOKEN.format(index=index))
+                dynamic.append(index)
+            cached = (output, dynamic)
+            cache.set(key, cached, getattr(settings, 'MENUS_CACHE_DURATION', 3600))
+        output, dynamic = cached
+        for index in dynamic:
+            output = output.replace(Menu.DYNAMIC_TOKEN.format(index=index), str(items[index].get_label(request)))
+        return mark_safe(output)
+
+    def render_full(self, request, style=None):
+        """ Rendre le menu et tous ses éléments via les templates """
         outputs = [child.render(request, style=self.style) for child in self.get_children(request)]
         data = {'children': outputs, 'menu': self}
         return render_to_string('menus/menu-menu-{style}.html'.format(style=self.style or 'nav'), data, request)
+
+    # Privé
+    def _flatten(self, request=None):
+        """ Renvoyer tous les éléments du menu, en profondeur """
+        items = []
+        for child in self.get_children(request):
+            items.append(child)
+            items += child.get_tree(request)
+        return items
+
+    @staticmethod
+    def _get_state(item, request):
+        """ Renvoyer si un élément est visible et actif pour une requête """
+        visible = bool(item.is_visible(request))
+        return visible, visible and bool(item.is_active(request))
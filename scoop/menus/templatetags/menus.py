@@ -1,6 +1,7 @@
 # coding: utf-8
 
 from django import template
+from django.utils.safestring import mark_safe
 
 from scoop.menus.util import get_menu
 
@@ -24,5 +25,15 @@ def render_menu(context, alias='nav', style=None):
 
 @register.filter(name='menu_label')
 def menu_label(item, request):
-    """ Renvoyer l'étiquette d'un élément de menu """
+    """
+    Renvoyer l'étiquette d'un élément de menu
+
+    Pendant la mise en cache d'un menu, les libellés dynamiques
+    sont remplacés par un marqueur, complété à chaque requête.
+    """
+    placeholders = getattr(request, 'menu_placeholders', None)
+    if placeholders is not None and item.dynamic:
+        token = '<!--menu-label-{id}-->'.format(id=id(item))
+        placeholders[token] = item
+        return mark_safe(token)
     return item.get_label(request)
@@ -1,8 +1,11 @@
 # coding: utf-8
 
 from django.test import TestCase
+from django.test.utils import override_settings
 
+from scoop.core.util.stream.request import default_request
 from scoop.menus.elements.item import Item
+from scoop.menus.elements.menu import Menu
 
 
 class MenuTest(TestCase):
@@ -21,3 +24,38 @@ class MenuTest(TestCase):
         self.assertEqual(menu.get_absolute_url(), "/")
         self.assertEqual(menu.get_html_id(), 'menu-id-home')
         self.assertEqual(menu.get_label(), "Home")
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_menu_cache(self):
+        """ Tester la mise en cache du rendu d'un menu et la mise à jour des libellés dynamiques """
+        counter = {'value': 1}
+
+        class CounterItem(Item):
+            """ Élément avec un compteur """
+            dynamic = True
+
+            def get_label(self, request=None):
+                return "Inbox ({count})".format(count=counter['value'])
+
+        menu = Menu(Item(label="Home", identifier="home", target="/"), CounterItem(identifier="inbox", target="/inbox/"))
+        request = default_request()
+        output = menu.render(request)
+        self.assertIn("Home", output)
+        self.assertIn("Inbox (1)", output)
+        # Le rendu statique vient du cache, seul le compteur est rendu
+        counter['value'] = 5
+        with self.assertTemplateNotUsed('menus/menu-item-nav.html'):
+            output = menu.render(request)
+        self.assertIn("Inbox (5)", output)
+        self.assertEqual(output, menu.render_full(request))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_menu_callable_target(self):
+        """ Tester qu'un menu dont une URL dépend de la requête n'est pas servi depuis le cache """
+        target = {'value': '/first/'}
+        menu = Menu(Item(label="Profile", identifier="profile", target=lambda request: target['value']))
+        request = default_request()
+        self.assertFalse(menu.is_cacheable(request))
+        self.assertIn("/first/", menu.render(request))
+        target['value'] = '/second/'
+        self.assertIn("/second/", menu.render(request))
@@ -13,6 +13,7 @@ class MessagingInbox(Item):
     # Configuration
     label = _("Inbox")
     target = reverse_lazy('messaging:inbox')
+    dynamic = True
 
     # Overrides
     def is_visible(self, request):
@@ -0,0 +1,53 @@
+# coding: utf-8
+from time import perf_counter
+
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from scoop.messaging.util.dispatch import MailDispatcher
+
+
+class Command(BaseCommand):
+    """ Mesurer le débit d'expédition de la file de mails """
+    args = ''
+    help = 'Measure mail queue dispatch throughput with the locmem backend or a local SMTP server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', '-c', action='store', type=int, dest='count', default=500, help='Number of mails to send.')
+        parser.add_argument('--workers', '-w', action='store', type=int, dest='workers', default=4, help='Number of rendering threads.')
+        parser.add_argument('--smtp', '-s', action='store', dest='smtp', default=None,
+                            help='host:port of a local SMTP server, eg. python -m smtpd -n -c DebuggingServer localhost:1025')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        from scoop.messaging.models import MailEvent, MailType
+        from scoop.user.models import User
+        count = options['count']
+        if options['smtp']:
+            host, port = options['smtp'].split(':')
+            backend = {'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend', 'EMAIL_HOST': host, 'EMAIL_PORT': int(port),
+                       'EMAIL_USE_TLS': False, 'EMAIL_HOST_USER': '', 'EMAIL_HOST_PASSWORD': ''}
+        else:
+            backend = {'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend'}
+        mail_type = MailType.objects.get_named('test.mail.base')
+        results = []
+        with override_settings(**backend), transaction.atomic():
+            # Créer les destinataires sans déclencher les signaux de création d'utilisateurs
+            User.objects.bulk_create([User(username='mailbench{0}'.format(index), email='{0}@mailbench.invalid'.format(index)) for index in range(count)])
+            recipients = list(User.objects.filter(username__startswith='mailbench'))
+            for label, workers, per_connection in [("Sequential, one connection per mail", 1, 1), ("Pooled, reused connections", options['workers'], None)]:
+                sid = transaction.savepoint()
+                events = [MailEvent(type=mail_type, recipient=user, sent_email=user.email, forced=True, minimum_time=timezone.now()) for user in recipients]
+                for event in events:
+                    event.set_data('items', [10, 15, 20])
+                MailEvent.objects.bulk_create(events)
+                mail.outbox = []
+                start = perf_counter()
+                sent = MailDispatcher(MailEvent.objects.all(), forced=True, ceiling=count, workers=workers, per_connection=per_connection).run()
+                results.append((label, sent, perf_counter() - start))
+                transaction.savepoint_rollback(sid)
+            transaction.set_rollback(True)
+        for label, sent, elapsed in results:
+            print("{label}: {sent} mails in {time:.3f}s, {rate:.0f} mails/s".format(label=label, sent=sent, time=elapsed, rate=sent / elapsed))
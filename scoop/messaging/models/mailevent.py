@@ -3,8 +3,7 @@ import datetime
 from smtplib import SMTPException, SMTPResponseException
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
-from django.db import models, transaction
+from django.db import models
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.translation import pgettext_lazy
@@ -18,8 +17,7 @@ from scoop.core.util.data.typeutil import make_iterable
 from scoop.core.util.django.templates import render_block_to_string
 from scoop.core.util.model.model import SingleDeleteQuerySet
 from scoop.core.util.shortcuts import addattr
-from scoop.core.util.stream.request import default_request
-from scoop.messaging.util.mail import EmailMultiRelated
+from scoop.messaging.util.dispatch import MailDispatcher, make_message
 
 
 class MailEventQuerySet(SingleDeleteQuerySet):
@@ -65,9 +63,7 @@ class MailEventQuerySet(SingleDeleteQuerySet):
     # Setter
     def _send_mail(self, sender, to, title, text, html=None):
         """ Envoyer immédiatement un courrier """
-        message = EmailMultiRelated(title, text, sender, make_iterable(to))
-        if html is not None:
-            message.attach_alternative(html, "text/html")
+        message = make_message(sender, to, title, text, html)
         try:
             message.send()
             return True
@@ -102,11 +98,11 @@ class MailEventQuerySet(SingleDeleteQuerySet):
             mail.minimum_time = timezone.now() + datetime.timedelta(minutes=mail.type.interval)
         mail.save()
 
-    @transaction.atomic
     def process(self, forced=False, bypass_delay=False):
         """
         Traiter la file d'attente et expédier des mails
 
+        Voir scoop.messaging.util.dispatch.MailDispatcher
         :param bypass_delay: envoyer les mails même si l'utilisateur a défini des limites empêchant d'envoyer maintenant
         :param forced: True, False ou 'all', définit le type d'emails à envoyer.
         :returns: le nombre d'emails effectivement envoyés
@@ -114,51 +110,11 @@ class MailEventQuerySet(SingleDeleteQuerySet):
         if forced == 'all':
             return self.process(forced=False, bypass_delay=bypass_delay) + self.process(forced=True, bypass_delay=bypass_delay)
         # Pas besoin de process si aucun mail à expédier
-        if not self.filter(sent=False, discarded=False).exists():
+        if not self.unsent().exists():
             return 0
-        # Adresse du sender (selon template+settings)
-        sender = render_to_string('messaging/mail/layout/sender.txt', {'settings': settings}, default_request())
         # Supprimer les mails sans utilisateur et non importants
         self.orphans().delete()
-        # Récupérer la liste des membres à qui envoyer un mail
-        email_addresses = self.filter(sent=False, discarded=False).values_list('sent_email', flat=True).distinct()
-        # Total de mails envoyés à calculer
-        mail_counter = 0
-        mail_ceiling = getattr(settings, 'MESSAGING_MAX_BATCH', 30)
-        if len(email_addresses) > mail_ceiling * 8:
-            mail_ceiling = len(email_addresses) / 2
-        # Traiter un groupe de mails pour chacun des utilisateurs
-        mails_to_send = []
-        for email in email_addresses:
-            # Ne traiter que si la configuration de l'utilisateur autorise
-            try:
-                user = get_user_model().objects.get(email=email)
-            except get_user_model().DoesNotExist:
-                user = None
-            if (user is None or user.can_send_mail() or bypass_delay or forced) and mail_counter < mail_ceiling:
-                # Traiter les mails non marqués comme *forcés*
-                mails = self.filter(sent_email=email, forced=forced, sent=False, discarded=False)
-                # Envoyer chaque mail si son heure minimum d'envoi est atteinte
-                for mail in mails:
-                    if mail.can_send() or bypass_delay:
-                        parts = mail.render()
-                        mails_to_send.append([sender, email, one_line(parts['title']), parts['text'], parts['html']])
-                        mail.sent = True
-                        mail.sent_time = timezone.now()
-                        mail.save()
-                        mail_counter += 1
-                if user:
-                    user.reset_next_mail()
-                # Et supprimer l'utilisateur de la file
-                mails.update(sent=True)
-        # L'envoi de mail peut durer longtemps. (timeout, NXDomain, etc.)
-        # Si le serveur SQL timeoute avant le timeout DNS, il
-        # sera impossible de mettre à jour la base de données. (server gone)
-        # Ici, on envoie donc les mails après avoir mis à jour la base.
-        for mail in mails_to_send:
-            if self._send_mail(*mail) is False:
-                mail_counter -= 1
-        return mail_counter
+        return MailDispatcher(self, forced=forced, bypass_delay=bypass_delay).run()
 
 
 class MailEvent(UUID128Model, DataModel):
@@ -140,6 +140,7 @@ class Message(IPPointableModel, DatetimeModel, PicturableModel, DataModel, Class
     text = models.TextField(blank=False, verbose_name=_("Text"))
     spam = models.FloatField(default=0.0, validators=[MaxValueValidator(1.0), MinValueValidator(0.0)], verbose_name=_("Spam level"))
     deleted = models.BooleanField(default=False, db_index=True, verbose_name=pgettext_lazy('message', "Deleted"))
+    updated = models.DateTimeField(auto_now=True, db_index=True, verbose_name=pgettext_lazy('message', "Updated"))
     objects = MessageManager()
 
     # Getter
@@ -22,6 +22,7 @@ from scoop.core.abstract.core.uuid import UUID64Model
 from scoop.core.util.data.dateutil import to_timestamp
 from scoop.core.util.data.typeutil import make_iterable
 from scoop.core.util.django.templates import render_block_to_string
+from scoop.core.util.model.deletion import delete_in_chunks
 from scoop.core.util.model.model import SingleDeleteQuerySet
 from scoop.core.util.shortcuts import addattr
 from scoop.core.util.stream.request import default_request
@@ -200,10 +201,7 @@ class ThreadQuerySet(SingleDeleteQuerySet):
         threads = self.filter(updated__lt=limit)
         if deleted:
             threads = threads.filter(Q(deleted=True) | Q(closed=True))
-        count = threads.count()
-        for thread in threads:
-            thread.delete(clear=clear)
-        return count
+        return delete_in_chunks(threads, clear=clear)
 
     # Actions
     def new(self, author, recipients, subject, body, request=None, closed=False, unique=None, as_mail=True, force=False, expiry=None):
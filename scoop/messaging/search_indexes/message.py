@@ -14,6 +14,10 @@ class MessageIndex(indexes.SearchIndex, indexes.Indexable):
         from scoop.messaging.models.message import Message
         return Message
 
+    def get_updated_field(self):
+        """ Renvoyer le champ de date de mise à jour, pour l'indexation incrémentale """
+        return 'updated'
+
     def index_queryset(self, using=None):
         """ Renvoyer les éléments de l'index """
         return self.get_model().objects.filter(deleted=False)
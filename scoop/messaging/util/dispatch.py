@@ -0,0 +1,172 @@
+# coding: utf-8
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from smtplib import SMTPException
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import get_connection
+from django.db import connection as db_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+from scoop.core.util.data.textutil import one_line
+from scoop.core.util.data.typeutil import make_iterable
+from scoop.core.util.stream.request import default_request
+from scoop.messaging.util.mail import EmailMultiRelated
+
+logger = logging.getLogger(__name__)
+
+
+def make_message(sender, to, title, text, html=None, connection=None):
+    """ Renvoyer un courrier prêt à être expédié """
+    message = EmailMultiRelated(title, text, sender, make_iterable(to), connection=connection)
+    if html is not None:
+        message.attach_alternative(html, "text/html")
+    return message
+
+
+class MailDispatcher(object):
+    """
+    Expédition par lots des événements mail
+
+    Les adresses en attente sont traitées par groupes :
+    - les utilisateurs du groupe sont récupérés en une requête
+    - les événements du groupe sont réservés (verrouillés puis marqués envoyés) en deux requêtes
+    - les événements réservés sont rendus en parallèle dans un pool de threads
+    - les courriers sont expédiés en réutilisant la même connexion SMTP
+    La base est mise à jour avant l'envoi : l'envoi peut durer longtemps (timeout, NXDomain etc.)
+    et la connexion SQL pourrait expirer avant la fin.
+    """
+
+    def __init__(self, queryset, forced=False, bypass_delay=False, ceiling=None, batch=None, workers=None, per_connection=None):
+        """
+        Initialiser l'expédition
+
+        :param queryset: queryset des événements mail à traiter
+        :param forced: traiter les événements forcés ou non forcés
+        :param bypass_delay: envoyer les mails même si l'utilisateur a défini des limites empêchant d'envoyer maintenant
+        :param ceiling: nombre maximum de mails à envoyer
+        :param batch: nombre d'adresses traitées par lot
+        :param workers: nombre de threads de rendu des mails
+        :param per_connection: nombre maximum de mails envoyés par connexion SMTP
+        """
+        self.queryset = queryset
+        self.forced, self.bypass_delay = forced, bypass_delay
+        self.ceiling = ceiling or getattr(settings, 'MESSAGING_MAX_BATCH', 30)
+        self.batch = batch or getattr(settings, 'MESSAGING_DISPATCH_BATCH', 50)
+        self.workers = workers or getattr(settings, 'MESSAGING_DISPATCH_WORKERS', 4)
+        self.per_connection = per_connection or getattr(settings, 'MESSAGING_CONNECTION_MAILS', 100)
+        self.sender = None
+        self.counter = 0
+
+    # Actions
+    def run(self):
+        """
+        Traiter la file d'attente et expédier des mails
+
+        :returns: le nombre d'emails effectivement envoyés
+        """
+        email_addresses = list(self.queryset.unsent().filter(forced=self.forced).values_list('sent_email', flat=True).distinct())
+        if not email_addresses:
+            return 0
+        # Adresse du sender (selon template+settings)
+        self.sender = render_to_string('messaging/mail/layout/sender.txt', {'settings': settings}, default_request())
+        if len(email_addresses) > self.ceiling * 8:
+            self.ceiling = len(email_addresses) // 2
+        for offset in range(0, len(email_addresses), self.batch):
+            if self.counter >= self.ceiling:
+                break
+            event_ids = self.claim(email_addresses[offset:offset + self.batch])
+            if event_ids:
+                self.counter += self.deliver(self.render(event_ids))
+        return self.counter
+
+    def claim(self, email_addresses):
+        """
+        Réserver les événements en attente d'un groupe d'adresses
+
+        :returns: la liste des ID d'événements à expédier
+        """
+        users = {user.email: user for user in get_user_model().objects.filter(email__in=email_addresses)}
+        allowed = [email for email in email_addresses if email not in users or users[email].can_send_mail() or self.bypass_delay or self.forced]
+        if not allowed:
+            return []
+        now, counter = timezone.now(), self.counter
+        selected, sendable, others = [], [], []
+        with transaction.atomic():
+            rows = self.queryset.unsent().filter(sent_email__in=allowed, forced=self.forced).order_by('queued').select_for_update()
+            events = dict()
+            for event_id, email, minimum_time in rows.values_list('id', 'sent_email', 'minimum_time'):
+                events.setdefault(email, []).append((event_id, minimum_time))
+            for email in allowed:
+                if counter >= self.ceiling:
+                    break
+                selected.append(email)
+                for event_id, minimum_time in events.get(email, []):
+                    if minimum_time <= now or self.forced or self.bypass_delay:
+                        sendable.append(event_id)
+                        counter += 1
+                    else:
+                        others.append(event_id)
+            # Marquer en bloc les événements comme envoyés, et retirer les adresses de la file
+            self.queryset.model.objects.filter(id__in=sendable).update(sent=True, sent_time=now)
+            self.queryset.model.objects.filter(id__in=others).update(sent=True)
+        for email in selected:
+            if email in users:
+                users[email].reset_next_mail()
+        return sendable
+
+    def render(self, event_ids):
+        """ Renvoyer les courriers des événements, rendus en parallèle """
+        events = list(self.queryset.model.objects.filter(id__in=event_ids).select_related('type', 'recipient').order_by('queued'))
+        if self.workers > 1 and len(events) > 1:
+            language = translation.get_language()
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(events))) as executor:
+                messages = list(executor.map(lambda event: self._render_threaded(event, language), events))
+        else:
+            messages = [self._render(event) for event in events]
+        return [message for message in messages if message is not None]
+
+    def deliver(self, messages):
+        """
+        Expédier des courriers en réutilisant les connexions SMTP
+
+        :returns: le nombre de courriers expédiés
+        """
+        sent = 0
+        for offset in range(0, len(messages), self.per_connection):
+            connection = get_connection()
+            try:
+                connection.open()
+                for message in messages[offset:offset + self.per_connection]:
+                    try:
+                        sent += connection.send_messages([message]) or 0
+                    except (SMTPException, OSError) as e:
+                        logger.warning("Could not send mail to {to}: {error}".format(to=', '.join(message.to), error=e))
+                        # Rouvrir la connexion si le serveur l'a fermée
+                        connection.close()
+                        connection.open()
+            except (SMTPException, OSError) as e:
+                logger.warning("Could not connect to mail server: {error}".format(error=e))
+            finally:
+                connection.close()
+        return sent
+
+    # Privé
+    def _render(self, event):
+        """ Renvoyer le courrier d'un événement, ou None en cas d'erreur """
+        try:
+            parts = event.render()
+            return make_message(self.sender, event.sent_email, one_line(parts['title']), parts['text'], parts['html'])
+        except Exception as e:
+            logger.exception("Could not render mail event {uuid}: {error}".format(uuid=event.uuid, error=e))
+            return None
+
+    def _render_threaded(self, event, language):
+        """ Rendre un événement dans un thread du pool, avec la langue du thread appelant """
+        try:
+            with translation.override(language):
+                return self._render(event)
+        finally:
+            db_connection.close()
@@ -2,4 +2,6 @@
 from .blocklist import blocklist_enlisted
 from .flag import flag_creation
 from .forms import check_form_email
+from .ipblock import country_safety_changed, ipblock_changed
+from .profanity import profanity_changed
 from .user import login_actions, online_status_check, user_ip_is_blocked, userip_creation
@@ -0,0 +1,18 @@
+# coding: utf-8
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+from scoop.location.models import Country
+from scoop.rogue.models.ipblock import IPBlock
+from scoop.rogue.util.ipmatcher import invalidate_ip_matcher
+
+
+@receiver([post_save, post_delete], sender=Country)
+def country_safety_changed(sender, instance, **kwargs):
+    """ Invalider les blocages d'IP compilés lorsqu'un pays est modifié """
+    invalidate_ip_matcher()
+
+
+@receiver([post_save, post_delete], sender=IPBlock)
+def ipblock_changed(sender, instance, **kwargs):
+    """ Invalider les blocages d'IP compilés lorsqu'un filtre est modifié ou supprimé, y compris par lots """
+    invalidate_ip_matcher()
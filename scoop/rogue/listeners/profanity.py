@@ -0,0 +1,11 @@
+# coding: utf-8
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+from scoop.rogue.models.profanity import Profanity
+from scoop.rogue.util.profanity import invalidate_profanity_matcher
+
+
+@receiver([post_save, post_delete], sender=Profanity)
+def profanity_changed(sender, instance, **kwargs):
+    """ Invalider les filtres de grossièretés compilés lorsqu'un filtre est modifié ou supprimé, y compris par lots """
+    invalidate_profanity_matcher()
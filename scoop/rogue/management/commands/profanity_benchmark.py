@@ -0,0 +1,45 @@
+# coding: utf-8
+import random
+import re
+import string
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from scoop.rogue.templatetags.profanity_tags import ProfanitiesFilter
+from scoop.rogue.util.profanity import ProfanityMatcher
+
+
+class Command(BaseCommand):
+    """ Comparer le filtre de grossièretés compilé au filtre par expressions concaténées """
+    args = ''
+    help = 'Benchmark the compiled profanity matcher against concatenated regexes over a large word list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', '-w', action='store', type=int, dest='words', default=5000, help='Number of profanity words.')
+        parser.add_argument('--length', '-l', action='store', type=int, dest='length', default=20000, help='Number of words in the text.')
+        parser.add_argument('--rounds', '-r', action='store', type=int, dest='rounds', default=5, help='Number of messages to filter.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        words = {''.join(random.choice(string.ascii_lowercase) for _ in range(random.randint(4, 10))) for _ in range(options['words'])}
+        words = sorted(words)
+        vocabulary = words + ['lorem', 'ipsum', 'dolor', 'sit', 'amet'] * (len(words) // 5)
+        text = ' '.join(random.choice(vocabulary) for _ in range(options['length']))
+        # Ancien fonctionnement : expression reconstruite et recompilée à chaque appel
+        start = perf_counter()
+        for _ in range(options['rounds']):
+            re.purge()
+            legacy = ProfanitiesFilter(words, complete=False, inside_words=False).clean(text)
+        concatenated = perf_counter() - start
+        # Filtre compilé une fois pour le processus
+        start = perf_counter()
+        matcher = ProfanityMatcher([(index, word, True) for index, word in enumerate(words)])
+        compilation = perf_counter() - start
+        start = perf_counter()
+        for _ in range(options['rounds']):
+            compiled = matcher.clean(text)
+        matching = perf_counter() - start
+        print("{words} words, {rounds} messages of {length} words".format(words=len(words), **options))
+        print("Concatenated regexes: {time:.3f}s".format(time=concatenated))
+        print("Compiled matcher: {time:.3f}s (+{compilation:.3f}s compilation once)".format(time=matching, compilation=compilation))
+        print("Identical output: {same}".format(same=legacy == compiled))
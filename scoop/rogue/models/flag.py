@@ -133,7 +133,7 @@ class Flag(DatetimeModel):
     admin = models.CharField(max_length=128, blank=True, verbose_name=_("Administration notes"))
     automatic = models.BooleanField(default=False, db_index=True, editable=False, verbose_name=pgettext_lazy('flag', "Automatic"))
     action_done = models.BooleanField(default=False, db_index=True, verbose_name=_("Action done"))
-    updated = models.DateTimeField(default=timezone.now, null=True, verbose_name=pgettext_lazy('flag', "Updated"))
+    updated = models.DateTimeField(default=timezone.now, null=True, db_index=True, verbose_name=pgettext_lazy('flag', "Updated"))
     limit = limit_to_model_names('user.user', 'content.content', 'content.picture')  # limite des modèles concernés
     content_type = models.ForeignKey('contenttypes.ContentType', null=True, blank=True, limit_choices_to=limit, verbose_name=_("Content type"))
     object_id = models.PositiveIntegerField(null=True, blank=True, db_index=True, verbose_name=_("Object Id"))
@@ -249,6 +249,7 @@ class Flag(DatetimeModel):
     # Overrides
     def save(self, *args, **kwargs):
         """ Enregistrer l'objet dans la base de données """
+        self.updated = timezone.now()
         # Réparer le signalement s'il ne correspond pas à son type
         if self.content_type != self.type.content_type:
             self.content_object = None
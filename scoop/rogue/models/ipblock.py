@@ -1,6 +1,4 @@
 # coding: utf-8
-import re
-
 import IPy
 from celery.task.base import task
 from django.core.exceptions import ValidationError
@@ -14,15 +12,31 @@ from django_countries.fields import CountryField
 
 from scoop.core.abstract.core.datetime import DatetimeModel
 from scoop.core.util.data.typeutil import make_iterable
-from scoop.core.util.model.model import SingleDeleteManager
+from scoop.core.util.model.model import SingleDeleteManager, SingleDeleteQuerySet
 from scoop.core.util.shortcuts import addattr
-from scoop.rogue.util.ipblock import is_relay_node
+from scoop.rogue.util.ipmatcher import get_ip_matcher, invalidate_ip_matcher
 from scoop.rogue.util.signals import user_has_ip_blocked
 
 
+class IPBlockQuerySet(SingleDeleteQuerySet):
+    """ Queryset des blocages d'IP """
+
+    # Overrides
+    def update(self, **kwargs):
+        """ Mettre à jour les filtres, sans signal post_save : invalider les filtres compilés """
+        updated = super(IPBlockQuerySet, self).update(**kwargs)
+        if updated:
+            invalidate_ip_matcher()
+        return updated
+
+
 class IPBlockManager(SingleDeleteManager):
     """ Manager des blocages d'IP """
 
+    def get_queryset(self):
+        """ Renvoyer le queryset par défaut """
+        return IPBlockQuerySet(self.model, using=self._db)
+
     # Getter
     def active(self):
         """ Renvoyer les filtres actifs """
@@ -35,63 +49,11 @@ class IPBlockManager(SingleDeleteManager):
         :type ip: scoop.user.access.models.IP
         :returns: un dictionnaire aux clés blocked, level et type
         """
-        from scoop.location.models import Country
         # Ignorer les IPs protégées
         if ip.is_protected():
             return {'blocked': False, 'level': 0, 'type': 0}
-        # Vérifier d'abord les attributs de l'IP
-        if ip.is_blocked(check=False) or not Country.objects.is_safe(ip.country):
-            return {'blocked': True, 'level': ip.harm or 3, 'type': 0}
-        # Ne chercher les autorisations de reverse que si l'IP a un reverse
-        if ip.has_reverse():
-            for ipblock in self.filter(active=True, type=IPBlock.HOST_ALLOWED):
-                if re.search(ipblock.hostname, ip.reverse):
-                    return {'blocked': False, 'level': 0, 'type': 0}
-        # Ne chercher les autorisations de FAI que si l'IP a un ISP
-        if ip.has_isp():
-            allows = self.filter(isp__iexact=ip.isp, active=True, type=IPBlock.ISP_ALLOWED)
-            if allows.exists():
-                return {'blocked': False, 'level': 0, 'type': 0}
-        # Vérifier l'ip
-        blocks = self.filter(ip1=ip.ip, type=IPBlock.SINGLE, active=True)
-        if blocks.exists():
-            block_item = blocks[0]
-            return {'blocked': True, 'level': block_item.harm, 'type': block_item.category}
-        # Vérifier que l'IP est dans une plage ou pas
-        blocks = self.filter(ip1__lte=ip.ip, ip2__gte=ip.ip, type=IPBlock.RANGE, active=True)
-        if blocks.exists():
-            return {'blocked': True, 'level': blocks[0].harm, 'type': blocks[0].category}
-        # Vérifier ensuite que l'IP n'est pas un nœud TOR ou un proxy
-        if is_relay_node(ip.string):
-            return {'blocked': True, 'level': 3, 'type': 10}
-        # Ne chercher les blocages de reverse que si l'IP a un reverse
-        if ip.has_reverse():
-            # Vérifier le reverse de l'enregistrement IP
-            for ipblock in self.filter(active=True, type=IPBlock.HOST).only('hostname', 'harm', 'category'):
-                if ipblock.hostname.lower() in ip.reverse.lower():
-                    return {'blocked': True, 'level': ipblock.harm, 'type': ipblock.category}
-            # Vérifier le reverse de l'enregistrement, avec exclusion
-            for ipblock in self.filter(active=True, type=IPBlock.HOST_EXCLUSION).only('hostname', 'hostname_exclude', 'harm', 'category'):
-                if ipblock.hostname.lower() in ip.reverse.lower() and not re.search(ipblock.hostname_exclude, ip.reverse):
-                    return {'blocked': True, 'level': ipblock.harm, 'type': ipblock.category}
-        # Ne chercher les blocages de FAI que si l'IP en a un
-        if ip.has_isp():
-            # Vérifier les ISP
-            for ipblock in self.filter(isp__istartswith=ip.isp, active=True, type=IPBlock.ISP_EXCLUSION).only('hostname_exclude', 'harm', 'category'):
-                if ipblock.hostname_exclude == '' or not re.search(ipblock.hostname_exclude, ip.reverse):
-                    return {'blocked': True, 'level': ipblock.harm, 'type': ipblock.category}
-        # Vérifier le pays
-        if ip.has_country():
-            blocks = self.filter(country_code__iexact=ip.country, active=True, type=IPBlock.COUNTRY)
-            if blocks.exists():
-                return {'blocked': True, 'level': blocks[0].harm, 'type': blocks[0].category}
-        # Vérifier les blocages de regex
-        if ip.has_reverse():
-            for ipblock in self.filter(active=True, type=IPBlock.HOST_REGEX):
-                if re.search(ipblock.hostname, ip.reverse):
-                    return {'blocked': True, 'level': ipblock.harm, 'type': ipblock.type}
-        # Aucun blocage trouvé
-        return {'blocked': False, 'level': 0, 'type': 0}
+        # Vérifier les blocages via la version compilée des filtres actifs
+        return get_ip_matcher().get_status(ip)
 
     @task(ignore_result=True)
     def get_user_status(self, user):
@@ -5,17 +5,35 @@ from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import get_language, pgettext_lazy
 from django_languages.fields import LanguageField
-from scoop.core.util.model.model import SingleDeleteManager
+from scoop.core.util.model.model import SingleDeleteManager, SingleDeleteQuerySet
 from scoop.rogue.templatetags.profanity_tags import ProfanitiesFilter
+from scoop.rogue.util.profanity import get_profanity_matcher, invalidate_profanity_matcher
+
+
+class ProfanityQuerySet(SingleDeleteQuerySet):
+    """ Queryset des filtres de grossièretés """
+
+    # Overrides
+    def update(self, **kwargs):
+        """ Mettre à jour les filtres, sans signal post_save : invalider les filtres compilés """
+        updated = super(ProfanityQuerySet, self).update(**kwargs)
+        if updated:
+            invalidate_profanity_matcher()
+        return updated
 
 
 class ProfanityManager(SingleDeleteManager):
     """ Manager des filtres de grossièretés """
 
+    def get_queryset(self):
+        """ Renvoyer le queryset par défaut """
+        return ProfanityQuerySet(self.model, using=self._db)
+
     # Getter
     def for_text(self, text):
         """ Renvoyer tous les filtres ayant eu un effet sur la chaîne """
-        return [profanity for profanity in self.all() if profanity.check_text(text)]
+        identifiers = get_profanity_matcher().find(text)
+        return list(self.filter(id__in=identifiers)) if identifiers else []
 
     # Actions
     def process(self, text):
@@ -13,6 +13,10 @@ class FlagIndex(indexes.SearchIndex, indexes.Indexable):
         from scoop.rogue.models.flag import Flag
         return Flag
 
+    def get_updated_field(self):
+        """ Renvoyer le champ de date de mise à jour, pour l'indexation incrémentale """
+        return 'updated'
+
     def index_queryset(self, using=None):
         """ Renvoyer les objets de l'index """
         return self.get_model().objects.all()
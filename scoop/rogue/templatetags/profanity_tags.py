@@ -50,14 +50,9 @@ class ProfanitiesFilter(object):
     @staticmethod
     def filter_profanities(text):
         """ Nettoyer automatiquement les grossièretés """
-        from scoop.rogue.models.profanity import Profanity
-        # Filtrer séparément les standalone et le reste
-        regex1 = Profanity.concatenate(standalone=True)
-        regex2 = Profanity.concatenate(standalone=False)
-        filter1 = ProfanitiesFilter(regex1, complete=False, inside_words=False)
-        filter2 = ProfanitiesFilter(regex2, complete=False, inside_words=True)
-        # Renvoyer le contenu filtré par filtre1 et filtre2
-        return filter1.clean(filter2.clean(text))
+        from scoop.rogue.util.profanity import get_profanity_matcher
+        # Filtrer en une passe, avec les filtres compilés de la base de données
+        return get_profanity_matcher().clean(text)
 
 
 @register.filter(name='clean_profanity')
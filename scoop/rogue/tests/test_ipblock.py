@@ -43,3 +43,20 @@ class IPBlockTest(TestCase):
         self.assertEqual(IPBlock.objects.get_ip_status(ip1)['type'], IPBlock.HOST_REGEX)
         self.assertFalse(IPBlock.objects.get_ip_status(ip2)['blocked'])
         self.assertEqual(ipblock.get_blocked_ip_set().count(), 1)
+
+    def test_ipblock_range(self):
+        """ Tester le blocage de plages d'IP imbriquées et l'invalidation des filtres compilés """
+        IPBlock.objects.block_ip_range('10.0.0.0', '10.255.255.255')
+        IPBlock.objects.block_ip_range('10.1.0.0', '10.1.0.255')
+        ip1 = IP.objects.create(string="10.1.2.3", ip=IP.get_ip_value("10.1.2.3"))  # bloqué par la première plage
+        ip2 = IP.objects.create(string="11.0.0.1", ip=IP.get_ip_value("11.0.0.1"))  # non bloqué
+        self.assertTrue(IPBlock.objects.get_ip_status(ip1)['blocked'])
+        self.assertFalse(IPBlock.objects.get_ip_status(ip2)['blocked'])
+        # Le filtre compilé doit être reconstruit après une modification
+        IPBlock.objects.filter(type=IPBlock.RANGE).delete()
+        self.assertFalse(IPBlock.objects.get_ip_status(ip1)['blocked'])
+        # Ainsi qu'après une mise à jour par lot
+        IPBlock.objects.block_ip_range('10.0.0.0', '10.255.255.255')
+        self.assertTrue(IPBlock.objects.get_ip_status(ip1)['blocked'])
+        IPBlock.objects.filter(type=IPBlock.RANGE).update(active=False)
+        self.assertFalse(IPBlock.objects.get_ip_status(ip1)['blocked'])
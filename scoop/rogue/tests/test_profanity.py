@@ -0,0 +1,42 @@
+# coding: utf-8
+from django.test import TestCase
+from scoop.rogue.models.profanity import Profanity
+from scoop.rogue.util.profanity import ProfanityMatcher, trie_regex
+
+
+class ProfanityTest(TestCase):
+    """ Test des filtres de grossièretés """
+
+    def test_trie_regex(self):
+        """ Tester la compilation d'une liste de mots en arbre de préfixes """
+        self.assertEqual(trie_regex(['con', 'connard', 'cul']), 'c(?:on(?:nard)?|ul)')
+        self.assertIsNone(trie_regex([]))
+
+    def test_matcher(self):
+        """ Tester le filtrage d'un texte en une passe """
+        matcher = ProfanityMatcher([(1, 'con', True), (2, 'connard', True), (3, 'merd', False), (4, r'pu+t[ea]', True)])
+        text = "Quel connard, ce CON de merdeux, puute reconnu"
+        self.assertEqual(matcher.clean(text), "Quel c-----d, ce C-N de m--deux, p---e reconnu")
+        self.assertEqual(matcher.find(text), {2, 1, 3, 4})
+        self.assertEqual(matcher.find("rien à signaler"), set())
+
+    def test_backreferences(self):
+        """ Tester que les filtres à références arrière sont compilés à part """
+        matcher = ProfanityMatcher([(1, r'(a)bc', False), (2, r'(\w)\1{2,}', False), (3, 'zut', True)])
+        self.assertEqual(matcher.separate[0][0], 2)
+        self.assertEqual(matcher.find("zut, abc et aaaa"), {1, 2, 3})
+        self.assertEqual(matcher.find("abc, ab"), {1})
+        self.assertEqual(matcher.clean("zut et ouiiii"), "z-t et oui--i")
+
+    def test_matcher_invalidation(self):
+        """ Tester que le filtre compilé suit les modifications de la table """
+        Profanity.objects.create(regex='zut', language='')
+        self.assertEqual(Profanity.objects.process("zut alors"), "z-t alors")
+        Profanity.objects.create(regex='alors', language='')
+        self.assertEqual(Profanity.objects.process("zut alors"), "z-t a---s")
+        self.assertEqual(len(Profanity.objects.for_text("zut alors")), 2)
+        # Les modifications et suppressions par lots invalident aussi le filtre compilé
+        Profanity.objects.filter(regex='alors').update(active=False)
+        self.assertEqual(Profanity.objects.process("zut alors"), "z-t alors")
+        Profanity.objects.filter(regex='zut').delete()
+        self.assertEqual(Profanity.objects.process("zut alors"), "zut alors")
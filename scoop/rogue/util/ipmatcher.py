@@ -0,0 +1,209 @@
+# coding: utf-8
+import logging
+import re
+import threading
+from bisect import bisect_right
+from time import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from scoop.rogue.util.ipblock import is_relay_node
+
+logger = logging.getLogger(__name__)
+
+# Clé de cache de la version des blocages d'IP, partagée entre processus
+VERSION_KEY = 'rogue.ipblock.matcher.version'
+# Durée de vie maximum d'un matcher compilé, en secondes
+MAX_AGE = 3600
+
+ALLOWED_STATUS = {'blocked': False, 'level': 0, 'type': 0}
+
+
+class PatternSet(object):
+    """
+    Ensemble d'expressions régulières compilées en une seule expression
+
+    Chaque expression est placée dans un groupe nommé, ce qui permet
+    de retrouver l'élément correspondant à la première occurrence trouvée.
+    """
+
+    def __init__(self, items, flags=0, escape=False):
+        """
+        Compiler les expressions
+
+        :param items: liste de tuples (expression, valeur associée)
+        :param escape: échapper les expressions (recherche de sous-chaînes)
+        """
+        self.values, self.fallback, groups = dict(), [], []
+        for index, (pattern, value) in enumerate(items):
+            pattern = re.escape(pattern) if escape else pattern
+            try:
+                re.compile(pattern, flags)
+            except re.error:
+                logger.warning("Invalid IP block expression {pattern}".format(pattern=pattern))
+                continue
+            self.values['p{index}'.format(index=index)] = value
+            groups.append((index, pattern, value))
+        try:
+            combined = '|'.join(['(?P<p{index}>{pattern})'.format(index=index, pattern=pattern) for index, pattern, _ in groups])
+            self.regex = re.compile(combined, flags) if groups else None
+        except re.error:
+            # Expressions non combinables (groupes nommés, références etc.)
+            self.regex, self.fallback = None, [(re.compile(pattern, flags), value) for _, pattern, value in groups]
+
+    def search(self, text):
+        """ Renvoyer la valeur associée à la première expression trouvée dans le texte, ou None """
+        if self.regex is not None:
+            match = self.regex.search(text)
+            return self.values[match.lastgroup] if match else None
+        for regex, value in self.fallback:
+            if regex.search(text):
+                return value
+        return None
+
+
+class IPBlockMatcher(object):
+    """
+    Version compilée en mémoire des blocages d'IP actifs
+
+    - les IP simples sont indexées dans un dictionnaire
+    - les plages sont triées par début, avec la fin maximum cumulée, pour une recherche par bisection
+    - les reverses autorisés, bloqués et les regex de reverse sont combinés en une seule expression chacun
+    """
+
+    def __init__(self, version=None):
+        """ Construire le matcher depuis les blocages actifs """
+        from scoop.location.models import Country
+        from scoop.rogue.models import IPBlock
+        self.version, self.created = version, time()
+        fields = ['id', 'type', 'category', 'harm', 'country_code', 'isp', 'hostname', 'hostname_exclude', 'ip1', 'ip2']
+        blocks = list(IPBlock.objects.active().order_by('id').only(*fields))
+        by_type = {kind: [block for block in blocks if block.type == kind] for kind in {block.type for block in blocks}}
+        # Autorisations
+        self.host_allowed = PatternSet([(block.hostname, True) for block in by_type.get(IPBlock.HOST_ALLOWED, [])])
+        self.isp_allowed = {block.isp.lower() for block in by_type.get(IPBlock.ISP_ALLOWED, [])}
+        # IP simples, le premier blocage est prioritaire
+        self.singles = dict()
+        for block in by_type.get(IPBlock.SINGLE, []):
+            self.singles.setdefault(int(block.ip1), self.get_block_status(block))
+        # Plages d'IP
+        ranges = [(int(block.ip1), int(block.ip2), self.get_block_status(block)) for block in by_type.get(IPBlock.RANGE, [])]
+        ranges.sort(key=lambda item: item[0])
+        self.range_starts, self.range_reach = [item[0] for item in ranges], []
+        for index, item in enumerate(ranges):
+            previous = self.range_reach[-1] if self.range_reach else None
+            self.range_reach.append(index if previous is None or item[1] > ranges[previous][1] else previous)
+        self.ranges = ranges
+        # Reverses et FAI
+        self.hosts = PatternSet([(block.hostname, self.get_block_status(block)) for block in by_type.get(IPBlock.HOST, [])], flags=re.IGNORECASE, escape=True)
+        self.host_exclusions = [(block.hostname.lower(), PatternSet([(block.hostname_exclude, True)]), self.get_block_status(block))
+                                for block in by_type.get(IPBlock.HOST_EXCLUSION, [])]
+        self.isp_exclusions = [(block.isp.lower(), PatternSet([(block.hostname_exclude, True)] if block.hostname_exclude else []), self.get_block_status(block))
+                               for block in by_type.get(IPBlock.ISP_EXCLUSION, [])]
+        self.countries = dict()
+        for block in by_type.get(IPBlock.COUNTRY, []):
+            self.countries.setdefault(str(block.country_code).upper(), self.get_block_status(block))
+        # Les blocages par regex renvoient leur type plutôt que leur catégorie
+        self.host_regexes = PatternSet([(block.hostname, {'blocked': True, 'level': block.harm, 'type': block.type})
+                                        for block in by_type.get(IPBlock.HOST_REGEX, [])])
+        # Pays non sains
+        self.unsafe_countries = {code.upper() for code in Country.objects.filter(safe=False).values_list('code2', flat=True)}
+
+    # Getter
+    @staticmethod
+    def get_block_status(block):
+        """ Renvoyer le statut de blocage correspondant à un filtre """
+        return {'blocked': True, 'level': block.harm, 'type': block.category}
+
+    def is_stale(self, version):
+        """ Renvoyer si le matcher doit être reconstruit """
+        return version != self.version or time() - self.created > MAX_AGE
+
+    def get_range_status(self, value):
+        """ Renvoyer le statut de la plage contenant une IP, ou None """
+        index = bisect_right(self.range_starts, value) - 1
+        if index >= 0:
+            start, end, status = self.ranges[self.range_reach[index]]
+            if end >= value:
+                return status
+        return None
+
+    def get_status(self, ip):
+        """
+        Renvoyer les informations de blocage concernant une IP
+
+        Suit le même ordre de priorité que les filtres en base de données.
+        :type ip: scoop.user.access.models.IP
+        :returns: un dictionnaire aux clés blocked, level et type
+        """
+        country = ip.country.upper()
+        # Vérifier d'abord les attributs de l'IP
+        if ip.is_blocked(check=False) or (country and country in self.unsafe_countries):
+            return {'blocked': True, 'level': ip.harm or 3, 'type': 0}
+        # Autorisations de reverse et de FAI
+        if ip.has_reverse() and self.host_allowed.search(ip.reverse):
+            return dict(ALLOWED_STATUS)
+        if ip.has_isp() and ip.isp.lower() in self.isp_allowed:
+            return dict(ALLOWED_STATUS)
+        # IP simple et plages d'IP
+        value = int(ip.ip)
+        status = self.singles.get(value) or self.get_range_status(value)
+        if status is not None:
+            return dict(status)
+        # Vérifier ensuite que l'IP n'est pas un nœud TOR ou un proxy
+        if is_relay_node(ip.string):
+            return {'blocked': True, 'level': 3, 'type': 10}
+        # Reverses
+        if ip.has_reverse():
+            status = self.hosts.search(ip.reverse)
+            if status is not None:
+                return dict(status)
+            reverse = ip.reverse.lower()
+            for hostname, exclude, status in self.host_exclusions:
+                if hostname in reverse and not exclude.search(ip.reverse):
+                    return dict(status)
+        # FAI
+        if ip.has_isp():
+            isp = ip.isp.lower()
+            for name, exclude, status in self.isp_exclusions:
+                if name.startswith(isp) and not exclude.search(ip.reverse):
+                    return dict(status)
+        # Pays
+        if country in self.countries:
+            return dict(self.countries[country])
+        # Regex de reverse
+        if ip.has_reverse():
+            status = self.host_regexes.search(ip.reverse)
+            if status is not None:
+                return dict(status)
+        return dict(ALLOWED_STATUS)
+
+
+_local = {'matcher': None, 'lock': threading.Lock()}
+
+
+def get_matcher_version():
+    """ Renvoyer la version courante des blocages d'IP """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_ip_matcher():
+    """ Renvoyer le matcher de blocages d'IP du processus, reconstruit si périmé """
+    version = get_matcher_version()
+    matcher = _local['matcher']
+    if matcher is None or matcher.is_stale(version):
+        with _local['lock']:
+            matcher = _local['matcher']
+            if matcher is None or matcher.is_stale(version):
+                matcher = _local['matcher'] = IPBlockMatcher(version)
+    return matcher
+
+
+def invalidate_ip_matcher():
+    """ Invalider les matchers de blocages d'IP de tous les processus """
+    _local['matcher'] = None
+    cache.set(VERSION_KEY, uuid4().hex, None)
@@ -0,0 +1,177 @@
+# coding: utf-8
+import logging
+import random
+import re
+import threading
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+logger = logging.getLogger(__name__)
+
+# Clé de cache de la version de la table des grossièretés, partagée entre processus
+VERSION_KEY = 'rogue.profanity.matcher.version'
+# Caractères spéciaux des expressions régulières : un filtre sans ces caractères est un simple mot
+SPECIAL_CHARACTERS = re.compile(r'[\\.^$*+?{}\[\]|()]')
+# Références arrière et groupes nommés, dont les numéros ou noms changeraient dans l'expression combinée
+BACKREFERENCES = re.compile(r'(?:^|[^\\])(?:\\\\)*(?:\\[1-9]|\(\?P[=<])')
+
+
+def trie_regex(words):
+    """
+    Renvoyer une expression régulière reconnaissant une liste de mots
+
+    Les mots sont rangés dans un arbre de préfixes, et l'expression obtenue
+    ne teste à chaque position du texte que les branches de l'arbre
+    correspondant aux caractères lus, au lieu de tester chaque mot.
+    ex. ['con', 'connard', 'cul'] → c(?:on(?:nard)?|ul)
+    """
+    trie = dict()
+    for word in words:
+        node = trie
+        for character in word:
+            node = node.setdefault(character, dict())
+        node[''] = None
+
+    def _build(node):
+        """ Renvoyer l'expression d'un nœud de l'arbre, ou None pour une feuille """
+        if '' in node and len(node) == 1:
+            return None
+        alternatives, characters = [], []
+        for character in sorted(key for key in node if key):
+            suffix = _build(node[character])
+            if suffix is None:
+                characters.append(re.escape(character))
+            else:
+                alternatives.append(re.escape(character) + suffix)
+        if characters:
+            alternatives.append(characters[0] if len(characters) == 1 else '[{0}]'.format(''.join(characters)))
+        result = alternatives[0] if len(alternatives) == 1 else '(?:{0})'.format('|'.join(alternatives))
+        if '' in node:
+            result = '{0}?'.format(result) if len(alternatives) == 1 and characters else '(?:{0})?'.format(result)
+        return result
+
+    return _build(trie) if trie else None
+
+
+class ProfanityMatcher(object):
+    """
+    Filtre de grossièretés compilé
+
+    Tous les filtres sont combinés en une seule expression régulière,
+    qui parcourt le texte en une passe :
+    - les filtres qui sont de simples mots sont regroupés en arbre de préfixes
+    - les filtres standalone ne reconnaissent que des mots entiers
+    - les filtres contenant des références arrière sont compilés à part
+    """
+
+    def __init__(self, entries, version=None):
+        """
+        Compiler les filtres
+
+        :param entries: liste de tuples (id, expression, standalone)
+        :param version: version de la table des grossièretés
+        """
+        self.version, self.words, self.groups, self.separate, parts = version, dict(), dict(), [], []
+        # Les filtres à références arrière ne peuvent pas être combinés aux autres
+        for identifier, regex, standalone in [entry for entry in entries if BACKREFERENCES.search(entry[1])]:
+            try:
+                self.separate.append((identifier, re.compile(r'\b(?:{0})\b'.format(regex) if standalone else regex, re.IGNORECASE)))
+            except re.error:
+                logger.warning("Invalid profanity expression {regex}".format(regex=regex))
+        entries = [entry for entry in entries if not BACKREFERENCES.search(entry[1])]
+        for standalone in (True, False):
+            literals = [(identifier, regex.lower()) for identifier, regex, alone in entries if alone is standalone and not SPECIAL_CHARACTERS.search(regex)]
+            expressions = [(identifier, regex) for identifier, regex, alone in entries if alone is standalone and SPECIAL_CHARACTERS.search(regex)]
+            alternatives = []
+            for identifier, word in literals:
+                self.words.setdefault(word, identifier)
+            if literals:
+                alternatives.append(trie_regex([word for _, word in literals]))
+            for identifier, regex in expressions:
+                group = '(?P<p{identifier}>{regex})'.format(identifier=identifier, regex=regex)
+                try:
+                    re.compile(group)
+                    alternatives.append(group)
+                    self.groups['p{identifier}'.format(identifier=identifier)] = identifier
+                except re.error:
+                    logger.warning("Invalid profanity expression {regex}".format(regex=regex))
+            if alternatives:
+                pattern = '(?:{0})'.format('|'.join(alternatives))
+                parts.append(r'\b{0}\b'.format(pattern) if standalone else pattern)
+        self.regex = re.compile('|'.join(parts), re.IGNORECASE) if parts else None
+
+    @staticmethod
+    def from_database(language=None, version=None):
+        """ Compiler les filtres actifs de la base de données pour une langue """
+        from scoop.rogue.models.profanity import Profanity
+        # Les filtres sans langue s'appliquent à toutes les langues
+        rows = Profanity.objects.filter(active=True, language__in=[language or "", ""]).values_list('id', 'regex', 'standalone')
+        return ProfanityMatcher(list(rows), version=version)
+
+    # Getter
+    def find(self, text):
+        """ Renvoyer les identifiants des filtres trouvés dans un texte """
+        found = set()
+        if self.regex is not None and text:
+            for match in self.regex.finditer(text):
+                groups = [self.groups[name] for name, value in match.groupdict().items() if value is not None and name in self.groups]
+                found.update(groups or [self.words.get(match.group().lower())])
+            found.discard(None)
+        if text:
+            found.update(identifier for identifier, regex in self.separate if regex.search(text))
+        return found
+
+    # Actions
+    def clean(self, text, replacements="-"):
+        """
+        Renvoyer un texte dont les grossièretés sont masquées
+
+        La première et la dernière lettre de chaque grossièreté sont conservées.
+        """
+        if not text:
+            return text
+
+        def _replace(match):
+            """ Remplacer une correspondance """
+            value = match.group()
+            if len(value) <= 2:
+                return value
+            return value[0] + ''.join([random.choice(replacements) for _ in range(len(value) - 2)]) + value[-1]
+
+        for regex in [self.regex] + [regex for _, regex in self.separate]:
+            if regex is not None:
+                text = regex.sub(_replace, text)
+        return text
+
+
+_local = {'matchers': dict(), 'lock': threading.Lock()}
+
+
+def get_profanity_version():
+    """ Renvoyer la version courante de la table des grossièretés """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_profanity_matcher(language=None):
+    """ Renvoyer le filtre compilé du processus pour une langue, reconstruit si la table a changé """
+    language = language or get_language() or ""
+    version = get_profanity_version()
+    matcher = _local['matchers'].get(language)
+    if matcher is None or matcher.version != version:
+        with _local['lock']:
+            matcher = _local['matchers'].get(language)
+            if matcher is None or matcher.version != version:
+                matcher = _local['matchers'][language] = ProfanityMatcher.from_database(language, version=version)
+    return matcher
+
+
+def invalidate_profanity_matcher():
+    """ Invalider les filtres compilés de tous les processus """
+    _local['matchers'] = dict()
+    cache.set(VERSION_KEY, uuid4().hex, None)
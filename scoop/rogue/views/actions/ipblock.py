@@ -1,6 +1,7 @@
 # coding: utf-8
 from django.contrib.auth.decorators import user_passes_test
 from scoop.rogue.models.ipblock import IPBlock
+from scoop.rogue.util.ipmatcher import invalidate_ip_matcher
 from scoop.user.access.models.ip import IP
 from scoop.user.util.auth import is_superuser
 
@@ -14,4 +15,5 @@ def block_ip(request, ip_string):
 @user_passes_test(is_superuser)
 def unblock_ip(request, ip_string):
     """ Débloquer une IP """
-    IPBlock.objects.filter(ip=IP.get_ip_value(ip_string), type=0).update(active=False)
+    if IPBlock.objects.filter(ip1=IP.get_ip_value(ip_string), type=IPBlock.SINGLE).update(active=False):
+        invalidate_ip_matcher()
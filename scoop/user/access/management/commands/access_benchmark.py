@@ -0,0 +1,49 @@
+# coding: utf-8
+from time import perf_counter
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http.request import HttpRequest
+from django.test.utils import override_settings
+from scoop.user.access.util.buffer import AccessEntry
+
+
+class Command(BaseCommand):
+    """ Comparer le débit d'enregistrement des accès, requête par requête et par lots """
+    args = ''
+    help = 'Compare access log throughput between per-request and batched recording'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', '-c', action='store', type=int, dest='count', default=2000, help='Number of accesses to record.')
+        parser.add_argument('--batch', '-b', action='store', type=int, dest='batch', default=64, help='Number of accesses per batch.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        from scoop.user.access.models import IP, Access
+        count, batch = options['count'], options['batch']
+        requests = [self.make_request(index) for index in range(count)]
+        with override_settings(USER_ACCESS_RECORD=True), transaction.atomic():
+            # Créer les IP au préalable, pour ne pas mesurer les résolutions DNS et GeoIP
+            IP.objects.bulk_create([IP(ip=IP.get_ip_value(address), string=address) for address in {request.get_ip() for request in requests}])
+            start = perf_counter()
+            for request in requests:
+                Access.objects.add(request)
+            single = perf_counter() - start
+            entries = [AccessEntry.from_request(request) for request in requests]
+            start = perf_counter()
+            for offset in range(0, count, batch):
+                Access.objects.add_batch(entries[offset:offset + batch])
+            batched = perf_counter() - start
+            transaction.set_rollback(True)
+        print("Per request: {time:.3f}s, {rate:.0f} accesses/s".format(time=single, rate=count / single))
+        print("Batches of {batch}: {time:.3f}s, {rate:.0f} accesses/s".format(batch=batch, time=batched, rate=count / batched))
+
+    @staticmethod
+    def make_request(index):
+        """ Créer une requête synthétique """
+        request = HttpRequest()
+        request.META.update({'REMOTE_ADDR': '10.0.{0}.{1}'.format(index % 7, index % 31), 'HTTP_REFERER': ''})
+        request.path = '/benchmark/page-{0}/'.format(index % 50)
+        request.user = AnonymousUser()
+        return request
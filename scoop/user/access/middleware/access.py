@@ -5,7 +5,7 @@ from django.conf import settings
 from django.core.urlresolvers import reverse_lazy
 
 from scoop.core.util.django.middleware import MiddlewareBase
-from scoop.user.access.tasks import add_access
+from scoop.user.access.util.buffer import access_buffer
 from scoop.user.util.signals import external_visit
 
 logger = logging.getLogger(__name__)
@@ -32,6 +32,6 @@ class AccessMiddleware(MiddlewareBase):
             # Ne rien faire si un chemin blacklisté apparaît dans l'URL
             if [True for i in AccessMiddleware.ACCESS_LOG_BLACKLIST if request.path.startswith(str(i))]:
                 return response
-            # Enregistrer l'accès à la page
-            add_access.delay(request)
+            # Enregistrer l'accès à la page, envoyé par lots
+            access_buffer.add(request)
         return response
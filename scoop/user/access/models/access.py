@@ -3,7 +3,6 @@ import os
 from os.path import join
 
 from django.conf import settings
-from django.contrib.auth.models import AnonymousUser
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
@@ -103,7 +102,7 @@ class AccessManager(models.Manager):
             filename_info = {'year': fmt("%Y"), 'month': fmt("%m"), 'week': fmt("%W"), 'day': fmt("%d"), 'hour': fmt("%H"), 'minute': fmt("%M"),
                              'second': fmt("%S"), 'rows': queryset.count()}
             path = join(Paths.get_root_dir('isolated', 'var', 'log'), "access-log-{year}-{month}-{day}-{hour}-{minute}-{rows}.csv".format(**filename_info))
-            return csv_dump(queryset, path, compress=True)
+            return csv_dump(queryset, path, compress=True, related={'ip': 'string', 'page': 'path', 'user': 'username'})
         return False
 
     def purge(self, days=3, persist=False):
@@ -130,25 +129,40 @@ class AccessManager(models.Manager):
             self.dump(rows)
         return rows.delete()
 
-    @staticmethod
-    def add(request):
+    def add(self, request):
         """
         Consigner un accès au site dans la base de données
 
         :param request: HTTPRequest
         """
+        from scoop.user.access.util.buffer import AccessEntry
+        # Enregistrer l'accès uniquement si l'URL est relative
+        return self.add_batch([AccessEntry.from_request(request)]) > 0
+
+    def add_batch(self, entries):
+        """
+        Consigner un lot d'accès au site dans la base de données
+
+        Les IP, pages et IP utilisateur ne sont résolues qu'une fois par lot,
+        et les accès sont insérés en une seule requête.
+        :param entries: liste d'entrées AccessEntry
+        :returns: nombre d'accès enregistrés
+        """
         from scoop.user.access.models import IP, Page, UserIP
         # Enregistrer l'accès uniquement si l'URL est relative
-        if '://' not in request.path:
-            iprecord = IP.objects.get_by_ip(request.get_ip())
-            UserIP.objects.set(user=request.user, ip=iprecord)
-            if settings.USER_ACCESS_RECORD is True:
-                user = request.user or AnonymousUser()
-                page = Page.objects.get_page(request.path)
-                row = Access(user=user if user.is_active else None, ip=iprecord, page=page, referrer=request.get_referrer())
-                row.save()
-                return True
-        return False
+        entries = [entry for entry in entries if '://' not in entry.path]
+        if not entries:
+            return 0
+        ips = IP.objects.get_by_ips({entry.ip for entry in entries})
+        UserIP.objects.set_many({(entry.user_id, ips[entry.ip]) for entry in entries if entry.user_id and ips.get(entry.ip)})
+        if settings.USER_ACCESS_RECORD is True:
+            pages = Page.objects.get_pages({entry.path for entry in entries})
+            max_length = Access._meta.get_field('referrer').max_length
+            rows = [Access(user_id=entry.user_id if entry.active else None, ip=ips.get(entry.ip), page=pages[entry.path],
+                           referrer=entry.referrer[0:max_length], time=entry.time) for entry in entries]
+            self.bulk_create(rows)
+            return len(rows)
+        return 0
 
 
 class Access(DatetimeModel, IPPointableModel):
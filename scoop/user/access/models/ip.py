@@ -11,19 +11,20 @@ from django.contrib.auth import get_user_model
 from django.contrib.gis.db.models.manager import GeoManager
 from django.core.urlresolvers import reverse_lazy
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models
 from django.db.backends.dummy.base import IntegrityError
 from django.db.models.aggregates import Count
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import pgettext_lazy
 from django_countries.data import COUNTRIES
-from pygeoip import GeoIP
 from scoop.core.abstract.core.datetime import DatetimeModel
 from scoop.core.abstract.location.coordinates import CoordinatesModel
 from scoop.core.util.shortcuts import addattr
 from scoop.location.util.country import get_country_icon_html
 from scoop.user.access.util.access import STATUS_CHOICES, reverse_lookup
+from scoop.user.access.util.geoip import geoip_resolver
+from scoop.user.access.util.resolver import reverse_resolver
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,21 @@ class IPManager(GeoManager):
         except IntegrityError:
             return None
 
+    def update_information(self, items, batch_size=500):
+        """
+        Mettre à jour les informations de plusieurs IP par lots, sans charger les objets
+
+        :param items: dictionnaires renvoyés par IP.get_ip_information
+        :returns: le nombre d'IP mises à jour
+        """
+        rows = [(item['ip'], item['reverse'][0:80], item['status'] or 0, item['isp'][0:64], item['country'], item['harm'], item['updated'],
+                 item['city_name'][0:96], sorted((-90.0, item['latitude'], 90.0))[1], sorted((-180.0, item['longitude'], 180.0))[1]) for item in items]
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(self._get_update_sql(len(batch)), [value for row in batch for value in row])
+        return len(rows)
+
     # Getter
     def get_by_natural_key(self, ip):
         """ Renvoyer une IP par clé naturelle """
@@ -53,6 +69,20 @@ class IPManager(GeoManager):
         except IP.DoesNotExist:
             return self.new(ip_string)
 
+    def get_by_ips(self, ip_strings):
+        """
+        Renvoyer les objets IP pour plusieurs chaînes, en créant les IP manquantes
+
+        :param ip_strings: chaînes d'IP A.B.C.D
+        :returns: dictionnaire {chaîne: IP}
+        """
+        values = {ip_string: IP.get_ip_value(ip_string) for ip_string in ip_strings}
+        existing = self.in_bulk(set(values.values()))
+        result = dict()
+        for ip_string, value in values.items():
+            result[ip_string] = existing.get(value) or self.get_by_ip(ip_string)
+        return result
+
     def get_localhost(self):
         """ Renvoyer l'objet IP pour localhost """
         return self.get_by_ip('127.0.0.1')
@@ -76,24 +106,34 @@ class IPManager(GeoManager):
         """ Renvoyer la liste de codes pays des """
         return self.exclude(country="").values('country').annotate(count=Count('country')).distinct().order_by('-count')
 
-    # Overrides
-    def __init__(self, *args, **kwargs):
-        """ Initialiser le manager """
-        super(IPManager, self).__init__(*args, **kwargs)
-        # Initialiser l'outil GeoIP dans le manager
-        if not hasattr(self, 'geoip'):
-            try:
-                self.geoip = GeoIP(settings.GEOIP_PATH)
-                self.geoisp = GeoIP(settings.GEOISP_PATH)
-            except AttributeError:
-                pass
-
     def get_isp_by_ip(self, ip):
         """ Renvoyer le FAI d'une IP """
-        try:
-            return self.geoisp.org_by_addr(ip) or ""
-        except ValueError:
-            return ""
+        return geoip_resolver.get_isp(ip)
+
+    def get_locations(self, ip_strings):
+        """
+        Renvoyer les informations de localisation de plusieurs IP
+
+        :param ip_strings: chaînes d'IP A.B.C.D
+        :returns: dictionnaire {chaîne: {isp, country, latitude, longitude, city_name}}
+        """
+        return geoip_resolver.resolve_many(ip_strings)
+
+    # Privé
+    @staticmethod
+    def _get_update_sql(count):
+        """ Renvoyer la requête de mise à jour des informations de plusieurs IP """
+        quote, table = connection.ops.quote_name, connection.ops.quote_name(IP._meta.db_table)
+        columns = [quote(IP._meta.get_field(name).column) for name in ['ip', 'reverse', 'status', 'isp', 'country', 'harm', 'updated', 'city_name']]
+        position = quote(IP._meta.get_field('position').column)
+        return "UPDATE {table} SET {updates}, {position} = ST_SetSRID(ST_MakePoint(v.longitude, v.latitude), {srid}) " \
+               "FROM (VALUES {values}) AS v({names}, latitude, longitude) WHERE {table}.{pk} = v.{pk}".format(
+                   table=table, updates=", ".join("{0} = v.{0}".format(column) for column in columns[1:]), position=position, srid=IP.SRID,
+                   values=", ".join(["({0})".format(", ".join(["%s"] * (len(columns) + 2)))] * count), names=", ".join(columns), pk=columns[0])
+
+    # Propriétés
+    geoip = property(lambda self: geoip_resolver.get_database('GEOIP_PATH'))
+    geoisp = property(lambda self: geoip_resolver.get_database('GEOISP_PATH'))
 
 
 class IP(DatetimeModel, CoordinatesModel):
@@ -143,11 +183,7 @@ class IP(DatetimeModel, CoordinatesModel):
 
     def get_geoip(self):
         """ Renvoyer les informations de localisation de l'IP """
-        try:
-            return IP.objects.geoip.record_by_addr(self.string) or {}
-        except Exception as e:
-            logger.warning(e)
-            return {'country_code': '', 'latitude': 0.0, 'longitude': 0.0}
+        return geoip_resolver.get_record(self.string)
 
     @addattr(short_description=_("Country"))
     def get_country_code(self):
@@ -189,8 +225,7 @@ class IP(DatetimeModel, CoordinatesModel):
     @addattr(short_description=_("ISP"))
     def get_isp(self):
         """ Renvoyer les informations du FAI de l'IP """
-        org = IP.objects.geoisp.org_by_addr(self.ip_address) or ""
-        return org
+        return geoip_resolver.get_isp(self.ip_address)
 
     @addattr(short_description=_("City name"))
     def get_city_name(self):
@@ -330,23 +365,20 @@ class IP(DatetimeModel, CoordinatesModel):
             return get_country_icon_html(self.country, self.get_country_name())
 
     @staticmethod
-    def get_ip_information(ip):
-        """ Renvoyer un dictionnaire d'informations sur l'adresse IP (A.B.C.D) passée """
-        geoip_info, data = dict(), {'ip': IP.get_ip_value(ip), 'string': ip}
-        reverse = reverse_lookup(ip)
+    def get_ip_information(ip, location=None, reverse=None):
+        """
+        Renvoyer un dictionnaire d'informations sur l'adresse IP (A.B.C.D) passée
+
+        :param location: informations de localisation déjà résolues (voir IPManager.get_locations)
+        :param reverse: nom inversé déjà résolu (voir ReverseResolver.resolve_many)
+        """
+        data = {'ip': IP.get_ip_value(ip), 'string': ip}
+        reverse = reverse or reverse_resolver.resolve(ip)
         data['reverse'] = str(reverse['name']) if isinstance(reverse, dict) else reverse
         data['status'] = reverse['status'] if isinstance(reverse, dict) else ''
-        data['isp'] = IP.objects.get_isp_by_ip(ip)[0:64]
         data['updated'] = timezone.now()
-        try:
-            geoip_info = IP.objects.geoip.record_by_addr(ip) or dict()
-        except Exception:
-            pass
-        data['country'] = geoip_info.get('country_code', "").upper()
+        data.update(location or geoip_resolver.resolve(ip))
         data['harm'] = 3 * IP.is_country_harmful(data['country'])  # 3 si True, 0 sinon
-        data['latitude'] = geoip_info.get('latitude', 0.0) or 0.0
-        data['longitude'] = geoip_info.get('longitude', 0.0) or 0.0
-        data['city_name'] = geoip_info.get('city', "") or ""
         return data
 
     # Setter
@@ -19,6 +19,16 @@ class PageManager(models.Manager):
             page.save()
         return page
 
+    def get_pages(self, paths):
+        """
+        Renvoyer les objets Page de plusieurs URL
+
+        :returns: dictionnaire {URL: Page}
+        """
+        paths = {path: path[:-1] if path.endswith('/') else path for path in paths}
+        existing = {page.path: page for page in self.filter(path__in=set(paths.values()))}
+        return {path: existing.get(normalized) or self.get_page(path) for path, normalized in paths.items()}
+
 
 class Page(models.Model):
     """ Page du site """
@@ -66,6 +66,28 @@ class UserIPManager(models.Manager):
             else:
                 return self.get(user=user, ip=ip)
 
+    def set_many(self, pairs):
+        """
+        Enregistrer plusieurs IP utilisateur en lot
+
+        Met à jour la date des IP utilisateur existantes avec une requête
+        par utilisateur, et crée les IP utilisateur manquantes en une requête.
+        :param pairs: ensemble de tuples (id utilisateur, IP)
+        """
+        by_user = dict()
+        for user_id, ip in pairs:
+            by_user.setdefault(user_id, dict())[ip.pk] = ip
+        timestamp = now()
+        existing = set(self.filter(user_id__in=by_user.keys(), ip_id__in={pk for ips in by_user.values() for pk in ips}).values_list('user_id', 'ip_id'))
+        for user_id in {user_id for user_id, _ in existing}:
+            self.filter(user_id=user_id, ip_id__in=by_user[user_id].keys()).update(time=timestamp)
+        created = [UserIP(user_id=user_id, ip=ip, time=timestamp) for user_id, ips in by_user.items() for pk, ip in ips.items()
+                   if (user_id, pk) not in existing]
+        self.bulk_create(created)
+        for userip in created:
+            userip_created.send(userip)
+        return created
+
 
 class UserIP(IPPointModel, DatetimeModel):
     """ IP d'un utilisateur """
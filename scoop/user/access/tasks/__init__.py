@@ -1,3 +1,3 @@
 # coding: utf-8
-from scoop.user.access.tasks.access import add_access
+from scoop.user.access.tasks.access import add_access, add_access_batch
 from scoop.user.access.tasks.schedule import prune_access_log
@@ -16,3 +16,15 @@ def add_access(request):
     from scoop.user.access.models.access import Access
     if switch_is_active('access.log') and request:
         return Access.objects.add(request)
+
+
+@celery.task(name='user.access.log_access_batch', ignore_result=True, expires=86400)
+def add_access_batch(entries):
+    """
+    Ajouter un lot d'entrées au log des accès
+
+    :param entries: liste d'objets AccessEntry
+    """
+    from scoop.user.access.models.access import Access
+    if switch_is_active('access.log') and entries:
+        return Access.objects.add_batch(entries)
@@ -1,6 +1,5 @@
 # coding: utf-8
 import logging
-from multiprocessing.dummy import Pool
 
 from celery import task
 from celery.schedules import crontab, timedelta
@@ -8,6 +7,7 @@ from celery.task import periodic_task
 from django.conf import settings
 from django.db import transaction
 from scoop.user.access.models import IP, Access
+from scoop.user.access.util.resolver import reverse_resolver
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +23,12 @@ def prune_access_log():
 @periodic_task(run_every=timedelta(seconds=36), rate_limit='6/m', options={'expires': 3600})
 def update_ip_data():
     """ Mettre à jour périodiquement les IPs existantes (environ 1 200 minutes pour 500 000 enregistrements) """
-    pool = Pool(16)  # 16 "threads" simultanés pour le traitement
-    ips = IP.objects.order_by('updated').values_list('string', flat=True)[0:256]
-    # Récupérer toutes les données d'IP des workers
-    data = pool.map(IP.get_ip_information, ips)
-    pool.close()
-    pool.join()
-    # Et modifier les ips dans le thread principal
+    ips = list(IP.objects.order_by('updated').values_list('string', flat=True)[0:256])
+    # Résoudre les localisations et les noms inversés par lots
+    locations = IP.objects.get_locations(ips)
+    reverses = reverse_resolver.resolve_many(ips)
+    data = [IP.get_ip_information(ip, locations[ip], reverses[ip]) for ip in ips]
+    # Et modifier les ips en une transaction
     with transaction.atomic():
-        for item in data:
-            ip = IP.objects.get(ip=item['ip'])
-            ip.set_ip_information(item, save=True)
+        IP.objects.update_information(data)
     return True
@@ -0,0 +1,26 @@
+# coding: utf-8
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.user.access.util.geoip import GeoIPResolver
+
+
+class GeoIPTest(TestCase):
+    """ Test de la résolution GeoIP """
+
+    # Tests
+    @override_settings(GEOIP_PATH=None, GEOISP_PATH=None)
+    def test_resolver(self):
+        """ Vérifier le cache et les valeurs par défaut du résolveur sans base configurée """
+        resolver = GeoIPResolver(size=2)
+        self.assertIsNone(resolver.get_database('GEOIP_PATH'))
+        self.assertEqual(resolver.resolve('1.2.3.4'), {'isp': "", 'country': "", 'latitude': 0.0, 'longitude': 0.0, 'city_name': ""})
+        # Les copies renvoyées ne modifient pas le cache
+        resolver.get_record('1.2.3.4')['city'] = "Paris"
+        self.assertEqual(resolver.get_record('1.2.3.4'), {})
+        self.assertEqual(resolver._get_record.cache_info().misses, 1)
+        # Les IP en double ne sont résolues qu'une fois
+        self.assertEqual(set(resolver.resolve_many(['1.2.3.4', '5.6.7.8', '1.2.3.4'])), {'1.2.3.4', '5.6.7.8'})
+        self.assertEqual(resolver._get_record.cache_info().misses, 2)
+        resolver.clear()
+        self.assertEqual(resolver._get_record.cache_info().currsize, 0)
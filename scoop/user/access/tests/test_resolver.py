@@ -0,0 +1,75 @@
+# coding: utf-8
+import socket
+import threading
+import time
+
+import dns.message
+import dns.rcode
+import dns.rrset
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.user.access.util.access import STATUS
+from scoop.user.access.util.resolver import ReverseResolver
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'resolver-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResolverTest(TestCase):
+    """ Test de la résolution DNS inverse asynchrone """
+
+    def setUp(self):
+        """ Démarrer un serveur DNS local """
+        cache.clear()
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        """ Arrêter le serveur """
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+    def _serve(self):
+        """ Répondre aux requêtes PTR : 1.0.0.127 a un nom, 2.0.0.127 n'existe pas, 3.0.0.127 ne répond pas """
+        while self.running:
+            try:
+                wire, address = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            query = dns.message.from_wire(wire)
+            name = query.question[0].name.to_text()
+            self.queries.append(name)
+            response = dns.message.make_response(query)
+            if name.startswith('1.'):
+                response.answer.append(dns.rrset.from_text(name, 300, 'IN', 'PTR', 'host.example.com.'))
+            elif name.startswith('2.'):
+                response.set_rcode(dns.rcode.NXDOMAIN)
+                response.authority.append(dns.rrset.from_text('127.in-addr.arpa.', 600, 'IN', 'SOA', 'ns.example.com. root.example.com. 1 3600 600 86400 120'))
+            else:
+                continue
+            self.sock.sendto(response.to_wire(), address)
+
+    # Tests
+    def test_resolve_many(self):
+        """ Vérifier la résolution concurrente, le délai d'attente et le cache des réponses """
+        resolver = ReverseResolver(nameservers=[self.sock.getsockname()], timeout=0.3, retries=1)
+        start = time.time()
+        results = resolver.resolve_many(['127.0.0.1', '127.0.0.2', '127.0.0.3', '127.0.0.1'])
+        self.assertLess(time.time() - start, 1.5, "queries should run concurrently")
+        self.assertEqual(results['127.0.0.1'], {'name': 'host.example.com.', 'status': STATUS['ok']})
+        self.assertEqual(results['127.0.0.2'], {'name': '', 'status': STATUS['nxdomain']})
+        self.assertEqual(results['127.0.0.3'], {'name': '', 'status': STATUS['timeout']})
+        self.assertEqual(len(self.queries), 4, "duplicates are sent once, timeouts are retried")
+        # Les réponses positives et négatives sont en cache, pas les délais dépassés
+        self.assertEqual(resolver.resolve('127.0.0.2'), {'name': '', 'status': STATUS['nxdomain']})
+        self.assertEqual(len(self.queries), 4)
+        resolver.resolve('127.0.0.3')
+        self.assertEqual(len(self.queries), 6)
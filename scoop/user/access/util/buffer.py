@@ -0,0 +1,87 @@
+# coding: utf-8
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from scoop.core.util.buffer import ProcessBuffer
+from scoop.core.util.data.dateutil import now
+
+logger = logging.getLogger(__name__)
+
+
+class AccessEntry(namedtuple('AccessEntry', ['user_id', 'active', 'ip', 'path', 'referrer', 'time'])):
+    """
+    Accès au site, version légère et picklable
+
+    Remplace l'envoi de l'objet HttpRequest complet aux tâches Celery.
+    :attr user_id: id de l'utilisateur authentifié, ou None
+    :attr active: l'utilisateur est-il actif (seuls les accès des actifs sont liés à l'utilisateur)
+    :attr ip: adresse IP de la requête, au format texte
+    :attr path: chemin de la page visitée
+    :attr referrer: référent HTTP de la requête
+    :attr time: timestamp de l'accès
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def from_request(request):
+        """
+        Renvoyer une entrée d'accès depuis une requête HTTP
+
+        :param request: objet HttpRequest
+        """
+        user = getattr(request, 'user', None)
+        authenticated = user is not None and user.is_authenticated()
+        return AccessEntry(user.pk if authenticated else None, authenticated and user.is_active, request.get_ip(), request.path,
+                           request.get_referrer(), now())
+
+
+class AccessBuffer(ProcessBuffer):
+    """
+    Tampon local des accès au site
+
+    Les accès sont accumulés dans le processus courant puis envoyés
+    par lots à la tâche add_access_batch, lorsque le tampon atteint
+    une taille ou un âge maximum (voir ProcessBuffer).
+    """
+
+    def __init__(self, size=None, delay=None):
+        """
+        Initialiser le tampon
+
+        :param size: nombre d'accès déclenchant l'envoi du lot
+        :param delay: âge maximum en secondes du lot avant envoi
+        """
+        super(AccessBuffer, self).__init__(size or getattr(settings, 'USER_ACCESS_BUFFER_SIZE', 64), delay or getattr(settings, 'USER_ACCESS_BUFFER_DELAY', 10))
+
+    # Setter
+    def add(self, request):
+        """
+        Ajouter un accès au tampon, et envoyer le lot si nécessaire
+
+        :param request: objet HttpRequest
+        """
+        self.append(AccessEntry.from_request(request))
+
+    # Privé
+    def _send(self, batch):
+        """ Envoyer un lot d'accès à la tâche d'enregistrement, ou l'écrire directement si Celery est indisponible """
+        from scoop.user.access.tasks import add_access_batch
+        try:
+            add_access_batch.delay(batch)
+        except Exception as e:
+            logger.warning("Could not send {count} access entries: {error}".format(count=len(batch), error=e))
+            self._write(batch)
+
+    @staticmethod
+    def _write(batch):
+        """ Écrire un lot d'accès en base de données """
+        from scoop.user.access.tasks import add_access_batch
+        try:
+            add_access_batch(batch)
+        except Exception as e:
+            logger.warning("Could not write {count} access entries: {error}".format(count=len(batch), error=e))
+
+
+# Tampon du processus
+access_buffer = AccessBuffer()
@@ -0,0 +1,119 @@
+# coding: utf-8
+import logging
+import os
+import threading
+from functools import lru_cache
+
+import pygeoip
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GeoIPResolver(object):
+    """
+    Résolution GeoIP des adresses IP
+
+    Les bases GeoIP (pays/ville) et GeoISP (FAI) sont ouvertes une seule fois
+    par processus, en mode memory-mapped, à la première résolution.
+    Les résultats sont conservés par IP dans un cache LRU borné.
+    """
+
+    def __init__(self, size=None):
+        """
+        Initialiser le résolveur
+
+        :param size: nombre maximum d'IP en cache, USER_ACCESS_GEOIP_CACHE_SIZE par défaut
+        """
+        self.size = size or getattr(settings, 'USER_ACCESS_GEOIP_CACHE_SIZE', 65536)
+        self.databases = dict()
+        self.pid = None
+        self.lock = threading.Lock()
+        self._get_record = lru_cache(maxsize=self.size)(self._lookup_record)
+        self._get_isp = lru_cache(maxsize=self.size)(self._lookup_isp)
+
+    # Getter
+    def get_database(self, name):
+        """
+        Renvoyer une base GeoIP ouverte, ou None si elle n'est pas configurée
+
+        :param name: nom du réglage du chemin de la base, GEOIP_PATH ou GEOISP_PATH
+        """
+        if self.pid != os.getpid():
+            # Ne pas partager les bases et le cache avec un processus parent
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.clear()
+                    self.databases, self.pid = dict(), os.getpid()
+        if name not in self.databases:
+            with self.lock:
+                if name not in self.databases:
+                    path = getattr(settings, name, None)
+                    try:
+                        self.databases[name] = pygeoip.GeoIP(path, flags=pygeoip.MMAP_CACHE) if path else None
+                    except (IOError, OSError) as e:
+                        logger.warning("Could not open the GeoIP database {path}: {error}".format(path=path, error=e))
+                        self.databases[name] = None
+        return self.databases[name]
+
+    def get_record(self, ip):
+        """
+        Renvoyer les informations de localisation d'une IP
+
+        :param ip: chaîne de l'IP, A.B.C.D
+        :returns: un dictionnaire avec notamment country_code, latitude, longitude et city, vide si l'IP est inconnue
+        """
+        return dict(self._get_record(ip))
+
+    def get_isp(self, ip):
+        """ Renvoyer le FAI d'une IP, ou une chaîne vide """
+        return self._get_isp(ip)
+
+    def resolve(self, ip):
+        """
+        Renvoyer les champs de localisation d'une IP pour le modèle IP
+
+        :returns: un dictionnaire avec les clés isp, country, latitude, longitude et city_name
+        """
+        record = self._get_record(ip)
+        return {'isp': self._get_isp(ip)[0:64], 'country': (record.get('country_code') or "").upper(), 'latitude': record.get('latitude') or 0.0,
+                'longitude': record.get('longitude') or 0.0, 'city_name': record.get('city') or ""}
+
+    def resolve_many(self, ips):
+        """
+        Renvoyer les champs de localisation de plusieurs IP
+
+        Les bases ne sont interrogées qu'une fois par IP distincte absente du cache.
+        :param ips: chaînes des IP
+        :returns: un dictionnaire {chaîne de l'IP: champs de localisation}
+        """
+        return {ip: self.resolve(ip) for ip in set(ips)}
+
+    # Actions
+    def clear(self):
+        """ Vider le cache des résultats """
+        self._get_record.cache_clear()
+        self._get_isp.cache_clear()
+
+    # Privé
+    def _lookup_record(self, ip):
+        """ Interroger la base GeoIP pour une IP """
+        database = self.get_database('GEOIP_PATH')
+        try:
+            return (database.record_by_addr(ip) if database else None) or dict()
+        except Exception as e:
+            logger.warning("Could not resolve the location of {ip}: {error}".format(ip=ip, error=e))
+            return dict()
+
+    def _lookup_isp(self, ip):
+        """ Interroger la base GeoISP pour une IP """
+        database = self.get_database('GEOISP_PATH')
+        try:
+            return (database.org_by_addr(ip) if database else None) or ""
+        except Exception as e:
+            logger.warning("Could not resolve the ISP of {ip}: {error}".format(ip=ip, error=e))
+            return ""
+
+
+# Résolveur du processus
+geoip_resolver = GeoIPResolver()
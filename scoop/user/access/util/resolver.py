@@ -0,0 +1,193 @@
+# coding: utf-8
+"""
+Résolution DNS inverse asynchrone
+
+Les requêtes PTR sont envoyées en UDP non bloquant, plusieurs centaines à la fois,
+et les réponses sont associées aux requêtes par leur identifiant. Les réponses
+positives et négatives sont conservées dans le cache Django selon leur TTL.
+"""
+import logging
+import random
+import selectors
+import socket
+import time
+from collections import OrderedDict, defaultdict, deque
+
+import dns.exception
+import dns.message
+import dns.rcode
+import dns.rdatatype
+from dns import resolver as dnsresolver
+from dns import reversename
+
+from django.conf import settings
+from django.core.cache import cache
+from scoop.user.access.util.access import STATUS
+
+logger = logging.getLogger(__name__)
+
+
+class ReverseResolver(object):
+    """ Résolveur DNS inverse non bloquant, par lots """
+
+    # Constantes
+    CACHE_KEY = 'access.reverse.{ip}'
+    MIN_TTL = 60
+
+    def __init__(self, nameservers=None, timeout=None, retries=None, concurrency=None, ttl=None, negative_ttl=None):
+        """
+        Initialiser le résolveur
+
+        :param nameservers: serveurs DNS, "hôte" ou (hôte, port), USER_ACCESS_DNS_NAMESERVERS ou ceux du système par défaut
+        :param timeout: délai d'attente d'une réponse, en secondes
+        :param retries: nombre de nouvelles tentatives, sur le serveur suivant, d'une requête sans réponse
+        :param concurrency: nombre maximum de requêtes en cours
+        :param ttl: durée maximum de cache d'une réponse positive, en secondes
+        :param negative_ttl: durée maximum de cache d'une réponse négative, en secondes
+        """
+        self.nameservers = nameservers or getattr(settings, 'USER_ACCESS_DNS_NAMESERVERS', None)
+        self.timeout = timeout or getattr(settings, 'USER_ACCESS_DNS_TIMEOUT', 1.25)
+        self.retries = retries if retries is not None else getattr(settings, 'USER_ACCESS_DNS_RETRIES', 2)
+        self.concurrency = concurrency or getattr(settings, 'USER_ACCESS_DNS_CONCURRENCY', 256)
+        self.ttl = ttl or getattr(settings, 'USER_ACCESS_DNS_TTL', 86400)
+        self.negative_ttl = negative_ttl or getattr(settings, 'USER_ACCESS_DNS_NEGATIVE_TTL', 3600)
+
+    # Getter
+    def get_nameservers(self):
+        """ Renvoyer les adresses (hôte, port) des serveurs DNS """
+        nameservers = self.nameservers or dnsresolver.get_default_resolver().nameservers
+        return [(item, 53) if isinstance(item, str) else tuple(item) for item in nameservers]
+
+    def resolve(self, ip, use_cache=True):
+        """
+        Résoudre une adresse IP en son nom inversé
+
+        :param ip: chaîne de type A.B.C.D
+        :returns: dictionnaire aux clés "name" et "status", comme reverse_lookup
+        """
+        return self.resolve_many([ip], use_cache=use_cache)[ip]
+
+    def resolve_many(self, ips, use_cache=True):
+        """
+        Résoudre plusieurs adresses IP en leur nom inversé
+
+        :param ips: chaînes de type A.B.C.D
+        :param use_cache: utiliser les réponses en cache
+        :returns: un dictionnaire {chaîne de l'IP: {"name", "status"}}
+        """
+        ips, results = list(OrderedDict.fromkeys(ips)), dict()
+        if use_cache:
+            cached = cache.get_many([self.CACHE_KEY.format(ip=ip) for ip in ips])
+            results.update({ip: cached[self.CACHE_KEY.format(ip=ip)] for ip in ips if self.CACHE_KEY.format(ip=ip) in cached})
+        answers, expiries = self._query([ip for ip in ips if ip not in results]), defaultdict(dict)
+        for ip, (result, ttl) in answers.items():
+            results[ip] = result
+            if ttl:
+                expiries[ttl][self.CACHE_KEY.format(ip=ip)] = result
+        for ttl, values in expiries.items():
+            cache.set_many(values, ttl)
+        return results
+
+    # Privé
+    def _query(self, ips):
+        """
+        Envoyer les requêtes PTR des IP et attendre leurs réponses
+
+        :returns: un dictionnaire {chaîne de l'IP: (résultat, durée de cache ou None)}
+        """
+        results, queue, pending = dict(), deque((ip, 0) for ip in ips), OrderedDict()
+        if not queue:
+            return results
+        selector, sockets = selectors.DefaultSelector(), []
+        try:
+            for index, address in enumerate(self.get_nameservers()):
+                sock = socket.socket(socket.AF_INET6 if ':' in address[0] else socket.AF_INET, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                sock.connect(address)
+                selector.register(sock, selectors.EVENT_READ, index)
+                sockets.append(sock)
+            if not sockets:
+                return {ip: ({'name': '', 'status': STATUS['nonameservers']}, None) for ip in ips}
+            while queue or pending:
+                # Envoyer des requêtes tant que la fenêtre n'est pas pleine
+                while queue and len(pending) < self.concurrency:
+                    self._send(sockets, queue.popleft(), pending, results)
+                if not pending:
+                    continue
+                # Les requêtes en cours sont dans l'ordre de leur échéance
+                wait = max(0.0, next(iter(pending.values()))[2] - time.monotonic())
+                for key, _ in selector.select(wait):
+                    self._receive(key.fileobj, key.data, pending, queue, results)
+                now = time.monotonic()
+                while pending and next(iter(pending.values()))[2] <= now:
+                    self._retry(pending.popitem(last=False)[1], queue, results, STATUS['timeout'])
+        finally:
+            selector.close()
+            for sock in sockets:
+                sock.close()
+        return results
+
+    def _send(self, sockets, item, pending, results):
+        """ Envoyer la requête PTR d'une IP au serveur correspondant à sa tentative """
+        ip, attempt = item
+        try:
+            query = dns.message.make_query(reversename.from_address(ip), dns.rdatatype.PTR)
+        except (dns.exception.SyntaxError, ValueError):
+            results[ip] = ({'name': '', 'status': STATUS['nxdomain']}, None)
+            return
+        query.id = random.randint(0, 65535)
+        while query.id in pending:
+            query.id = random.randint(0, 65535)
+        index = attempt % len(sockets)
+        try:
+            sockets[index].send(query.to_wire())
+        except OSError as e:
+            # La requête expirera et sera retentée
+            logger.debug("Could not send the PTR query for {ip}: {error}".format(ip=ip, error=e))
+        pending[query.id] = (ip, attempt, time.monotonic() + self.timeout, query, index)
+
+    def _receive(self, sock, index, pending, queue, results):
+        """ Lire toutes les réponses disponibles d'un serveur """
+        while True:
+            try:
+                wire = sock.recv(65535)
+            except OSError:
+                # Plus de données, ou serveur injoignable (ICMP)
+                break
+            try:
+                response = dns.message.from_wire(wire)
+            except dns.exception.DNSException:
+                continue
+            entry = pending.get(response.id)
+            if entry is None or entry[4] != index or not entry[3].is_response(response):
+                continue
+            del pending[response.id]
+            ip, rcode = entry[0], response.rcode()
+            if rcode == dns.rcode.NOERROR:
+                answers = [rrset for rrset in response.answer if rrset.rdtype == dns.rdatatype.PTR and len(rrset) > 0]
+                if answers:
+                    results[ip] = ({'name': answers[0][0].to_text(), 'status': STATUS['ok']}, max(self.MIN_TTL, min(answers[0].ttl, self.ttl)))
+                else:
+                    results[ip] = ({'name': '', 'status': STATUS['noanswer']}, self._get_negative_ttl(response))
+            elif rcode == dns.rcode.NXDOMAIN:
+                results[ip] = ({'name': '', 'status': STATUS['nxdomain']}, self._get_negative_ttl(response))
+            else:
+                self._retry(entry, queue, results, STATUS['nonameservers'])
+
+    def _retry(self, entry, queue, results, status):
+        """ Retenter une requête sur le serveur suivant, ou enregistrer son échec """
+        if entry[1] < self.retries:
+            queue.appendleft((entry[0], entry[1] + 1))
+        else:
+            results[entry[0]] = ({'name': '', 'status': status}, None)
+
+    def _get_negative_ttl(self, response):
+        """ Renvoyer la durée de cache d'une réponse négative, selon le SOA de la réponse (RFC 2308) """
+        for rrset in response.authority:
+            if rrset.rdtype == dns.rdatatype.SOA and len(rrset) > 0:
+                return max(self.MIN_TTL, min(rrset.ttl, rrset[0].minimum, self.negative_ttl))
+        return self.negative_ttl
+
+
+# Résolveur du processus
+reverse_resolver = ReverseResolver()
@@ -1,4 +1,5 @@
 # coding: utf-8
 from .auth.anonymous import AnonymousUserBackend
+from .auth.cached import CachedPermissionBackend
 from .auth.default import CaseInsensitiveModelBackend
 from .auth.email import CaseInsensitiveEmailModelBackend
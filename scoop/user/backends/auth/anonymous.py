@@ -4,7 +4,9 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 from django.db.models.signals import pre_save
 from django.dispatch.dispatcher import receiver
+from scoop.user.backends.auth.cached import CachedPermissionBackend
 from scoop.user.models.user import User
+from scoop.user.util.permission import permission_cache
 
 
 def get_anon_user_name():
@@ -20,19 +22,26 @@ def disable_anon_user_password_save(sender, **kwargs):
         raise ValueError("Can't set anonymous user password to something other than unusable password")
 
 
-class AnonymousUserBackend(ModelBackend):
+class AnonymousUserBackend(CachedPermissionBackend):
     """ Backend d'authentification pour l'utilisateur anonyme """
 
-    def get_all_permissions(self, user_obj):
+    def get_all_permissions(self, user_obj, obj=None):
         """ Renvoyer les permissions de l'utilisateur """
         if user_obj.is_anonymous():
             if not hasattr(user_obj, '_perm_cache'):
-                anon_user_name = get_anon_user_name()
-                anon_user, _ = get_user_model().all_objects.get_or_create(pk=0, username=anon_user_name, is_active=False)
-                anon_user.set_unusable_password()
-                user_obj._perm_cache = self.get_all_permissions(anon_user)
+                if not permission_cache.is_enabled():
+                    user_obj._perm_cache = self.get_anonymous_permissions()
+                else:
+                    user_obj._perm_cache = permission_cache.get(0, self.get_anonymous_permissions)
             return user_obj._perm_cache
-        return super(AnonymousUserBackend, self).get_all_permissions(user_obj)
+        return super(AnonymousUserBackend, self).get_all_permissions(user_obj, obj)
+
+    def get_anonymous_permissions(self):
+        """ Renvoyer les permissions de l'utilisateur anonyme en base """
+        anon_user_name = get_anon_user_name()
+        anon_user, _ = get_user_model().all_objects.get_or_create(pk=0, username=anon_user_name, is_active=False)
+        anon_user.set_unusable_password()
+        return ModelBackend.get_all_permissions(self, anon_user)
 
     def authenticate(self, username=None, password=None):
         """ Authentifier via identifiants """
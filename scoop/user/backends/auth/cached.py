@@ -0,0 +1,17 @@
+# coding: utf-8
+from django.contrib.auth.backends import ModelBackend
+from scoop.user.util.permission import permission_cache
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ Backend d'authentification dont les permissions résolues sont partagées via le cache """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        """ Renvoyer les permissions de l'utilisateur, depuis le cache partagé si possible """
+        if not user_obj.is_active or user_obj.is_anonymous() or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            if not permission_cache.is_enabled():
+                return super(CachedPermissionBackend, self).get_all_permissions(user_obj)
+            user_obj._perm_cache = permission_cache.get(user_obj.pk, lambda: super(CachedPermissionBackend, self).get_all_permissions(user_obj))
+        return user_obj._perm_cache
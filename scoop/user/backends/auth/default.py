@@ -1,9 +1,9 @@
 # coding: utf-8
-from django.contrib.auth.backends import ModelBackend
+from scoop.user.backends.auth.cached import CachedPermissionBackend
 from scoop.user.models.user import User
 
 
-class CaseInsensitiveModelBackend(ModelBackend):
+class CaseInsensitiveModelBackend(CachedPermissionBackend):
     """ Backend d'authentification ignorant la casse """
 
     def authenticate(self, username=None, password=None):
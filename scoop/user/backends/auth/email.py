@@ -1,10 +1,10 @@
 # coding: utf-8
-from django.contrib.auth.backends import ModelBackend
 from django.db.models import Q
+from scoop.user.backends.auth.cached import CachedPermissionBackend
 from scoop.user.models.user import User
 
 
-class CaseInsensitiveEmailModelBackend(ModelBackend):
+class CaseInsensitiveEmailModelBackend(CachedPermissionBackend):
     """ Backend d'authentification via identifiants email/username """
 
     def authenticate(self, username=None, password=None, **kwargs):
@@ -1,6 +1,7 @@
 # coding: utf-8
 from .activation import activation_check, deactivation_update
 from .migrate import create_testuser
+from .permission import group_permissions_changed, permission_changed, user_flags_changed, user_permissions_changed
 from .profile import profile_is_banned
 from .registration import form_check_name, form_check_email
 from .user import check_stale_user, demotion_actions, login_actions, logout_actions, user_created
@@ -0,0 +1,48 @@
+# coding: utf-8
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch.dispatcher import receiver
+from scoop.user.models.user import User
+from scoop.user.util.permission import PermissionCache, permission_cache
+
+CHANGE_ACTIONS = {'post_add', 'post_remove', 'post_clear'}
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """ Invalider les permissions en cache lorsque les groupes ou permissions d'utilisateurs changent """
+    if action in CHANGE_ACTIONS:
+        if not reverse:
+            permission_cache.invalidate(instance.pk)
+        elif pk_set:
+            permission_cache.invalidate(*pk_set)
+        else:
+            # Vidage depuis un groupe ou une permission : utilisateurs concernés inconnus
+            permission_cache.invalidate_all()
+
+
+@receiver(post_save, sender=User)
+def user_flags_changed(sender, instance, created, **kwargs):
+    """ Invalider les permissions en cache d'un utilisateur lorsque is_active ou is_superuser change """
+    # Les champs différés non assignés valent None des deux côtés, sans requête supplémentaire
+    flags = tuple(instance.__dict__.get(name) for name in PermissionCache.FLAGS)
+    # Statut retenu par User.from_db : absent pour une instance qui n'a pas été lue en base
+    if not created and instance.__dict__.get('_permission_flags') != flags:
+        permission_cache.invalidate(instance.pk)
+    instance._permission_flags = flags
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    """ Invalider toutes les permissions en cache lorsque les permissions d'un groupe changent """
+    if action in CHANGE_ACTIONS:
+        permission_cache.invalidate_all()
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Group)
+def permission_changed(sender, **kwargs):
+    """ Invalider toutes les permissions en cache lorsqu'une permission ou un groupe change """
+    permission_cache.invalidate_all()
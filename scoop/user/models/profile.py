@@ -19,7 +19,6 @@ from scoop.core.abstract.core.namedfilter import NamedFilterManager
 from scoop.core.abstract.social.like import LikableModel
 from scoop.core.util.data.dateutil import is_new
 from scoop.core.util.django.apps import is_installed
-from scoop.core.util.model.model import SingleDeleteQuerySetMixin
 from scoop.core.util.shortcuts import addattr
 from scoop.user.util.signals import check_stale, check_unused, profile_banned, profile_picture_changed
 
@@ -39,7 +38,7 @@ class ProfileQuerySetMixin(object):
         return self.get(user__uuid=uuid)
 
 
-class ProfileQuerySet(models.QuerySet, SingleDeleteQuerySetMixin, ProfileQuerySetMixin):
+class ProfileQuerySet(models.QuerySet, ProfileQuerySetMixin):
     """ Queryset des profils """
     pass
 
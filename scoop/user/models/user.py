@@ -23,12 +23,13 @@ from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import pgettext_lazy
 from scoop.core.abstract.core.uuid import UUID64Model
 from scoop.core.util.django.apps import is_installed
-from scoop.core.util.model.model import SingleDeleteQuerySetMixin
 from scoop.core.util.shortcuts import addattr
+from scoop.user.util.permission import PermissionCache, permission_cache
+from scoop.user.util.presence import presence
 from scoop.user.util.signals import check_stale, online_status_updated, user_activated, user_deactivated
 
 
-class UserQuerySet(models.QuerySet, SingleDeleteQuerySetMixin, BaseUserManager):
+class UserQuerySet(models.QuerySet, BaseUserManager):
     """ Queryset des utilisateurs """
 
     # Getter
@@ -188,6 +189,15 @@ class UserQuerySet(models.QuerySet, SingleDeleteQuerySetMixin, BaseUserManager):
         for user in users:
             user.force_logout()
 
+    # Overrides
+    def update(self, **kwargs):
+        """ Mettre à jour les utilisateurs, sans signal post_save : invalider les permissions en cache si leur statut change """
+        keys = list(self.values_list('pk', flat=True)) if set(PermissionCache.FLAGS).intersection(kwargs) else []
+        updated = super(UserQuerySet, self).update(**kwargs)
+        if keys:
+            permission_cache.invalidate(*keys)
+        return updated
+
 
 class User(AbstractBaseUser, PermissionsMixin, UUID64Model):
     """ Utilisateur """
@@ -195,8 +205,7 @@ class User(AbstractBaseUser, PermissionsMixin, UUID64Model):
     # Constantes
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email', 'name']
-    CACHE_KEY = {'online': 'user.profile.online.{}', 'online.set': 'user.profile.online.set', 'online.count': 'user.profile.online.count',
-                 'logout.force': 'user.profile.logout.{}'}
+    CACHE_KEY = {'logout.force': 'user.profile.logout.{}'}
     USERNAME_REGEX = r'^[^\W_][\w]+$'  # Contient lettres, chiffres et underscores
     USERNAME_REGEX_MESSAGE = _("Your name must start with a letter and can only contain letters, digits and underscores")
     USERNAME_VALIDATORS = [RegexValidator(regex=USERNAME_REGEX, message=USERNAME_REGEX_MESSAGE, flags=re.LOCALE), MinLengthValidator(4)]
@@ -220,6 +229,13 @@ class User(AbstractBaseUser, PermissionsMixin, UUID64Model):
     objects_base = BaseUserManager()
 
     # Overrides
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """ Renvoyer une instance lue en base, en retenant le statut dont dépendent ses permissions """
+        instance = super(User, cls).from_db(db, field_names, values)
+        instance._permission_flags = tuple(instance.__dict__.get(name) for name in PermissionCache.FLAGS)
+        return instance
+
     def __str__(self):
         """ Renvoyer la représentation unicode de l'objet """
         if self.deleted:
@@ -289,7 +305,7 @@ class User(AbstractBaseUser, PermissionsMixin, UUID64Model):
     @addattr(short_description=_("Online time"))
     def get_online_time(self):
         """ Renvoyer l'heure du dernier accès à une page """
-        value = cache.get(self.CACHE_KEY['online'].format(self.id), 0)
+        value = presence.get_last_seen(self.id) or 0
         return datetime.datetime.fromtimestamp(value)
 
     @addattr(short_description=_("Time online"))
@@ -301,17 +317,19 @@ class User(AbstractBaseUser, PermissionsMixin, UUID64Model):
     @staticmethod
     def get_online_set():
         """ Renvoyer un set d'ID de membres en ligne """
-        return cache.get(User.CACHE_KEY['online.set'], set())
+        return presence.get_user_ids()
 
     @staticmethod
     def get_online_count(compute=False):
-        """ Renvoyer le nombre d'utilisateurs en ligne """
-        count = cache.get(User.CACHE_KEY['online.count'], None if compute else 0)
-        if count is None:  # aucun résultat et compute est True, recalculer
+        """
+        Renvoyer le nombre d'utilisateurs en ligne
+
+        :param compute: compter les utilisateurs en ligne depuis la base de données
+        """
+        if compute is True:
             online_limit = timezone.now() - timedelta(seconds=User.ONLINE_DURATION)
-            count = User.objects.filter(last_online__gt=online_limit).count()
-            cache.set(User.CACHE_KEY['online.count'], count, 2592000)
-        return count
+            return User.objects.filter(last_online__gt=online_limit).count()
+        return presence.get_count()
 
     @staticmethod
     def get_online_users(**kwargs):
@@ -324,8 +342,7 @@ class User(AbstractBaseUser, PermissionsMixin, UUID64Model):
     @staticmethod
     def is_user_online(user_id, seconds=ONLINE_DURATION):
         """ Renvoyer si l'utilisateur portant un ID est en ligne """
-        value = cache.get(User.CACHE_KEY['online'].format(user_id), None)
-        return value is not None and (value + seconds >= time.time())
+        return presence.is_online(user_id, seconds)
 
     @staticmethod
     def is_user_away(user_id, seconds=AWAY_DURATION):
@@ -336,49 +353,27 @@ class User(AbstractBaseUser, PermissionsMixin, UUID64Model):
     def get_user_time_online(user_id):
         """ Renvoyer le temps écoulé depuis que l'utilisateur avec un ID a accédé à une page """
         timestamp = int(time.time()) + 1
-        value = cache.get(User.CACHE_KEY['online'].format(user_id), 0)
+        value = presence.get_last_seen(user_id)
         return datetime.timedelta(seconds=timestamp - value) if value else None
 
     def update_online(self, online=True):
         """ Mettre à jour l'état en ligne/hors ligne de l'utilisateur """
         is_online = self.is_online()
-        key = User.CACHE_KEY['online'].format(self.pk)
         if is_online != online:
             online_status_updated.send(self, online=online)
-            if not is_online:
-                User._add_to_online_list(self.id)
-        cache.set(key, round(time.time()) if online else 0)
-
-    @staticmethod
-    def _add_to_online_list(user_id):
-        """ Ajouter l'ID d'un utilisateur à la liste des ID de membres en ligne """
-        user_ids = cache.get(User.CACHE_KEY['online.set'], set())
-        if user_id not in user_ids:
-            count = User.get_online_count(compute=False)
-            user_ids.add(user_id)
-            cache.set_many({User.CACHE_KEY['online.set']: user_ids, User.CACHE_KEY['online.count']: count + 1}, 2592000)
+        if online:
+            presence.touch(self.pk)
+        else:
+            presence.remove(self.pk)
 
     @staticmethod
     def _clean_online_list():
-        """ Nettoyer la liste des utilisateurs connectés """
-        now = time.time()
-        user_ids = User.get_online_set()
-        user_keys = [User.CACHE_KEY['online'].format(user_id) for user_id in user_ids]
-        discarded_ids = []
-        values = cache.get_many(user_keys)
-        online = {key: (value is not None and value + User.ONLINE_DURATION >= now) for key, value in values.items()}
-        start = count = User.get_online_count()
-        for user_id in user_ids:
-            user_key = User.CACHE_KEY['online'].format(user_id)
-            if not online.get(user_key, None):
-                discarded_ids.append(user_id)
-                count -= 1
-        for discarded_id in discarded_ids:
-            user_ids.discard(discarded_id)
-        if start > count:
-            cache.set(User.CACHE_KEY['online.set'], user_ids, 2592000)
-            cache.set(User.CACHE_KEY['online.count'], len(user_ids), 2592000)
-        return len(user_ids)
+        """
+        Renvoyer le nombre d'utilisateurs connectés
+
+        Les tranches de présence expirent d'elles-mêmes, aucun nettoyage n'est nécessaire.
+        """
+        return presence.get_count()
 
     # Getter
     @staticmethod
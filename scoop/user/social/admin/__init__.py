@@ -1,4 +1,4 @@
 # coding: utf-8
 from .admin import (GroupAdmin, LikeAdmin, PostAdmin)
 from .event import (EventAdmin, EventCategoryAdmin, EventCategoryInlineAdmin)
-from .friend import (FriendGroupAdmin, FriendListAdmin)
+from .friend import (FriendGroupAdmin, FriendListAdmin, FriendshipAdmin)
@@ -3,6 +3,7 @@ from ajax_select.admin import AjaxSelectAdmin
 from django.contrib import admin
 from scoop.user.social.models.friend.friendgroup import FriendGroup
 from scoop.user.social.models.friend.friendlist import FriendList
+from scoop.user.social.models.friend.friendship import Friendship
 
 
 @admin.register(FriendList)
@@ -24,3 +25,13 @@ class FriendGroupAdmin(admin.ModelAdmin):
     list_filter = []
     list_editable = []
     readonly_fields = ['user']
+
+
+@admin.register(Friendship)
+class FriendshipAdmin(admin.ModelAdmin):
+    """ Admin des liens d'amitié """
+    list_select_related = True
+    list_display = ['id', 'user', 'friend', 'state', 'time']
+    list_filter = ['state']
+    list_editable = []
+    raw_id_fields = ['user', 'friend']
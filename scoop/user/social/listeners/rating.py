@@ -0,0 +1,13 @@
+# coding: utf-8
+from django.db.models.signals import post_delete
+from django.dispatch.dispatcher import receiver
+from scoop.user.social.models.rating.summary import RatingSummary, SummarizedModel
+
+__all__ = ['summary_discount']
+
+
+@receiver(post_delete)
+def summary_discount(sender, instance, using, **kwargs):
+    """ Retirer une note, un like ou un score supprimé des résumés """
+    if isinstance(instance, SummarizedModel):
+        RatingSummary.objects.tally(instance, -1)
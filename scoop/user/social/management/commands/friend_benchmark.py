@@ -0,0 +1,86 @@
+# coding: utf-8
+import random
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from scoop.user.social.models.friend.friendlist import FriendList
+from scoop.user.social.models.friend.friendship import Friendship
+
+
+class Command(BaseCommand):
+    """ Comparer les requêtes d'amis sur les listes sérialisées et sur la table des liens """
+    args = ''
+    help = 'Compare friend queries on pickled friend lists and on the indexed friendship table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', '-u', action='store', type=int, dest='users', default=2000, help='Number of synthetic users.')
+        parser.add_argument('--degree', '-d', action='store', type=int, dest='degree', default=50, help='Average number of friends per user.')
+        parser.add_argument('--queries', '-q', action='store', type=int, dest='queries', default=500, help='Number of queries per test.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        count, degree, queries = options['users'], options['degree'], options['queries']
+        random.seed(count)
+        with transaction.atomic():
+            users = self.make_users(count)
+            self.make_graph([user.pk for user in users], degree)
+            pairs = [(random.choice(users), random.choice(users)) for _ in range(queries)]
+            for label, method in [("Pickled lists", self.legacy_queries), ("Friendship table", self.link_queries)]:
+                timings = ["{name} {rate:.0f}/s".format(name=name, rate=queries / elapsed) for name, elapsed in method(pairs)]
+                print("{label}: {timings}".format(label=label, timings=", ".join(timings)))
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def make_users(count):
+        """ Créer des utilisateurs synthétiques et leurs listes d'amis """
+        User = get_user_model()
+        User.objects.bulk_create([User(username='friendbench{0}'.format(index), email='friendbench{0}@foo.bar'.format(index)) for index in range(count)],
+                                 batch_size=1000)
+        users = list(User.objects.filter(username__startswith='friendbench'))
+        FriendList.objects.bulk_create([FriendList(user=user) for user in users], batch_size=1000)
+        return users
+
+    @staticmethod
+    def make_graph(ids, degree):
+        """ Créer un graphe social aléatoire, sérialisé et sous forme de liens """
+        now, graph = timezone.now(), {uid: {} for uid in ids}
+        for _ in range(len(ids) * degree // 2):
+            uid1, uid2 = random.sample(ids, 2)
+            graph[uid1][uid2] = graph[uid2][uid1] = [now]
+        for friendlist in FriendList.objects.filter(user_id__in=ids).iterator():
+            friendlist.set_data('friends', graph[friendlist.user_id], save=True)
+        Friendship.objects.bulk_create([Friendship(user_id=uid1, friend_id=uid2, time=now) for uid1 in graph for uid2 in graph[uid1]], batch_size=2000)
+
+    @staticmethod
+    def legacy_queries(pairs):
+        """ Mesurer les requêtes en désérialisant les listes d'amis """
+        timings = []
+
+        def _friend_ids(user):
+            """ Lire les ids des amis depuis les données sérialisées """
+            return frozenset(FriendList.objects.get(user=user).get_data('friends', {}).keys())
+
+        for name, query in [("is_friend", lambda user1, user2: user2.pk in _friend_ids(user1)),
+                            ("mutual", lambda user1, user2: len(_friend_ids(user1) & _friend_ids(user2))),
+                            ("friends of friends", lambda user1, user2: len(frozenset().union(*[_friend_ids(uid) for uid in _friend_ids(user1)])))]:
+            start = perf_counter()
+            for user1, user2 in pairs:
+                query(user1, user2)
+            timings.append((name, perf_counter() - start))
+        return timings
+
+    @staticmethod
+    def link_queries(pairs):
+        """ Mesurer les requêtes indexées sur la table des liens """
+        timings = []
+        for name, query in [("is_friend", lambda user1, user2: Friendship.objects.is_friend(user1, user2)),
+                            ("mutual", lambda user1, user2: Friendship.objects.get_mutual_ids(user1, user2).count()),
+                            ("friends of friends", lambda user1, user2: Friendship.objects.get_unknown_ids(user1).count())]:
+            start = perf_counter()
+            for user1, user2 in pairs:
+                query(user1, user2)
+            timings.append((name, perf_counter() - start))
+        return timings
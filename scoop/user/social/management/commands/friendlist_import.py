@@ -0,0 +1,19 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from scoop.user.social.models.friend.friendship import Friendship
+
+
+class Command(BaseCommand):
+    """ Importer les listes d'amis sérialisées dans la table des liens d'amitié """
+    args = ''
+    help = 'Import pickled friend lists into the friendship link table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', dest='clear', default=False, help='Clear pickled friend list data once imported.')
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        with transaction.atomic():
+            created = Friendship.objects.import_friendlists(clear=options['clear'])
+        print("Imported {count} friendship links".format(count=created))
@@ -0,0 +1,14 @@
+# coding: utf-8
+from django.core.management.base import BaseCommand
+from scoop.user.social.models.rating.summary import RatingSummary
+
+
+class Command(BaseCommand):
+    """ Recalculer les résumés de notes, likes et scores """
+    args = ''
+    help = 'Rebuild rating, like and score summaries from their source tables'
+
+    def handle(self, *args, **options):
+        """ Exécuter la commande """
+        count = RatingSummary.objects.rebuild()
+        print("Rebuilt {count} rating summaries".format(count=count))
@@ -13,7 +13,6 @@ from scoop.core.abstract.core.uuid import UUID64Model
 from scoop.core.abstract.social.access import PrivacyModel
 from scoop.core.abstract.social.invite import InviteTargetModel
 from scoop.core.abstract.user.authored import AuthoredModel
-from scoop.core.util.model.model import SingleDeleteQuerySetMixin
 from scoop.user.social.models.event.attendance import Attendance
 
 
@@ -56,7 +55,7 @@ class OccurrenceQuerySetMixin(object):
         return self.at_date(when=when, event=event).exists()
 
 
-class OccurrenceQuerySet(models.QuerySet, SingleDeleteQuerySetMixin, OccurrenceQuerySetMixin):
+class OccurrenceQuerySet(models.QuerySet, OccurrenceQuerySetMixin):
     """ Queryset des récurrences d'événements """
     pass
 
@@ -1,3 +1,4 @@
 # coding: utf-8
 from .friendgroup import FriendGroup
 from .friendlist import FriendList
+from .friendship import Friendship
@@ -1,14 +1,12 @@
 # coding: utf-8
-from random import choice
-
 from annoying.fields import AutoOneToOneField
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from scoop.core.abstract.core.data import DataModel
 from scoop.core.util.model.model import SingleDeleteManager
+from scoop.user.social.models.friend.friendship import Friendship
 from scoop.user.social.util.signals import friend_accepted, friend_denied, friend_pending_new
 
 
@@ -18,11 +16,11 @@ class FriendListManager(SingleDeleteManager):
     # Getter
     def get_friend_ids(self, user):
         """ Renvoyer les ids des amis d'un utilisateur """
-        return user.friends.get_friend_ids()
+        return Friendship.objects.get_friend_ids(user)
 
     def exists(self, recipient, sender):
         """ Renvoyer si deux utilisateurs sont amis """
-        return recipient == sender or sender.pk in self.get_friend_ids(recipient)
+        return recipient == sender or Friendship.objects.is_friend(recipient, sender)
 
     def by_user(self, user):
         """ Renvoyer l'objet liste d'amis d'un utilisateur """
@@ -39,7 +37,13 @@ class FriendListManager(SingleDeleteManager):
 
 
 class FriendList(DataModel):
-    """ Liste d'amis """
+    """
+    Liste d'amis
+
+    Les amitiés et demandes sont stockées dans la table des liens Friendship.
+    Les clés de données ne servent plus qu'aux listes pas encore importées
+    (voir la commande friendlist_import).
+    """
 
     # Constantes
     DATA_KEYS = ['friends', 'received', 'sent']  # amis, demandes reçues, demandes envoyées
@@ -52,51 +56,51 @@ class FriendList(DataModel):
     # Getter
     def get_friend_ids(self):
         """ Renvoyer les ids des amis """
-        return self.get_data('friends', {}).keys()
+        return Friendship.objects.get_friend_ids(self.user)
 
     def get_received_ids(self):
         """ Renvoyer les ids des demandeurs en attente """
-        return self.get_data('received', {}).keys()
+        return list(Friendship.objects.received(self.user).values_list('user_id', flat=True))
 
     def get_sent_ids(self):
         """ Renvoyer les ids des utilisateurs sollicités """
-        return self.get_data('sent', {}).keys()
+        return list(Friendship.objects.sent(self.user).values_list('friend_id', flat=True))
 
     def is_friend(self, user):
         """ Renvoyer si un utilisateur est un ami """
-        return getattr(user, 'pk', user) in self.get_friend_ids()
+        return Friendship.objects.is_friend(self.user, getattr(user, 'pk', user))
 
     def is_received(self, user):
         """ Renvoyer si un utilisateur attend une validation """
-        return getattr(user, 'pk', user) in self.get_received_ids()
+        return Friendship.objects.is_sent(getattr(user, 'pk', user), self.user)
 
     def is_sent(self, user):
         """ Renvoyer si un utilisateur a reçu une requête """
-        return getattr(user, 'pk', user) in self.get_sent_ids()
+        return Friendship.objects.is_sent(self.user, getattr(user, 'pk', user))
 
     def get_friend_users(self):
         """ Renvoyer les utilisateurs amis """
-        return get_user_model().objects.filter(pk__in=self.get_friend_ids())
+        return get_user_model().objects.filter(pk__in=Friendship.objects.friends(self.user).values('friend'))
 
     def get_received_users(self):
         """ Renvoyer les utilisateurs en attente """
-        return get_user_model().objects.filter(pk__in=self.get_received_ids())
+        return get_user_model().objects.filter(pk__in=Friendship.objects.received(self.user).values('user'))
 
     def get_sent_users(self):
         """ Renvoyer les utilisateurs sollicités """
-        return get_user_model().objects.filter(pk__in=self.get_sent_ids())
+        return get_user_model().objects.filter(pk__in=Friendship.objects.sent(self.user).values('friend'))
 
     def get_friend_count(self):
         """ Renvoyer le nombre d'amis """
-        return len(self.get_data('friends', {}))
+        return Friendship.objects.friends(self.user).count()
 
     def get_received_count(self):
         """ Renvoyer le nombre d'utilisateurs en attente """
-        return len(self.get_data('received', {}))
+        return Friendship.objects.received(self.user).count()
 
     def get_sent_count(self):
         """ Renvoyer le nombre d'utilisateurs sollicités """
-        return len(self.get_data('sent', {}))
+        return Friendship.objects.sent(self.user).count()
 
     def get_all_users(self):
         """ Renvoyer tous les utilisateurs, par catégorie """
@@ -104,10 +108,8 @@ class FriendList(DataModel):
 
     def get_mutual_friend_users(self, user, count=False):
         """ Renvoyer les amis en commun avec un utilisateur """
-        self_ids = frozenset(self.get_friend_ids())
-        user_ids = frozenset(user.friends.get_friend_ids())
-        mutual_ids = list(self_ids.intersection(user_ids))
-        return len(mutual_ids) if count is True else get_user_model().objects.filter(pk__in=mutual_ids)
+        mutual_ids = Friendship.objects.get_mutual_ids(self.user, user)
+        return mutual_ids.count() if count is True else get_user_model().objects.filter(pk__in=mutual_ids)
 
     def get_distinct_friend_users(self, user, symmetric=False, count=False):
         """
@@ -124,16 +126,17 @@ class FriendList(DataModel):
         d'amis qui sont présents dans une seule des deux listes (renvoie plus d'entrées)
         (= amis(a) ∆ amis(b))
         """
-        self_ids = set(self.get_friend_ids())
-        user_ids = set(user.friends.get_friend_ids())
-        distinct_ids = list(self_ids.symmetric_difference(user_ids)) if symmetric else list(self_ids.difference(user_ids))
-        return len(distinct_ids) if count is True else get_user_model().objects.filter(pk__in=distinct_ids)
+        distinct_ids = Friendship.objects.get_distinct_ids(self.user, user, symmetric=symmetric)
+        return distinct_ids.count() if count is True else get_user_model().objects.filter(pk__in=distinct_ids)
+
+    def get_unknown_friend_users(self, count=False):
+        """ Renvoyer les amis d'amis qui ne sont pas amis """
+        unknown_ids = Friendship.objects.get_unknown_ids(self.user)
+        return unknown_ids.count() if count is True else get_user_model().objects.filter(pk__in=unknown_ids)
 
     def get_random_unknown_friend_users(self, count=10):
         """ Renvoyer une liste au hasard d'utilisateurs amis d'amis mais pas amis """
-        user = get_user_model().objects.get(id=choice(self.get_friend_ids()))
-        users = self.get_distinct_friend_users(user, False).order_by('?')[:count]
-        return users
+        return self.get_unknown_friend_users().order_by('?')[:count]
 
     def get_action_label(self, user):
         """
@@ -148,7 +151,7 @@ class FriendList(DataModel):
 
     def _get_active_friends(self):
         """ Générateur : Renvoyer la liste des amis avec des comptes encore actifs """
-        friends = self.get_users()
+        friends = self.get_friend_users()
         for friend in friends:
             if friend.can_login():
                 yield friend
@@ -157,77 +160,36 @@ class FriendList(DataModel):
     active_friends = property(_get_active_friends)
 
     # Setter
-    @transaction.atomic
     def add_friend(self, user, when=None):
         """ Ajouter un ami """
         if not self.is_friend(user) and user != self.user:
-            now = when or timezone.now()
-            friends = self.get_data('friends', {})
-            friends[user.pk] = [now]
-            self.set_data('friends', friends, save=True)
-            user.friends.add_friend(self.user)
-            self.remove_received(user)
+            Friendship.objects.link(self.user, user, when=when)
             return True
         return False
 
-    @transaction.atomic
     def add_received(self, user, when=None):
         """ Ajouter une demande reçue """
-        if not self.is_received(user) and not self.is_friend(user) and user != self.user:
-            now = when or timezone.now()
-            received = self.get_data('received', {})
-            received[user.pk] = [now]
-            self.set_data('received', received, save=True)
-            user.friends.add_sent(self.user)  # Par symétrie, ajouter un sent à l'autre utilisateur
-            friend_pending_new.send(sender=user, recipient=self.user)
-            return True
-        return False
+        return user.friends.add_sent(self.user, when=when)
 
-    @transaction.atomic
     def add_sent(self, user, when=None):
         """ Ajouter une demande envoyée """
         if not self.is_sent(user) and not self.is_friend(user) and user != self.user:
-            now = when or timezone.now()
-            sent = self.get_data('sent', {})
-            sent[user.pk] = [now]
-            self.set_data('sent', sent, save=True)
-            user.friends.add_received(self.user)  # Par symétrie, ajouter un received à l'autre utilisateur
-            friend_pending_new.send(sender=user, recipient=self.user)
+            Friendship.objects.request(self.user, user, when=when)
+            friend_pending_new.send(sender=self.user, recipient=user)
             return True
         return False
 
-    @transaction.atomic()
     def remove_friend(self, user):
         """ Supprimer un ami """
-        if self.is_friend(user):
-            friends = self.get_data('friends', {})
-            del friends[user.pk]
-            self.set_data('friends', friends, save=True)
-            user.friends.remove_friend(self.user)
-            return True
-        return False
+        return Friendship.objects.unlink(self.user, user)
 
-    @transaction.atomic()
     def remove_sent(self, user):
         """ Supprimer une demande envoyée """
-        if self.is_sent(user):
-            sent = self.get_data('sent', {})
-            del sent[user.pk]
-            self.set_data('sent', sent, save=True)
-            user.friends.remove_received(self.user)
-            return True
-        return False
+        return Friendship.objects.cancel(self.user, user)
 
-    @transaction.atomic()
     def remove_received(self, user):
         """ Supprimer une demande reçue """
-        if self.is_received(user):
-            received = self.get_data('received', {})
-            del received[user.pk]
-            self.set_data('received', received, save=True)
-            user.friends.remove_sent(self.user)
-            return True
-        return False
+        return Friendship.objects.cancel(user, self.user)
 
     @transaction.atomic()
     def accept_received(self, user):
@@ -0,0 +1,159 @@
+# coding: utf-8
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from scoop.core.util.model.model import SingleDeleteManager
+
+
+class FriendshipManager(SingleDeleteManager):
+    """
+    Manager des liens d'amitié
+
+    Une amitié est stockée sous forme de deux liens symétriques (user→friend et friend→user),
+    une demande sous forme d'un seul lien du demandeur vers l'utilisateur sollicité.
+    Les requêtes d'amis communs, d'amis d'amis etc. s'exécutent ainsi en une requête indexée.
+    """
+
+    # Getter
+    def friends(self, user):
+        """ Renvoyer les liens d'amitié d'un utilisateur """
+        return self.filter(user=user, state=Friendship.FRIEND)
+
+    def sent(self, user):
+        """ Renvoyer les demandes envoyées par un utilisateur """
+        return self.filter(user=user, state=Friendship.PENDING)
+
+    def received(self, user):
+        """ Renvoyer les demandes reçues par un utilisateur """
+        return self.filter(friend=user, state=Friendship.PENDING)
+
+    def get_friend_ids(self, user):
+        """ Renvoyer les ids des amis d'un utilisateur """
+        return list(self.friends(user).values_list('friend_id', flat=True))
+
+    def is_friend(self, user, friend):
+        """ Renvoyer si deux utilisateurs sont amis """
+        return self.friends(user).filter(friend=friend).exists()
+
+    def is_sent(self, user, friend):
+        """ Renvoyer si un utilisateur a envoyé une demande à un autre """
+        return self.sent(user).filter(friend=friend).exists()
+
+    def get_mutual_ids(self, user, other):
+        """ Renvoyer la requête des ids des amis communs à deux utilisateurs """
+        return self.friends(user).filter(friend__in=self.friends(other).values('friend')).values('friend')
+
+    def get_distinct_ids(self, user, other, symmetric=False):
+        """
+        Renvoyer la requête des ids des amis non communs à deux utilisateurs
+
+        :param symmetric: si False, renvoyer amis(user) ∖ amis(other), sinon amis(user) ∆ amis(other)
+        """
+        if symmetric:
+            links = self.filter(user__in=[user, other], state=Friendship.FRIEND).values('friend')
+            return links.annotate(links=Count('user')).filter(links=1).values('friend')
+        return self.friends(user).exclude(friend__in=self.friends(other).values('friend')).values('friend')
+
+    def get_unknown_ids(self, user):
+        """ Renvoyer la requête des ids des amis d'amis qui ne sont pas amis avec un utilisateur """
+        friends = self.friends(user).values('friend')
+        links = self.filter(user__in=friends, state=Friendship.FRIEND).exclude(friend=user).exclude(friend__in=friends)
+        return links.values('friend').distinct()
+
+    # Setter
+    @transaction.atomic
+    def link(self, user, friend, when=None):
+        """ Assigner deux utilisateurs comme amis, en remplaçant les demandes en cours """
+        self.between(user, friend).delete()
+        when = when or timezone.now()
+        self.bulk_create([Friendship(user=user, friend=friend, time=when), Friendship(user=friend, friend=user, time=when)])
+
+    def unlink(self, user, friend):
+        """ Supprimer le lien d'amitié entre deux utilisateurs """
+        return self._delete(self.between(user, friend).filter(state=Friendship.FRIEND))
+
+    def request(self, user, friend, when=None):
+        """ Enregistrer une demande d'un utilisateur vers un autre """
+        return self.create(user=user, friend=friend, state=Friendship.PENDING, time=when or timezone.now())
+
+    def cancel(self, user, friend):
+        """ Supprimer la demande d'un utilisateur vers un autre """
+        return self._delete(self.sent(user).filter(friend=friend))
+
+    def between(self, user, friend):
+        """ Renvoyer les liens dans les deux sens entre deux utilisateurs """
+        return self.filter(models.Q(user=user, friend=friend) | models.Q(user=friend, friend=user))
+
+    # Privé
+    @staticmethod
+    def _delete(links):
+        """ Supprimer des liens et renvoyer s'il en existait """
+        if links.exists():
+            links.delete()
+            return True
+        return False
+
+    # Actions
+    def import_friendlists(self, queryset=None, clear=False, batch_size=1000):
+        """
+        Créer les liens depuis les données sérialisées des listes d'amis
+
+        Les liens déjà existants ne sont pas modifiés ; une amitié
+        l'emporte sur une demande entre les mêmes utilisateurs.
+        :param queryset: listes d'amis à importer, toutes par défaut
+        :param clear: vider les données sérialisées après l'import
+        :returns: le nombre de liens créés
+        """
+        from scoop.user.social.models.friend.friendlist import FriendList
+        queryset = FriendList.objects.all() if queryset is None else queryset
+        links = dict()
+        for friendlist in queryset.iterator():
+            for key, state, reverse in [('friends', Friendship.FRIEND, False), ('sent', Friendship.PENDING, False), ('received', Friendship.PENDING, True)]:
+                for uid, dates in (friendlist.get_data(key) or {}).items():
+                    pair = (uid, friendlist.user_id) if reverse else (friendlist.user_id, uid)
+                    when = (dates[0] if isinstance(dates, (list, tuple)) and dates else None) or timezone.now()
+                    if state == Friendship.FRIEND:
+                        links[pair] = links[pair[::-1]] = (state, when)
+                    else:
+                        links.setdefault(pair, (state, when))
+        # Ignorer les utilisateurs supprimés et les liens existants
+        user_ids = set(get_user_model().objects.filter(pk__in={uid for pair in links for uid in pair}).values_list('pk', flat=True))
+        existing = set(self.filter(user_id__in=user_ids).values_list('user_id', 'friend_id'))
+        created = [Friendship(user_id=pair[0], friend_id=pair[1], state=state, time=when) for pair, (state, when) in links.items()
+                   if pair not in existing and pair[0] != pair[1] and set(pair) <= user_ids]
+        self.bulk_create(created, batch_size=batch_size)
+        if clear:
+            for friendlist in queryset.iterator():
+                friendlist.set_data_all({}, save=True)
+        return len(created)
+
+
+class Friendship(models.Model):
+    """ Lien d'amitié ou demande d'amitié entre deux utilisateurs """
+
+    # Constantes
+    FRIEND, PENDING = 0, 1
+    STATES = [[FRIEND, _("Friend")], [PENDING, _("Pending request")]]
+
+    # Champs
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='friendship_links', verbose_name=_("User"))
+    friend = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='friendship_links_in', verbose_name=_("Friend"))
+    state = models.SmallIntegerField(choices=STATES, default=FRIEND, verbose_name=_("State"))
+    time = models.DateTimeField(default=timezone.now, verbose_name=_("Time"))
+    objects = FriendshipManager()
+
+    # Overrides
+    def __str__(self):
+        """ Renvoyer la représentation unicode de l'objet """
+        return "{user} → {friend} ({state})".format(user=self.user, friend=self.friend, state=self.get_state_display())
+
+    # Métadonnées
+    class Meta:
+        verbose_name = _("friendship")
+        verbose_name_plural = _("friendships")
+        unique_together = [['user', 'friend']]
+        index_together = [['user', 'state', 'friend'], ['friend', 'state', 'user']]
+        app_label = 'social'
@@ -13,10 +13,9 @@ from scoop.core.abstract.core.uuid import UUID64Model
 from scoop.core.abstract.social.access import PrivacyModel
 from scoop.core.abstract.social.invite import InviteTargetModel
 from scoop.core.abstract.user.authored import AuthoredModel
-from scoop.core.util.model.model import SingleDeleteQuerySetMixin
 
 
-class GroupQuerySet(models.QuerySet, SingleDeleteQuerySetMixin):
+class GroupQuerySet(models.QuerySet):
     # Mixin de Queryset des groupes
 
     # Getter
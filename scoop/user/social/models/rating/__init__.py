@@ -1,3 +1,5 @@
 # coding: utf-8
 from .like import Like
 from .rating import Axis, AxisTranslation, Rating
+from .score import Score
+from .summary import RatingSummary
@@ -7,6 +7,7 @@ from django.utils.translation import ugettext_lazy as _
 from scoop.core.abstract.core.datetime import DatetimeModel
 from scoop.core.util.model.model import SingleDeleteManager
 from scoop.core.util.signals import record
+from scoop.user.social.models.rating.summary import RatingSummary, SummarizedModel
 
 
 class LikeManager(SingleDeleteManager):
@@ -58,9 +59,12 @@ class LikeManager(SingleDeleteManager):
         return False
 
 
-class Like(DatetimeModel):
+class Like(DatetimeModel, SummarizedModel):
     """ Annotation "J'aime" sur un objet arbitraire. """
 
+    # Constantes
+    SUMMARY_KIND = RatingSummary.LIKE
+
     # Champs
     author = models.ForeignKey(settings.AUTH_USER_MODEL, null=False, related_name='likees', verbose_name=_("Author"))
     content_type = models.ForeignKey('contenttypes.ContentType', null=True, blank=False, verbose_name=_("Content type"),
@@ -69,13 +73,12 @@ class Like(DatetimeModel):
     content_object = fields.GenericForeignKey('content_type', 'object_id')
     objects = LikeManager()
 
-    # Overrides
-    def delete(self, *args, **kwargs):
-        """ Supprimer l'objet de la base de données """
-        self.content_type = None
-        self.object_id = None
-        super().delete(*args, **kwargs)
+    # Getter
+    def get_summary_entries(self):
+        """ Renvoyer le résumé concerné par le like """
+        return [(self.content_type_id, self.object_id, 0, 1)] if self.content_type_id is not None else []
 
+    # Overrides
     def __str__(self):
         """ Renvoyer la représentation unicode de l'objet """
         return _("{user} likes {target}").format(user=self.author.username, target=self)
@@ -5,7 +5,6 @@ from django.contrib.contenttypes import fields
 from django.contrib.contenttypes.fields import ContentType, GenericRelation
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models.aggregates import Avg, Count, Sum
 from django.utils.translation import ugettext_lazy as _
 from scoop.core.abstract.core.datetime import DatetimeModel
 from scoop.core.abstract.core.translation import TranslationModel
@@ -13,6 +12,7 @@ from scoop.core.abstract.core.weight import WeightedModel
 from scoop.core.util.data.uuid import uuid_bits
 from scoop.core.util.model.model import SingleDeleteManager, limit_to_model_names
 from scoop.core.util.shortcuts import addattr
+from scoop.user.social.models.rating.summary import RatingSummary, SummarizedModel
 from translatable.exceptions import MissingTranslation
 from translatable.models import TranslatableModel, get_translation_model
 
@@ -76,16 +76,16 @@ class RatingManager(SingleDeleteManager):
     # Setter
     def rate(self, author, item, value, axis=None):
         """ Ajouter une note à un objet """
-        rating = Rating(content_object=item, value=value, author=author, axis=axis)
+        rating = Rating(content_object=item, rating=value, author=author, axis=axis)
         rating.save()
 
     def unrate(self, author, item):
         """ Retirer une note à un objet """
         content_type = ContentType.objects.get_for_model(item)
-        self.filter(author=author, content_type=content_type, id=item.pk).delete()
+        self.filter(author=author, content_type=content_type, object_id=item.pk).delete()
 
 
-class Rating(DatetimeModel):
+class Rating(DatetimeModel, SummarizedModel):
     """ Note donnée par un utilisateur à un objet arbitraire """
 
     # Champs
@@ -98,17 +98,18 @@ class Rating(DatetimeModel):
     content_object = fields.GenericForeignKey('content_type', 'object_id')
     objects = RatingManager()
 
+    # Getter
+    def get_summary_entries(self):
+        """ Renvoyer les résumés concernés par la note : tous les axes et l'axe de la note """
+        if self.content_type_id is None:
+            return []
+        return [(self.content_type_id, self.object_id, axis, self.rating) for axis in {0, self.axis_id or 0}]
+
     # Overrides
     def __str__(self):
         """ Renvoyer la représentation unicode de l'objet """
         return _("{user} gave {item} {rating:.03f} points").format(rating=self.rating, item=self.content_object, user=self.author)
 
-    def delete(self, *args, **kwargs):
-        """ Supprimer l'objet de la base de données """
-        self.content_type = None
-        self.object_id = None
-        super(Rating, self).delete(*args, **kwargs)
-
     # Métadonnées
     class Meta:
         verbose_name = _("rating")
@@ -126,45 +127,36 @@ class RatedModel(models.Model):
     # Setter
     def rate(self, author, value, axis=None):
         """ Ajouter une note """
-        rating = Rating(content_object=self, value=value, author=author, axis=axis)
+        rating = Rating(content_object=self, rating=value, author=author, axis=axis)
         rating.save()
 
     def unrate(self, author):
         """ Retirer une note """
         content_type = ContentType.objects.get_for_model(self)
-        Rating.objects.filter(content_type=content_type, id=self.pk).delete()
+        Rating.objects.filter(author=author, content_type=content_type, object_id=self.pk).delete()
 
     # Getter
+    def get_rating_summary(self, axis=None):
+        """ Renvoyer le résumé des notes sur un axe, ou sur tous les axes """
+        return RatingSummary.objects.get_for(self, RatingSummary.RATING, axis)
+
     def get_rating_average(self, axis=None):
         """ Renvoyer la note moyenne sur un axe """
-        ratings = self.ratings.all()
-        if axis is not None:
-            ratings = ratings.filter(axis=axis)
-        result = ratings.aggregate(Avg('rating'))
-        return result['rating__avg']
+        summary = self.get_rating_summary(axis)
+        return summary.average if summary.count else None
 
     def get_rating_sum(self, axis=None):
         """ Renvoyer la somme des notes sur un axe """
-        ratings = self.ratings.all()
-        if axis is not None:
-            ratings = ratings.filter(axis=axis)
-        result = ratings.aggregate(Sum('rating'))
-        return result['rating__sum']
+        summary = self.get_rating_summary(axis)
+        return summary.total if summary.count else None
 
     def get_rating_count(self, axis=None, values=None):
         """ Renvoyer le nombre de notes sur un axe """
-        ratings = self.ratings.all()
-        if axis is not None:
-            ratings = ratings.filter(axis=axis)
-        if values is not None:
-            ratings = ratings.filter(rating__range=values)
-        return ratings.count()
+        return self.get_rating_summary(axis).get_count(values)
 
     def get_rating_counts(self, axis=None):
         """ Renvoyer le nombre de votes par note """
-        criteria = {'axis': axis} if axis is not None else {}
-        data = self.ratings.filter(**criteria).values('rating').annotate(count=Count('rating'))
-        return data
+        return self.get_rating_summary(axis).get_counts()
 
     # Métadonnées
     class Meta:
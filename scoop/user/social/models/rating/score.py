@@ -1,11 +1,13 @@
 # coding: utf-8
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.fields import ContentType
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models.aggregates import Avg, Sum
 from django.utils.translation import ugettext_lazy as _
 from scoop.core.abstract.core.datetime import DatetimeModel
 from scoop.core.util.model.model import SingleDeleteManager
+from scoop.user.social.models.rating.summary import RatingSummary, SummarizedModel
 
 
 class ScoreManager(SingleDeleteManager):
@@ -15,7 +17,7 @@ class ScoreManager(SingleDeleteManager):
     def add(self, author, user, count=1, axis=0):
         """ Ajouter des points à un utilisateur sur un axe """
         if author.has_perm('social.add_score'):
-            score = self.get_or_create(author=author, user=user, axis=axis)
+            score, _ = self.get_or_create(author=author, user=user, axis=axis)
             # Ajouter les points
             score.score = count
             score.save()
@@ -23,22 +25,21 @@ class ScoreManager(SingleDeleteManager):
     # Getter
     def get_average(self, user, axis=0):
         """ Renvoyer le score moyen d'un utilisateur sur un axe """
-        points = self.filter(axis=axis)
-        result = points.aggregate(average=Avg('score'))
-        return result['average']
+        summary = RatingSummary.objects.get_for(user, RatingSummary.SCORE, axis)
+        return summary.average if summary.count else None
 
     def get_total(self, user, axis=0):
         """ Renvoyer le score total d'un utilisateur sur un axe """
-        points = self.filter(axis=axis)
-        result = points.aggregate(total=Sum('score'))
-        return result['total']
+        summary = RatingSummary.objects.get_for(user, RatingSummary.SCORE, axis)
+        return summary.total if summary.count else None
 
 
-class Score(DatetimeModel):
+class Score(DatetimeModel, SummarizedModel):
     """ Score utilisateur """
 
     # Constantes
     SCORE_AXIS = [(0, _("General"))]
+    SUMMARY_KIND = RatingSummary.SCORE
 
     # Champs
     author = models.ForeignKey(settings.AUTH_USER_MODEL, null=False, related_name='score_given', verbose_name=_("Author"))
@@ -47,6 +48,11 @@ class Score(DatetimeModel):
     score = models.IntegerField(default=0, validators=[MaxValueValidator(100), MinValueValidator(0)], verbose_name=_("Score"))
     objects = ScoreManager()
 
+    # Getter
+    def get_summary_entries(self):
+        """ Renvoyer le résumé des scores de l'utilisateur sur l'axe """
+        return [(ContentType.objects.get_for_model(get_user_model()).id, self.user_id, self.axis, self.score)]
+
     class Meta(object):
         """ M2tadonnées """
         verbose_name = _("user score")
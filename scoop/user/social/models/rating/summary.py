@@ -0,0 +1,206 @@
+# coding: utf-8
+from collections import defaultdict
+
+import picklefield
+from django.contrib.contenttypes import fields
+from django.contrib.contenttypes.fields import ContentType
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.aggregates import Count
+from django.db.models.expressions import RawSQL
+from django.utils.translation import ugettext_lazy as _
+from scoop.core.util.model.model import SingleDeleteManager
+
+
+class RatingSummaryManager(SingleDeleteManager):
+    """ Manager des résumés de notes """
+
+    # Getter
+    def get_for(self, item, kind, axis=None):
+        """
+        Renvoyer le résumé d'un objet, ou un résumé vide
+
+        :param kind: type d'annotation, RatingSummary.RATING, LIKE ou SCORE
+        :param axis: axe de notation, tous les axes si None
+        """
+        content_type = ContentType.objects.get_for_model(item)
+        criteria = {'content_type': content_type, 'object_id': item.pk, 'kind': kind, 'axis': getattr(axis, 'pk', axis) or 0}
+        return self.filter(**criteria).first() or RatingSummary(**criteria)
+
+    def annotate_summary(self, queryset, kind, axis=None, prefix='rating'):
+        """
+        Annoter un queryset avec les valeurs des résumés de ses objets
+
+        Ajoute les annotations <prefix>_count, <prefix>_sum et <prefix>_average,
+        qui permettent de trier et filtrer le queryset sans agrégation.
+        :param kind: type d'annotation, RatingSummary.RATING, LIKE ou SCORE
+        :param axis: axe de notation, tous les axes si None
+        :type queryset: django.db.models.QuerySet
+        """
+        model, quote = queryset.model, connection.ops.quote_name
+        content_type = ContentType.objects.get_for_model(model)
+        sql = "COALESCE((SELECT {table}.{{column}} FROM {table} WHERE {table}.content_type_id = %s AND {table}.object_id = {target}.{pk} " \
+              "AND {table}.kind = %s AND {table}.axis = %s), 0)".format(table=quote(self.model._meta.db_table), target=quote(model._meta.db_table),
+                                                                         pk=quote(model._meta.pk.column))
+        params = (content_type.id, kind, getattr(axis, 'pk', axis) or 0)
+        annotations = {'{prefix}_{name}'.format(prefix=prefix, name=name): RawSQL(sql.format(column=quote(column)), params)
+                       for name, column in [('count', 'count'), ('sum', 'total'), ('average', 'average')]}
+        return queryset.annotate(**annotations)
+
+    # Setter
+    def tally(self, instance, delta=1):
+        """
+        Répercuter l'ajout ou la suppression d'une annotation dans les résumés
+
+        Un résumé n'existe que tant qu'il compte des annotations : il est supprimé
+        lorsque sa dernière annotation l'est, par exemple en cascade avec l'objet noté.
+        :param instance: note, like ou score
+        :param delta: 1 pour un ajout, -1 pour une suppression
+        :type instance: SummarizedModel
+        """
+        with transaction.atomic():
+            for content_type_id, object_id, axis, value in instance.get_summary_entries():
+                criteria = {'content_type_id': content_type_id, 'object_id': object_id, 'kind': instance.SUMMARY_KIND, 'axis': axis}
+                summary = self.select_for_update().filter(**criteria).first()
+                if summary is None:
+                    if delta < 0:
+                        continue
+                    try:
+                        with transaction.atomic():
+                            summary = self.create(**criteria)
+                    except IntegrityError:
+                        # Résumé créé entre-temps par un autre processus
+                        summary = self.select_for_update().get(**criteria)
+                summary.add(value, delta, save=False)
+                if summary.count > 0:
+                    summary.save()
+                else:
+                    summary.delete()
+
+    def rebuild(self):
+        """
+        Recalculer tous les résumés depuis les notes, likes et scores
+
+        :returns: le nombre de résumés créés
+        """
+        from scoop.user.social.models.rating.like import Like
+        from scoop.user.social.models.rating.rating import Rating
+        from scoop.user.social.models.rating.score import Score
+        summaries = dict()
+        user_type = ContentType.objects.get_for_model(Score._meta.get_field('user').related_model)
+
+        def _add(key, value, count):
+            """ Ajouter des annotations à un résumé """
+            summary = summaries.setdefault(key, RatingSummary(content_type_id=key[0], object_id=key[1], kind=key[2], axis=key[3]))
+            summary.add(value, count, save=False)
+
+        with transaction.atomic():
+            self.all().delete()
+            for row in Rating.objects.filter(content_type__isnull=False).values('content_type', 'object_id', 'axis', 'rating').annotate(count=Count('id')):
+                for axis in {0, row['axis'] or 0}:
+                    _add((row['content_type'], row['object_id'], RatingSummary.RATING, axis), row['rating'], row['count'])
+            for row in Like.objects.filter(content_type__isnull=False).values('content_type', 'object_id').annotate(count=Count('id')):
+                _add((row['content_type'], row['object_id'], RatingSummary.LIKE, 0), 1, row['count'])
+            for row in Score.objects.values('user', 'axis', 'score').annotate(count=Count('id')):
+                _add((user_type.id, row['user'], RatingSummary.SCORE, row['axis']), row['score'], row['count'])
+            self.bulk_create(summaries.values(), batch_size=1000)
+        return len(summaries)
+
+
+class RatingSummary(models.Model):
+    """
+    Résumé des notes, likes ou scores reçus par un objet
+
+    Le nombre, la somme, la moyenne et l'histogramme des valeurs sont
+    maintenus à chaque ajout ou suppression, pour éviter une agrégation
+    par objet dans les listes.
+    Les notes et likes des objets RatedModel et LikableModel, et les scores,
+    sont supprimés en cascade avec l'objet, ce qui supprime ses résumés.
+    Les résumés d'autres objets ne sont retirés qu'avec leurs annotations.
+    """
+
+    # Constantes
+    RATING, LIKE, SCORE = 0, 1, 2
+    KINDS = [[RATING, _("Rating")], [LIKE, _("Like")], [SCORE, _("Score")]]
+
+    # Champs
+    content_type = models.ForeignKey('contenttypes.ContentType', verbose_name=_("Content type"))
+    object_id = models.PositiveIntegerField(verbose_name=_("Object Id"))
+    content_object = fields.GenericForeignKey('content_type', 'object_id')
+    kind = models.SmallIntegerField(choices=KINDS, default=RATING, verbose_name=_("Kind"))
+    axis = models.PositiveIntegerField(default=0, verbose_name=_("Axis"))  # 0 pour tous les axes
+    count = models.IntegerField(default=0, verbose_name=_("Count"))
+    total = models.FloatField(default=0, verbose_name=_("Sum"))
+    average = models.FloatField(default=0, verbose_name=_("Average"))
+    histogram = picklefield.PickledObjectField(default=dict, protocol=3, verbose_name=_("Histogram"))  # {valeur: nombre}
+    objects = RatingSummaryManager()
+
+    # Getter
+    def get_count(self, values=None):
+        """
+        Renvoyer le nombre d'annotations
+
+        :param values: tuple (minimum, maximum) des valeurs à compter, toutes si None
+        """
+        if values is None:
+            return self.count
+        return sum(count for value, count in self.histogram.items() if values[0] <= value <= values[1])
+
+    def get_counts(self):
+        """ Renvoyer le nombre d'annotations par valeur """
+        return [{'rating': value, 'count': count} for value, count in sorted(self.histogram.items())]
+
+    # Setter
+    def add(self, value, delta=1, save=True):
+        """ Ajouter (ou retirer si delta < 0) des annotations d'une valeur """
+        histogram = defaultdict(int, self.histogram)
+        histogram[value] += delta
+        self.histogram = {key: count for key, count in histogram.items() if count > 0}
+        self.count += delta
+        self.total += value * delta
+        self.average = self.total / self.count if self.count > 0 else 0
+        if save is True:
+            self.save()
+
+    # Overrides
+    def __str__(self):
+        """ Renvoyer la représentation unicode de l'objet """
+        return _("{count} items, average {average:.02f}").format(count=self.count, average=self.average)
+
+    # Métadonnées
+    class Meta:
+        verbose_name = _("rating summary")
+        verbose_name_plural = _("rating summaries")
+        unique_together = [['content_type', 'object_id', 'kind', 'axis']]
+        index_together = [['content_type', 'kind', 'axis', 'average']]
+        app_label = 'social'
+
+
+class SummarizedModel(models.Model):
+    """
+    Mixin des annotations comptabilisées dans les résumés de notes
+
+    La création et la modification mettent à jour les résumés dans la même transaction,
+    la suppression est répercutée par le listener social.listeners.rating.
+    """
+
+    # Constantes
+    SUMMARY_KIND = RatingSummary.RATING
+
+    # Getter
+    def get_summary_entries(self):
+        """ Renvoyer la liste des résumés concernés, sous forme de tuples (content_type_id, object_id, axis, valeur) """
+        raise NotImplementedError()
+
+    # Overrides
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        """ Enregistrer l'objet et mettre à jour les résumés """
+        previous = type(self)._base_manager.filter(pk=self.pk).first() if self.pk else None
+        super(SummarizedModel, self).save(*args, **kwargs)
+        if previous is not None:
+            RatingSummary.objects.tally(previous, -1)
+        RatingSummary.objects.tally(self, 1)
+
+    # Métadonnées
+    class Meta:
+        abstract = True
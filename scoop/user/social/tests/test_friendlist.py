@@ -49,3 +49,32 @@ class FriendlistTest(TestCase):
         self.assertEqual(user4.friends.get_distinct_friend_users(user2, count=True), 1)  # user5 pas en commun
         self.assertEqual(user2.friends.get_distinct_friend_users(user4, count=True, symmetric=True), 1)  # doit être réflexif
         self.assertEqual(user2.friends.get_distinct_friend_users(user4, count=True, symmetric=False), 0)
+
+    def test_friendship_links(self):
+        """ Vérifier les requêtes sur les liens d'amitié et l'import des listes sérialisées """
+        from scoop.user.social.models.friend.friendlist import FriendList
+        from scoop.user.social.models.friend.friendship import Friendship
+        user1, user2, user3, user4 = [User.objects.create(username='link{0}'.format(index), email='link{0}@foo.bar'.format(index)) for index in range(4)]
+        user1.friends.add_friend(user2)
+        user2.friends.add_friend(user3)
+        user3.friends.add_sent(user4)
+
+        self.assertTrue(user2.friends.is_friend(user1), "friendship should be symmetric")
+        self.assertTrue(user4.friends.is_received(user3), "user4 should have received a request from user3")
+        self.assertEqual(user1.friends.get_mutual_friend_users(user3, count=True), 1)  # user2 en commun
+        self.assertEqual(list(user1.friends.get_unknown_friend_users()), [user3])
+        user4.friends.accept_received(user3)
+        self.assertTrue(user3.friends.is_friend(user4))
+        self.assertEqual(user3.friends.get_sent_count(), 0, "accepted requests should not stay pending")
+        self.assertTrue(user1.friends.remove_friend(user2))
+        self.assertFalse(user2.friends.is_friend(user1))
+
+        # Importer des listes sérialisées
+        Friendship.objects.all().delete()
+        FriendList.objects.get(user=user1).set_data('friends', {user2.pk: []}, save=True)
+        FriendList.objects.get(user=user2).set_data('friends', {user1.pk: []}, save=True)
+        FriendList.objects.get(user=user3).set_data('sent', {user4.pk: []}, save=True)
+        self.assertEqual(Friendship.objects.import_friendlists(), 3)
+        self.assertTrue(user1.friends.is_friend(user2))
+        self.assertTrue(user4.friends.is_received(user3))
+        self.assertEqual(Friendship.objects.import_friendlists(), 0, "existing links should not be imported twice")
@@ -0,0 +1,55 @@
+# coding: utf-8
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.core.util.django.testing import TEST_CONFIGURATION
+from scoop.user.social.models.rating.rating import Rating
+from scoop.user.social.models.rating.score import Score
+from scoop.user.social.models.rating.summary import RatingSummary
+
+User = get_user_model()
+
+
+@override_settings(**TEST_CONFIGURATION)
+class RatingSummaryTest(TestCase):
+    """ Test des résumés de notes """
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        self.users = [User.objects.create(username='rating{0}'.format(index), email='rating{0}@foo.bar'.format(index)) for index in range(4)]
+
+    def test_rating_summary(self):
+        """ Vérifier la mise à jour des résumés à la création, modification et suppression """
+        target = self.users[0]
+        for author, value in zip(self.users[1:], [2, 4, 4]):
+            Rating.objects.rate(author, target, value)
+        summary = RatingSummary.objects.get_for(target, RatingSummary.RATING)
+        self.assertEqual(summary.count, 3)
+        self.assertEqual(summary.total, 10)
+        self.assertEqual(summary.get_counts(), [{'rating': 2, 'count': 1}, {'rating': 4, 'count': 2}])
+        self.assertEqual(summary.get_count(values=(3, 5)), 2)
+        rating = Rating.objects.get(author=self.users[1])
+        rating.rating = 8
+        rating.save()
+        self.assertEqual(RatingSummary.objects.get_for(target, RatingSummary.RATING).total, 16, "updates should replace the previous value")
+        Rating.objects.unrate(self.users[2], target)
+        summary = RatingSummary.objects.get_for(target, RatingSummary.RATING)
+        self.assertEqual((summary.count, summary.average), (2, 6))
+        # Recalculer les résumés depuis les notes
+        RatingSummary.objects.all().delete()
+        self.assertEqual(RatingSummary.objects.rebuild(), 1)
+        self.assertEqual(RatingSummary.objects.get_for(target, RatingSummary.RATING).histogram, {4: 1, 8: 1})
+        # Le résumé est supprimé avec la dernière note
+        Rating.objects.filter(object_id=target.pk).delete()
+        self.assertFalse(RatingSummary.objects.filter(object_id=target.pk, kind=RatingSummary.RATING).exists())
+
+    def test_annotation(self):
+        """ Vérifier le tri d'un queryset par score sans agrégation """
+        Score.objects.create(author=self.users[0], user=self.users[1], score=10)
+        Score.objects.create(author=self.users[0], user=self.users[2], score=30)
+        Score.objects.create(author=self.users[1], user=self.users[2], score=50)
+        users = RatingSummary.objects.annotate_summary(User.objects.filter(username__startswith='rating'), RatingSummary.SCORE, prefix='score')
+        ranking = list(users.order_by('-score_average').values_list('username', 'score_count'))
+        self.assertEqual(ranking[:2], [('rating2', 2), ('rating1', 1)])
+        self.assertEqual(users.filter(score_average__gte=20).count(), 1)
+        self.assertEqual(Score.objects.get_total(self.users[2]), 80)
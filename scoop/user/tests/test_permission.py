@@ -0,0 +1,67 @@
+# coding: utf-8
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from scoop.user.util.permission import permission_cache
+
+User = get_user_model()
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'permission-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, AUTHENTICATION_BACKENDS=['scoop.user.backends.auth.cached.CachedPermissionBackend'])
+class PermissionTest(TestCase):
+    """ Test du cache partagé des permissions """
+    fixtures = ['mailtype', 'options']
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        cache.clear()
+        self.user = User.objects.create(username='permuser', email='perm@foobar.foo')
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.group = Group.objects.create(name='permgroup')
+        self.group.permissions.add(Permission.objects.get(content_type__app_label='auth', codename='add_group'))
+        self.user.groups.add(self.group)
+
+    def get_user(self):
+        """ Renvoyer une nouvelle instance de l'utilisateur, comme à chaque requête """
+        return User.objects.get(pk=self.user.pk)
+
+    def test_cache(self):
+        """ Vérifier que les permissions sont lues depuis le cache et invalidées """
+        self.assertTrue(self.get_user().has_perm('auth.add_group'))
+        user = self.get_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('auth.add_group'))
+            self.assertFalse(user.has_perm('auth.change_group'))
+        # Modifier les permissions du groupe
+        self.group.permissions.add(Permission.objects.get(content_type__app_label='auth', codename='change_group'))
+        self.assertTrue(self.get_user().has_perm('auth.change_group'))
+        # Modifier les groupes de l'utilisateur, des deux côtés de la relation
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.get_user().has_perm('auth.add_group'))
+        self.group.user_set.add(self.user)
+        self.assertTrue(self.get_user().has_perm('auth.add_group'))
+
+    def test_flags(self):
+        """ Vérifier que les permissions en cache sont invalidées lorsque le statut de l'utilisateur change """
+        user = self.get_user()
+        user.is_superuser = True
+        user.save()
+        # Les permissions résolues d'un superutilisateur comprennent toutes les permissions
+        self.assertIn('auth.delete_group', self.get_user().get_all_permissions())
+        # Retirer le statut de superutilisateur
+        user.is_superuser = False
+        user.save()
+        self.assertFalse(self.get_user().has_perm('auth.delete_group'))
+        self.assertTrue(self.get_user().has_perm('auth.add_group'))
+        # Enregistrer sans changer le statut conserve les permissions en cache
+        key = permission_cache.get_key(self.user.pk)
+        user = self.get_user()
+        user.name = "renamed"
+        user.save()
+        self.assertEqual(permission_cache.get_key(self.user.pk), key)
+        # Désactiver l'utilisateur par lot
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(self.get_user().has_perm('auth.add_group'))
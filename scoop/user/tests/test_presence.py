@@ -0,0 +1,39 @@
+# coding: utf-8
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from scoop.user.util.presence import PresenceStore
+
+
+class PresenceTest(TestCase):
+    """ Test du suivi des utilisateurs en ligne """
+
+    def setUp(self):
+        """ Préparer l'environnement de test """
+        self.presence = PresenceStore(duration=900, bucket=60, cache=LocMemCache('presence-test', {}))
+        self.presence.cache.clear()
+        self.start = 1000000
+
+    def test_online_users(self):
+        """ Vérifier le nombre et la liste des utilisateurs en ligne """
+        self.presence.touch(1, self.start)
+        self.presence.touch(2, self.start + 5)
+        self.presence.touch(1, self.start + 10)  # Même tranche, aucun effet sur le compte
+        self.presence.touch(1, self.start + 70)  # Nouvelle tranche, l'utilisateur est déplacé
+        self.presence.touch(3, self.start + 130)
+        now = self.start + 130
+        self.assertEqual(self.presence.get_count(now), 3)
+        self.assertEqual(self.presence.get_user_ids(timestamp=now), {1, 2, 3})
+        self.assertTrue(self.presence.is_online(2, timestamp=now))
+
+    def test_offline_users(self):
+        """ Vérifier que les utilisateurs déconnectés ou inactifs ne sont plus en ligne """
+        self.presence.touch(1, self.start)
+        self.presence.touch(2, self.start)
+        self.presence.remove(2)
+        self.assertEqual(self.presence.get_count(self.start), 1)
+        self.assertEqual(self.presence.get_user_ids(timestamp=self.start), {1})
+        # Après la durée de présence, plus personne n'est en ligne
+        later = self.start + 1000
+        self.assertEqual(self.presence.get_count(later), 0)
+        self.assertEqual(self.presence.get_user_ids(timestamp=later), set())
+        self.assertFalse(self.presence.is_online(1, timestamp=later))
@@ -0,0 +1,88 @@
+# coding: utf-8
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+__all__ = ['PermissionCache', 'permission_cache']
+
+
+class PermissionCache(object):
+    """
+    Cache partagé des permissions résolues des utilisateurs
+
+    Les permissions d'un utilisateur sont stockées sous une clé versionnée par
+    deux compteurs : une version globale, incrémentée lorsque les permissions
+    d'un groupe changent, et une version par utilisateur, incrémentée lorsque
+    ses groupes ou ses permissions changent. Une invalidation ne supprime
+    aucune clé : les anciennes versions ne sont simplement plus lues, et
+    une résolution concurrente ne peut pas réécrire une version invalidée.
+    """
+
+    # Champs de l'utilisateur dont dépendent ses permissions résolues
+    FLAGS = ('is_active', 'is_superuser')
+    VERSION_KEY = 'user.permissions.version'
+    USER_VERSION_KEY = 'user.permissions.version.{user}'
+    PERMISSIONS_KEY = 'user.permissions.{version}.{user}.{user_version}'
+
+    def __init__(self, timeout=None, cache=None):
+        """
+        Initialiser le cache de permissions
+
+        :param timeout: durée de vie en secondes des permissions en cache, USER_PERMISSION_CACHE_TIMEOUT par défaut
+        :param cache: backend de cache à utiliser, cache par défaut si None
+        """
+        self.timeout = timeout if timeout is not None else getattr(settings, 'USER_PERMISSION_CACHE_TIMEOUT', 86400)
+        self.cache = cache or default_cache
+
+    # Getter
+    def is_enabled(self):
+        """ Renvoyer si le cache est actif (l'invalidation dépend des signaux) """
+        return self.timeout > 0 and not getattr(settings, 'SCOOP_DISABLE_SIGNALS', False)
+
+    def get_key(self, user_id):
+        """ Renvoyer la clé actuelle des permissions d'un utilisateur """
+        user_key = self.USER_VERSION_KEY.format(user=user_id)
+        versions = self.cache.get_many([self.VERSION_KEY, user_key])
+        for key in {self.VERSION_KEY, user_key}.difference(versions):
+            # Une version évincée ne doit pas réactiver d'anciennes clés
+            self.cache.add(key, int(time.time() * 1000), None)
+            versions[key] = self.cache.get(key, 0)
+        return self.PERMISSIONS_KEY.format(version=versions[self.VERSION_KEY], user=user_id, user_version=versions[user_key])
+
+    def get(self, user_id, resolve):
+        """
+        Renvoyer les permissions d'un utilisateur, résolues et mises en cache si nécessaire
+
+        :param user_id: id de l'utilisateur
+        :param resolve: fonction sans argument renvoyant l'ensemble des permissions
+        :returns: un ensemble de chaînes "app_label.codename"
+        """
+        key = self.get_key(user_id)
+        permissions = self.cache.get(key)
+        if permissions is None:
+            permissions = set(resolve())
+            self.cache.set(key, permissions, self.timeout)
+        return permissions
+
+    # Actions
+    def invalidate(self, *user_ids):
+        """ Invalider les permissions en cache d'utilisateurs """
+        for user_id in user_ids:
+            self._increment(self.USER_VERSION_KEY.format(user=user_id))
+
+    def invalidate_all(self):
+        """ Invalider les permissions en cache de tous les utilisateurs """
+        self._increment(self.VERSION_KEY)
+
+    # Privé
+    def _increment(self, key):
+        """ Incrémenter un compteur de version """
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, int(time.time() * 1000), None)
+
+
+# Cache de permissions par défaut
+permission_cache = PermissionCache()
@@ -0,0 +1,126 @@
+# coding: utf-8
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+__all__ = ['PresenceStore', 'presence']
+
+
+class PresenceStore(object):
+    """
+    Suivi des utilisateurs en ligne par tranches de temps
+
+    Chaque utilisateur possède une clé contenant son dernier timestamp d'activité.
+    Le temps est découpé en tranches de `bucket` secondes : la première activité
+    d'un utilisateur dans une tranche lui attribue une case de la tranche
+    (compteur atomique) et déplace son compte de sa tranche précédente vers
+    la tranche courante. Ainsi :
+    - le nombre d'utilisateurs en ligne est la somme des compteurs des tranches récentes, O(1)
+    - la liste des utilisateurs en ligne est lue depuis les cases des tranches récentes, O(k)
+    - aucune structure partagée n'est lue puis réécrite, seules cache.add et cache.incr sont utilisées
+    """
+
+    USER_KEY = 'user.profile.online.{user}'
+    MARKER_KEY = 'user.presence.{bucket}.user.{user}'
+    SLOTS_KEY = 'user.presence.{bucket}.slots'
+    SLOT_KEY = 'user.presence.{bucket}.slot.{slot}'
+    COUNT_KEY = 'user.presence.{bucket}.count'
+
+    def __init__(self, duration=900, bucket=None, cache=None):
+        """
+        Initialiser le suivi de présence
+
+        :param duration: durée en secondes pendant laquelle un utilisateur actif est considéré en ligne
+        :param bucket: largeur en secondes d'une tranche de temps
+        :param cache: backend de cache à utiliser, cache par défaut si None
+        """
+        self.duration = duration
+        self.bucket = bucket or getattr(settings, 'USER_PRESENCE_BUCKET', 60)
+        self.cache = cache or default_cache
+        self.timeout = duration + 2 * self.bucket
+
+    # Getter
+    def get_bucket(self, timestamp):
+        """ Renvoyer le numéro de tranche d'un timestamp """
+        return int(timestamp // self.bucket)
+
+    def get_buckets(self, timestamp=None, seconds=None):
+        """ Renvoyer les numéros des tranches de la fenêtre de présence """
+        timestamp = timestamp or time.time()
+        last = self.get_bucket(timestamp)
+        first = self.get_bucket(timestamp - (seconds or self.duration) + self.bucket - 1)
+        return range(first, last + 1)
+
+    def get_last_seen(self, user_id):
+        """ Renvoyer le timestamp de la dernière activité d'un utilisateur, ou None """
+        return self.cache.get(self.USER_KEY.format(user=user_id), None) or None
+
+    def is_online(self, user_id, seconds=None, timestamp=None):
+        """ Renvoyer si un utilisateur est en ligne """
+        value = self.get_last_seen(user_id)
+        return value is not None and value + (seconds or self.duration) >= (timestamp or time.time())
+
+    def get_count(self, timestamp=None):
+        """ Renvoyer le nombre d'utilisateurs en ligne """
+        keys = [self.COUNT_KEY.format(bucket=bucket) for bucket in self.get_buckets(timestamp)]
+        return max(0, sum(self.cache.get_many(keys).values()))
+
+    def get_user_ids(self, seconds=None, timestamp=None):
+        """ Renvoyer l'ensemble des ID d'utilisateurs en ligne """
+        timestamp = timestamp or time.time()
+        buckets = self.get_buckets(timestamp, seconds)
+        slots = self.cache.get_many([self.SLOTS_KEY.format(bucket=bucket) for bucket in buckets])
+        keys = [self.SLOT_KEY.format(bucket=bucket, slot=slot) for bucket in buckets
+                for slot in range(1, slots.get(self.SLOTS_KEY.format(bucket=bucket), 0) + 1)]
+        candidates = set(self.cache.get_many(keys).values())
+        # Ne conserver que les utilisateurs dont la dernière activité est dans la fenêtre
+        seen = self.cache.get_many([self.USER_KEY.format(user=user_id) for user_id in candidates])
+        limit = timestamp - (seconds or self.duration)
+        return {user_id for user_id in candidates if (seen.get(self.USER_KEY.format(user=user_id)) or 0) >= limit}
+
+    # Setter
+    def touch(self, user_id, timestamp=None):
+        """ Marquer un utilisateur comme actif """
+        timestamp = round(timestamp or time.time())
+        bucket = self.get_bucket(timestamp)
+        previous = self.get_last_seen(user_id)
+        self.cache.set(self.USER_KEY.format(user=user_id), timestamp, 2592000)
+        # Seul le premier passage de l'utilisateur dans la tranche est comptabilisé
+        if self.cache.add(self.MARKER_KEY.format(bucket=bucket, user=user_id), 1, self.timeout):
+            slot = self._incr(self.SLOTS_KEY.format(bucket=bucket))
+            self.cache.set(self.SLOT_KEY.format(bucket=bucket, slot=slot), user_id, self.timeout)
+            self._incr(self.COUNT_KEY.format(bucket=bucket))
+            if previous is not None and previous + self.duration >= timestamp:
+                self._decr(self.COUNT_KEY.format(bucket=self.get_bucket(previous)))
+
+    def remove(self, user_id):
+        """ Marquer un utilisateur comme hors ligne """
+        previous = self.get_last_seen(user_id)
+        self.cache.set(self.USER_KEY.format(user=user_id), 0, 2592000)
+        if previous is not None:
+            bucket = self.get_bucket(previous)
+            if self.cache.get(self.MARKER_KEY.format(bucket=bucket, user=user_id)):
+                self.cache.delete(self.MARKER_KEY.format(bucket=bucket, user=user_id))
+                self._decr(self.COUNT_KEY.format(bucket=bucket))
+
+    # Privé
+    def _incr(self, key):
+        """ Incrémenter atomiquement un compteur, en le créant si nécessaire """
+        self.cache.add(key, 0, self.timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:  # La clé a expiré entre temps
+            self.cache.set(key, 1, self.timeout)
+            return 1
+
+    def _decr(self, key):
+        """ Décrémenter atomiquement un compteur existant """
+        try:
+            return self.cache.decr(key)
+        except ValueError:
+            return 0
+
+
+# Suivi de présence par défaut
+presence = PresenceStore()
@@ -1,12 +1,14 @@
 # coding: utf-8
 from django.conf import settings
-from django.contrib.sitemaps import Sitemap
+from django.core.urlresolvers import reverse
+from scoop.core.util.django.sitemaps import PartitionedSitemap
 from scoop.user.models.user import User
 
 
-class ProfileSitemap(Sitemap):
+class ProfileSitemap(PartitionedSitemap):
     """ Sitemap des profils utilisateurs """
     limit = getattr(settings, 'SITEMAPS_ITEMS_PER_PAGE', 10000)
+    fields = ['id', 'username']
 
     # Getter
     def items(self):
@@ -16,3 +18,11 @@ class ProfileSitemap(Sitemap):
     def location(self, obj):
         """ Renvoyer l'URL d'un profil du sitemap """
         return obj.get_absolute_url()
+
+    def get_rows(self):
+        """ Renvoyer les éléments du sitemap """
+        return User.objects.active().values(*self.fields)
+
+    def get_row_location(self, row):
+        """ Renvoyer l'URL d'un profil du sitemap """
+        return reverse('user:profile-view', kwargs={'key': str(row['id']), 'name': row['username']})